@@ -0,0 +1,103 @@
+"""
+Índice de texto das agendas (consultor e projeto)
+
+Usa as chaves já normalizadas dos registros (sem acentos, minúsculas) e um
+índice invertido token -> posições das agendas. Filtros por trecho do nome
+percorrem apenas o vocabulário de tokens (algumas centenas de palavras) em
+vez de normalizar e comparar todas as agendas a cada pergunta.
+"""
+import re
+from typing import Dict, List, Optional, Sequence, Set
+from agenda_model import Agenda, normalizar_texto
+
+_TOKEN = re.compile(r'[a-z0-9]+')
+
+
+def tokens(texto_norm: str) -> List[str]:
+    """Palavras de um texto já normalizado"""
+    return _TOKEN.findall(texto_norm)
+
+
+class _IndiceCampo:
+    """Índice invertido de um campo: token -> posições das agendas"""
+
+    def __init__(self, valores: Sequence[str]):
+        self.valores = list(valores)
+        self.postings: Dict[str, Set[int]] = {}
+        for i, valor in enumerate(self.valores):
+            for token in tokens(valor):
+                self.postings.setdefault(token, set()).add(i)
+        self.vocabulario = sorted(self.postings)
+
+    def com_tokens(self, termos: List[str], parcial: bool) -> Set[int]:
+        """Posições com todos os termos (como token inteiro ou, se parcial, dentro de um token)"""
+        resultado: Optional[Set[int]] = None
+        for termo in termos:
+            if parcial:
+                achadas = set()
+                for token in self.vocabulario:
+                    if termo in token:
+                        achadas |= self.postings[token]
+            else:
+                achadas = self.postings.get(termo, set())
+            resultado = set(achadas) if resultado is None else resultado & achadas
+            if not resultado:
+                return set()
+        return resultado if resultado is not None else set()
+
+    def contem(self, texto_norm: str) -> Set[int]:
+        """Posições cujo valor contém o texto (mesma regra de 'texto in valor')"""
+        termos = tokens(texto_norm)
+        if not termos:
+            return {i for i, valor in enumerate(self.valores) if texto_norm in valor}
+
+        candidatas = self.com_tokens(termos, parcial=True)
+        if len(termos) == 1 and termos[0] == texto_norm:
+            return candidatas
+        # Vários termos (ou pontuação): confirmar o trecho inteiro nos candidatos
+        return {i for i in candidatas if texto_norm in self.valores[i]}
+
+
+class IndiceBusca:
+    """
+    Índice de texto sobre os registros de um snapshot
+
+    As posições seguem a ordem dos registros; os filtros devolvem as agendas
+    nessa mesma ordem (data_inicio decrescente, no caso do snapshot).
+    """
+
+    def __init__(self, registros: Sequence[Agenda]):
+        self.registros = list(registros)
+        self._campos = {
+            'consultor': _IndiceCampo([a.consultor_norm for a in self.registros]),
+            'projeto': _IndiceCampo([a.projeto_norm for a in self.registros]),
+        }
+
+    def posicoes(self, campo: str, texto: str, token: bool = False) -> Set[int]:
+        """
+        Posições das agendas cujo campo casa com o texto
+
+        Args:
+            campo: 'consultor' ou 'projeto'
+            texto: Texto procurado (acentos e maiúsculas são ignorados)
+            token: True exige palavras inteiras; False aceita trecho do nome
+        """
+        indice = self._campos[campo]
+        texto_norm = normalizar_texto(texto)
+        if token:
+            return indice.com_tokens(tokens(texto_norm), parcial=False)
+        return indice.contem(texto_norm)
+
+    def filtrar(self, consultor: Optional[str] = None, projeto: Optional[str] = None,
+                token: bool = False) -> List[Agenda]:
+        """Agendas que atendem a todos os filtros informados (sem filtros: todas)"""
+        selecionadas: Optional[Set[int]] = None
+        for campo, texto in (('consultor', consultor), ('projeto', projeto)):
+            if not texto:
+                continue
+            achadas = self.posicoes(campo, texto, token)
+            selecionadas = achadas if selecionadas is None else selecionadas & achadas
+
+        if selecionadas is None:
+            return list(self.registros)
+        return [self.registros[i] for i in sorted(selecionadas)]
@@ -0,0 +1,186 @@
+"""
+Armazenamento colunar (NumPy) das agendas do snapshot
+
+Construído uma vez por snapshot: datas como ordinais int32, consultor,
+projeto e gerente como códigos de categoria e VAGO como máscara booleana.
+Contagens e filtros das telas viram comparações vetorizadas.
+"""
+import numpy as np
+import pandas as pd
+from datetime import date
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+from agenda_model import Agenda
+
+# Ordinal de 01/01/1970: converte ordinais (date.toordinal) em datetime64[D]
+_ORDINAL_EPOCH = date(1970, 1, 1).toordinal()
+
+# Colunas montadas a partir dos arrays; as demais vêm das linhas originais
+_COLUNAS_ARRAYS = ("id", "consultor", "projeto", "gerente", "data_inicio", "data_fim", "is_vago")
+
+
+def _codificar(valores: Iterable) -> Tuple[np.ndarray, List, Dict]:
+    """Códigos int32 por categoria (categorias em ordem alfabética, -1 para vazio)"""
+    valores = list(valores)
+    categorias = sorted({v for v in valores if v is not None}, key=str)
+    posicoes = {v: i for i, v in enumerate(categorias)}
+    codigos = np.fromiter((posicoes.get(v, -1) if v is not None else -1 for v in valores),
+                          dtype=np.int32, count=len(valores))
+    return codigos, categorias, posicoes
+
+
+class AgendaColumns:
+    """
+    Agendas em colunas NumPy, na mesma ordem dos registros do snapshot
+
+    Os arrays são somente leitura e compartilhados entre as sessões.
+    """
+
+    def __init__(self, registros: Sequence[Agenda]):
+        self.registros = list(registros)
+        n = len(self.registros)
+
+        self.ids = np.fromiter((a.id for a in self.registros), dtype=np.int64, count=n)
+        self.inicio = np.fromiter((a.inicio_ord for a in self.registros), dtype=np.int32, count=n)
+        self.fim = np.fromiter((a.fim_ord for a in self.registros), dtype=np.int32, count=n)
+        self.vago = np.fromiter((a.is_vago for a in self.registros), dtype=bool, count=n)
+
+        self.consultor, self.consultores, self._pos_consultor = _codificar(a.consultor for a in self.registros)
+        self.projeto, self.projetos, self._pos_projeto = _codificar(a.projeto for a in self.registros)
+        self.gerente, self.gerentes, self._pos_gerente = _codificar(a.gerente for a in self.registros)
+        self.os, self.os_valores, _ = _codificar(a.os or None for a in self.registros)
+
+        for array in (self.ids, self.inicio, self.fim, self.vago, self.consultor, self.projeto, self.gerente, self.os):
+            array.flags.writeable = False
+
+    def __len__(self) -> int:
+        return len(self.registros)
+
+    # Máscaras ------------------------------------------------------------
+
+    def mascara_consultor(self, codigo: int) -> np.ndarray:
+        """Agendas do consultor (código em self.consultores)"""
+        return self.consultor == codigo
+
+    def mascara_projeto(self, codigo: int) -> np.ndarray:
+        """Agendas do projeto (código em self.projetos)"""
+        return self.projeto == codigo
+
+    def mascara_periodo(self, inicio: date, fim: date) -> np.ndarray:
+        """Agendas que se sobrepõem a [inicio, fim]"""
+        return (self.fim >= inicio.toordinal()) & (self.inicio <= fim.toordinal())
+
+    def mascara_inicio_entre(self, inicio: date, fim: date) -> np.ndarray:
+        """Agendas que começam dentro de [inicio, fim]"""
+        return (self.inicio >= inicio.toordinal()) & (self.inicio <= fim.toordinal())
+
+    def ativas_em(self, dia: date) -> np.ndarray:
+        """Agendas em andamento no dia"""
+        ordinal = dia.toordinal()
+        return (self.inicio <= ordinal) & (self.fim >= ordinal)
+
+    def proximas_a(self, dia: date) -> np.ndarray:
+        """Agendas que começam depois do dia"""
+        return self.inicio > dia.toordinal()
+
+    def concluidas_em(self, dia: date) -> np.ndarray:
+        """Agendas encerradas antes do dia"""
+        return self.fim < dia.toordinal()
+
+    # Contagens -----------------------------------------------------------
+
+    def contar_status(self, hoje: date) -> Dict[str, int]:
+        """Quantidade de agendas ativas, próximas e concluídas em relação a hoje"""
+        return {
+            'ativas': int(np.count_nonzero(self.ativas_em(hoje))),
+            'proximas': int(np.count_nonzero(self.proximas_a(hoje))),
+            'concluidas': int(np.count_nonzero(self.concluidas_em(hoje))),
+        }
+
+    @staticmethod
+    def _distintos(codigos: np.ndarray, mascara: Optional[np.ndarray]) -> int:
+        if mascara is not None:
+            codigos = codigos[mascara]
+        return int(np.unique(codigos[codigos >= 0]).size)
+
+    def consultores_distintos(self, mascara: Optional[np.ndarray] = None) -> int:
+        """Número de consultores diferentes (opcionalmente só nas agendas da máscara)"""
+        return self._distintos(self.consultor, mascara)
+
+    def projetos_distintos(self, mascara: Optional[np.ndarray] = None) -> int:
+        """Número de projetos diferentes (opcionalmente só nas agendas da máscara)"""
+        return self._distintos(self.projeto, mascara)
+
+    def kpis(self, hoje: date) -> Dict[str, int]:
+        """Mesmos indicadores da função SQL agendas_kpis (setup_kpis.sql)"""
+        ativas = self.ativas_em(hoje)
+        return {
+            'total': len(self),
+            **self.contar_status(hoje),
+            'consultores': self.consultores_distintos(),
+            'consultores_ativos': self.consultores_distintos(ativas),
+            'projetos': self.projetos_distintos(),
+            'os': self._distintos(self.os, None),
+        }
+
+    @staticmethod
+    def _contagem(codigos: np.ndarray, categorias: List, mascara: Optional[np.ndarray]) -> pd.Series:
+        if mascara is not None:
+            codigos = codigos[mascara]
+        contagem = np.bincount(codigos[codigos >= 0], minlength=len(categorias))
+        # Empates em ordem alfabética (as categorias já estão ordenadas)
+        ordem = np.argsort(-contagem, kind='stable')
+        ordem = ordem[contagem[ordem] > 0]
+        return pd.Series(contagem[ordem], index=[categorias[i] for i in ordem], dtype=np.int64)
+
+    def contagem_consultores(self, mascara: Optional[np.ndarray] = None) -> pd.Series:
+        """Agendas por consultor, em ordem decrescente (agrupadas pelos códigos)"""
+        return self._contagem(self.consultor, self.consultores, mascara)
+
+    def contagem_projetos(self, mascara: Optional[np.ndarray] = None) -> pd.Series:
+        """Agendas por projeto, em ordem decrescente (agrupadas pelos códigos)"""
+        return self._contagem(self.projeto, self.projetos, mascara)
+
+    def top_projetos(self, n: int = 10) -> List[Dict]:
+        """Os n projetos com mais agendas (mesmo formato de agendas_top_projetos)"""
+        return [{'projeto': projeto, 'agendas': int(agendas)}
+                for projeto, agendas in self.contagem_projetos().head(n).items()]
+
+    # Pandas --------------------------------------------------------------
+
+    def to_frame(self, mascara: Optional[np.ndarray] = None) -> pd.DataFrame:
+        """
+        DataFrame das agendas (todas ou só as da máscara)
+
+        consultor, projeto e gerente são pd.Categorical sobre os códigos
+        (sem cópia quando não há máscara); datas viram datetime64 por
+        aritmética, sem parsing de texto. Com máscara, as categorias sem
+        agenda são descartadas (value_counts/nunique refletem o filtro).
+        """
+        if mascara is None:
+            indices = None
+            selecionar = lambda array: array
+        else:
+            indices = np.flatnonzero(mascara)
+            selecionar = lambda array: array[indices]
+
+        def categoria(codigos: np.ndarray, categorias: List) -> pd.Categorical:
+            coluna = pd.Categorical.from_codes(selecionar(codigos), categories=categorias)
+            return coluna if indices is None else coluna.remove_unused_categories()
+
+        colunas = {
+            'id': selecionar(self.ids),
+            'consultor': categoria(self.consultor, self.consultores),
+            'projeto': categoria(self.projeto, self.projetos),
+            'gerente': categoria(self.gerente, self.gerentes),
+            'data_inicio': (selecionar(self.inicio) - _ORDINAL_EPOCH).astype('datetime64[D]'),
+            'data_fim': (selecionar(self.fim) - _ORDINAL_EPOCH).astype('datetime64[D]'),
+            'is_vago': selecionar(self.vago),
+        }
+
+        registros = self.registros if indices is None else [self.registros[i] for i in indices]
+        if self.registros:
+            for chave in self.registros[0].to_dict():
+                if chave not in _COLUNAS_ARRAYS:
+                    colunas[chave] = [a.get(chave) for a in registros]
+
+        return pd.DataFrame(colunas, copy=False)
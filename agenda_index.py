@@ -0,0 +1,206 @@
+"""
+Índice de intervalos das agendas por consultor
+
+Construído uma vez por snapshot, responde sobreposição, dias ocupados e
+períodos livres com busca binária em vez de varrer todas as agendas.
+"""
+from bisect import bisect_left, bisect_right
+from datetime import date
+from itertools import accumulate
+from typing import Dict, Iterable, List, Optional, Tuple
+import numpy as np
+from agenda_busca import IndiceBusca
+from agenda_model import Agenda, como_registros, normalizar_texto
+from gazetteer import Gazetteer, NomesAproximados, gazetteer_para, projetos_para
+
+
+class _Intervalos:
+    """Agendas de um consultor ordenadas pelo início, com o maior fim acumulado"""
+
+    def __init__(self, itens: List[Tuple[int, int, Agenda]]):
+        itens.sort(key=lambda item: (item[0], item[1]))
+        self.inicios = [inicio for inicio, _, _ in itens]
+        self.fins = [fim for _, fim, _ in itens]
+        self.agendas = [agenda for _, _, agenda in itens]
+        # fim_max[i] = maior fim entre os itens 0..i (não decrescente, permite bisect)
+        self.fim_max = list(accumulate(self.fins, max))
+
+    def sobrepostos(self, inicio: int, fim: int) -> List[Agenda]:
+        """Agendas com início <= fim e fim >= inicio, em ordem de início"""
+        hi = bisect_right(self.inicios, fim)
+        lo = bisect_left(self.fim_max, inicio, 0, hi)
+        return [self.agendas[i] for i in range(lo, hi) if self.fins[i] >= inicio]
+
+
+class _Ocupacao:
+    """Dias ocupados de um consultor como intervalos disjuntos e ordenados"""
+
+    def __init__(self, intervalos: List[Tuple[int, int]]):
+        mesclados: List[List[int]] = []
+        for inicio, fim in sorted(intervalos):
+            # Intervalos encostados (fim + 1 == início) também são unidos
+            if mesclados and inicio <= mesclados[-1][1] + 1:
+                mesclados[-1][1] = max(mesclados[-1][1], fim)
+            else:
+                mesclados.append([inicio, fim])
+
+        self.inicios = [inicio for inicio, _ in mesclados]
+        self.fins = [fim for _, fim in mesclados]
+        # acumulado[i] = total de dias dos intervalos 0..i-1
+        self.acumulado = [0] + list(accumulate(fim - inicio + 1 for inicio, fim in mesclados))
+
+    def dias_ocupados(self, inicio: int, fim: int) -> int:
+        """Quantidade de dias ocupados em [inicio, fim]"""
+        lo = bisect_left(self.fins, inicio)
+        hi = bisect_right(self.inicios, fim)
+        if lo >= hi:
+            return 0
+        total = self.acumulado[hi] - self.acumulado[lo]
+        # Recortar as pontas que passam do período
+        total -= max(0, inicio - self.inicios[lo])
+        total -= max(0, self.fins[hi - 1] - fim)
+        return total
+
+    def livres(self, inicio: int, fim: int) -> List[Tuple[int, int]]:
+        """Intervalos livres (disjuntos, ordenados) dentro de [inicio, fim]"""
+        lo = bisect_left(self.fins, inicio)
+        hi = bisect_right(self.inicios, fim)
+        livres = []
+        cursor = inicio
+        for i in range(lo, hi):
+            if self.inicios[i] > cursor:
+                livres.append((cursor, self.inicios[i] - 1))
+            cursor = max(cursor, self.fins[i] + 1)
+        if cursor <= fim:
+            livres.append((cursor, fim))
+        return livres
+
+    def proximo_livre(self, dia: int) -> int:
+        """Primeiro dia livre a partir de dia (inclusive)"""
+        i = bisect_right(self.inicios, dia) - 1
+        if i >= 0 and self.fins[i] >= dia:
+            return self.fins[i] + 1
+        return dia
+
+
+class AgendaIndex:
+    """
+    Índice das agendas por consultor
+
+    Agendas ocupadas e vagas (VAGO/LIVRE) ficam em estruturas separadas;
+    apenas as ocupadas contam para conflitos e dias ocupados. A busca por
+    texto (consultor/projeto) fica em busca, construída no primeiro uso, e o
+    reconhecimento de nomes nas mensagens em gazetteer.
+    """
+
+    def __init__(self, agendas: Iterable):
+        ocupadas: Dict[str, List[Tuple[int, int, Agenda]]] = {}
+        vagas: Dict[str, List[Tuple[int, int, Agenda]]] = {}
+        normas: Dict[str, str] = {}
+
+        self.registros = como_registros(agendas)
+        for agenda in self.registros:
+            item = (agenda.inicio_ord, agenda.fim_ord, agenda)
+            destino = vagas if agenda.is_vago else ocupadas
+            destino.setdefault(agenda.consultor, []).append(item)
+            normas[agenda.consultor] = agenda.consultor_norm
+
+        self.consultores = sorted(set(ocupadas) | set(vagas))
+        self._consultores_norm = [normas[c] for c in self.consultores]
+        self._busca: Optional[IndiceBusca] = None
+        self._projetos_aproximados: Optional[NomesAproximados] = None
+        self._ocupadas = {c: _Intervalos(itens) for c, itens in ocupadas.items()}
+        self._vagas = {c: _Intervalos(itens) for c, itens in vagas.items()}
+        self._ocupacao = {
+            c: _Ocupacao([(inicio, fim) for inicio, fim, _ in itens])
+            for c, itens in ocupadas.items()
+        }
+        self._vazio = _Intervalos([])
+        self._sem_ocupacao = _Ocupacao([])
+        self._ocupacao_arrays: Optional[Tuple[np.ndarray, np.ndarray, np.ndarray]] = None
+
+    @property
+    def busca(self) -> IndiceBusca:
+        """Índice de texto (veja agenda_busca.IndiceBusca) das mesmas agendas"""
+        if self._busca is None:
+            self._busca = IndiceBusca(self.registros)
+        return self._busca
+
+    @property
+    def gazetteer(self) -> Gazetteer:
+        """Gazetteer dos consultores indexados (compartilhado enquanto o cadastro não muda)"""
+        return gazetteer_para(self.consultores)
+
+    @property
+    def projetos_aproximados(self) -> NomesAproximados:
+        """Resolução de nomes de projeto digitados com erro (montada no primeiro uso)"""
+        if self._projetos_aproximados is None:
+            self._projetos_aproximados = projetos_para(a.projeto for a in self.registros if not a.is_vago)
+        return self._projetos_aproximados
+
+    def buscar_consultores(self, nome: str) -> List[str]:
+        """Consultores cujo nome contém o texto (sem diferenciar maiúsculas nem acentos)"""
+        nome_norm = normalizar_texto(nome)
+        return [c for c, norm in zip(self.consultores, self._consultores_norm) if nome_norm in norm]
+
+    def sobrepostas(self, consultor: str, inicio: date, fim: date) -> List[Agenda]:
+        """Agendas ocupadas (não VAGO) do consultor que se sobrepõem ao período"""
+        return self._ocupadas.get(consultor, self._vazio).sobrepostos(inicio.toordinal(), fim.toordinal())
+
+    def agendas_no_periodo(self, consultor: str, inicio: date, fim: date) -> List[Agenda]:
+        """Todas as agendas do consultor no período, incluindo as vagas"""
+        a, b = inicio.toordinal(), fim.toordinal()
+        return self._vagas.get(consultor, self._vazio).sobrepostos(a, b) + \
+            self._ocupadas.get(consultor, self._vazio).sobrepostos(a, b)
+
+    def consultores_no_periodo(self, inicio: date, fim: date) -> List[str]:
+        """Consultores com alguma agenda (ocupada ou vaga) no período"""
+        return [c for c in self.consultores if self.agendas_no_periodo(c, inicio, fim)]
+
+    def _ocupacao_de(self, consultores: List[str]) -> _Ocupacao:
+        if len(consultores) == 1:
+            return self._ocupacao.get(consultores[0], self._sem_ocupacao)
+        intervalos = []
+        for c in consultores:
+            ocupacao = self._ocupacao.get(c, self._sem_ocupacao)
+            intervalos.extend(zip(ocupacao.inicios, ocupacao.fins))
+        return _Ocupacao(intervalos)
+
+    def dias_ocupados(self, consultores: List[str], inicio: date, fim: date) -> int:
+        """Dias ocupados no período (união das agendas dos consultores informados)"""
+        return self._ocupacao_de(consultores).dias_ocupados(inicio.toordinal(), fim.toordinal())
+
+    def dias_ocupados_por_consultor(self, inicio: date, fim: date) -> Dict[str, int]:
+        """
+        Dias ocupados no período para cada consultor (zero para quem está livre)
+
+        Os intervalos já mesclados de todos os consultores ficam em arrays
+        NumPy; o recorte ao período e a soma por consultor (bincount) são
+        vetorizados, então o custo não depende do tamanho do período.
+        """
+        if self._ocupacao_arrays is None:
+            codigos, inicios, fins = [], [], []
+            for codigo, consultor in enumerate(self.consultores):
+                ocupacao = self._ocupacao.get(consultor, self._sem_ocupacao)
+                codigos.extend([codigo] * len(ocupacao.inicios))
+                inicios.extend(ocupacao.inicios)
+                fins.extend(ocupacao.fins)
+            self._ocupacao_arrays = (
+                np.asarray(codigos, dtype=np.int32),
+                np.asarray(inicios, dtype=np.int64),
+                np.asarray(fins, dtype=np.int64),
+            )
+
+        codigos, inicios, fins = self._ocupacao_arrays
+        dias = np.minimum(fins, fim.toordinal()) - np.maximum(inicios, inicio.toordinal()) + 1
+        totais = np.bincount(codigos, weights=np.clip(dias, 0, None), minlength=len(self.consultores))
+        return {consultor: int(total) for consultor, total in zip(self.consultores, totais)}
+
+    def periodos_livres(self, consultores: List[str], inicio: date, fim: date) -> List[Tuple[date, date]]:
+        """Intervalos livres (início, fim) dentro do período"""
+        livres = self._ocupacao_de(consultores).livres(inicio.toordinal(), fim.toordinal())
+        return [(date.fromordinal(a), date.fromordinal(b)) for a, b in livres]
+
+    def proximo_dia_livre(self, consultores: List[str], a_partir_de: date) -> date:
+        """Primeiro dia sem agenda ocupada a partir da data informada"""
+        return date.fromordinal(self._ocupacao_de(consultores).proximo_livre(a_partir_de.toordinal()))
@@ -0,0 +1,106 @@
+"""
+Registro compacto de agenda com datas já convertidas
+"""
+import unicodedata
+from datetime import date
+from typing import Dict, Iterable, List, Optional
+
+
+def normalizar_texto(texto: str) -> str:
+    """
+    Remove acentos e converte para minúsculo
+
+    Mesma forma das colunas consultor_busca/projeto_busca (setup_busca.sql).
+    """
+    if not texto:
+        return ""
+    return unicodedata.normalize('NFKD', texto).encode('ASCII', 'ignore').decode('ASCII').lower()
+
+
+def agenda_is_vago(agenda: Dict) -> bool:
+    """Agenda VAGO/LIVRE significa consultor disponível no período"""
+    return bool(agenda.get('is_vago', False)) or (agenda.get('projeto') or '').upper() in ['VAGO', 'LIVRE']
+
+
+class Agenda:
+    """
+    Agenda do snapshot com datas convertidas uma única vez
+
+    Mantém a interface de leitura de dicionário (agenda['projeto'],
+    agenda.get('os')), então pode substituir as linhas do banco nas telas.
+    Os campos menos usados (horas_cliente, descricao_entrega, ...) são lidos
+    da linha original, que não é copiada. consultor_norm e projeto_norm são
+    as chaves de busca (normalizar_texto), calculadas uma vez por snapshot.
+    """
+
+    __slots__ = ("id", "consultor", "projeto", "os", "gerente", "data_inicio", "data_fim",
+                 "inicio", "fim", "inicio_ord", "fim_ord", "is_vago",
+                 "consultor_norm", "projeto_norm", "_row")
+
+    def __init__(self, row: Dict, inicio: date, fim: date,
+                 consultor_norm: Optional[str] = None, projeto_norm: Optional[str] = None):
+        self._row = row
+        self.id = row.get('id')
+        self.consultor = row.get('consultor')
+        self.projeto = row.get('projeto')
+        self.os = row.get('os')
+        self.gerente = row.get('gerente')
+        self.data_inicio = row['data_inicio']
+        self.data_fim = row['data_fim']
+        self.inicio = inicio
+        self.fim = fim
+        self.inicio_ord = inicio.toordinal()
+        self.fim_ord = fim.toordinal()
+        self.is_vago = agenda_is_vago(row)
+        self.consultor_norm = normalizar_texto(self.consultor) if consultor_norm is None else consultor_norm
+        self.projeto_norm = normalizar_texto(self.projeto) if projeto_norm is None else projeto_norm
+
+    # is_vago já normalizado; os demais campos vêm da linha original
+    def __getitem__(self, chave: str):
+        if chave == 'is_vago':
+            return self.is_vago
+        return self._row[chave]
+
+    def __contains__(self, chave: str) -> bool:
+        return chave == 'is_vago' or chave in self._row
+
+    def get(self, chave: str, padrao=None):
+        if chave == 'is_vago':
+            return self.is_vago
+        return self._row.get(chave, padrao)
+
+    def to_dict(self) -> Dict:
+        """Linha original (para pandas e exportações)"""
+        return self._row
+
+    def __repr__(self) -> str:
+        return f"Agenda({self.id}, {self.consultor!r}, {self.projeto!r}, {self.data_inicio} a {self.data_fim})"
+
+
+def como_registros(agendas: Iterable) -> List[Agenda]:
+    """
+    Converte linhas do banco em registros Agenda (registros já prontos são mantidos)
+
+    Datas e nomes repetidos (blocos semanais) são convertidos uma única vez.
+    """
+    datas: Dict[str, date] = {}
+    normas: Dict[Optional[str], str] = {}
+
+    def converter(valor: str) -> date:
+        data = datas.get(valor)
+        if data is None:
+            data = datas[valor] = date.fromisoformat(valor)
+        return data
+
+    def normalizar(texto: Optional[str]) -> str:
+        norma = normas.get(texto)
+        if norma is None:
+            norma = normas[texto] = normalizar_texto(texto)
+        return norma
+
+    return [
+        agenda if isinstance(agenda, Agenda)
+        else Agenda(agenda, converter(agenda['data_inicio']), converter(agenda['data_fim']),
+                    normalizar(agenda.get('consultor')), normalizar(agenda.get('projeto')))
+        for agenda in agendas
+    ]
@@ -1,10 +1,11 @@
 import os
 import cohere
 import streamlit as st
-from datetime import datetime, timedelta
-import re
-import unicodedata
-from typing import List, Dict, Union
+from datetime import datetime
+from typing import List, Dict, Optional
+from agenda_index import AgendaIndex
+from agenda_model import Agenda, como_registros, normalizar_texto
+from query_parser import QueryParse, parse_query
 
 class AIAssistant:
     """Assistente de IA usando Cohere para processamento de linguagem natural"""
@@ -32,16 +33,17 @@ class AIAssistant:
     
     def normalize_text(self, text: str) -> str:
         """Normaliza texto removendo acentos e convertendo para minúsculo"""
-        if not text: return ""
-        return unicodedata.normalize('NFKD', text).encode('ASCII', 'ignore').decode('ASCII').lower()
+        return normalizar_texto(text)
 
-    def process_query(self, query: str, agendas: List[Dict]) -> Dict:
+    def process_query(self, query: str, agendas: List[Dict], indice: Optional[AgendaIndex] = None) -> Dict:
         """
         Processa uma query do usuário e retorna resposta estruturada
         
         Args:
             query: Pergunta ou comando do usuário
             agendas: Lista de agendas para contexto
+            indice: Índice de intervalos das mesmas agendas (Database.get_agenda_index);
+                    construído aqui se não informado
         
         Returns:
             Dict com 'text' e opcionalmente 'action'
@@ -50,26 +52,32 @@ class AIAssistant:
             return {"text": "❌ Assistente de IA não disponível. Configure a COHERE_API_KEY.", "action": None}
         
         try:
-            # Identificar a intenção do usuário
-            intent = self._identify_intent(query)
-            print(f"[DEBUG] Intent final: {intent}")
+            # Registros com datas já convertidas (linhas do banco também são aceitas)
+            agendas = como_registros(agendas)
+            
+            # Índice das agendas (consultas, disponibilidade e cadastro de nomes)
+            indice = indice or AgendaIndex(agendas)
+            
+            # Intenção e entidades extraídas uma única vez (parse_query)
+            parse = parse_query(query, gazetteer=indice.gazetteer)
+            intent = parse.intencao
             
             response = None
             
             # Processar baseado na intenção
             if intent == "disponibilidade":
-                response = self._handle_disponibilidade(query, agendas)
+                response = self._handle_disponibilidade(parse, agendas, indice)
             elif intent == "consulta":
-                response = self._handle_consulta(query, agendas)
+                response = self._handle_consulta(parse, agendas, indice)
             elif intent == "listar":
-                response = self._handle_listar(query, agendas)
+                response = self._handle_listar(parse, agendas)
             elif intent == "criar":
-                response = self._handle_criar_agenda(query)
+                response = self._handle_criar_agenda(parse)
             elif intent == "verificar_vaga":
-                response = self._handle_verificar_vaga(query, agendas)
+                response = self._handle_verificar_vaga(parse, agendas, indice)
             else:
                 # Fallback para Cohere se não identificar a intenção
-                response = self._interpret_query_with_cohere(query, agendas)
+                response = self._interpret_query_with_cohere(parse, agendas)
             
             # Normalizar resposta para formato Dict
             if isinstance(response, str):
@@ -79,12 +87,11 @@ class AIAssistant:
         except Exception as e:
             return {"text": f"❌ Erro ao processar pergunta: {str(e)}\n\nTente reformular sua pergunta.", "action": None}
 
-    def _handle_verificar_vaga(self, query: str, agendas: List[Dict]) -> str:
+    def _handle_verificar_vaga(self, parse: QueryParse, agendas: List[Agenda], indice: AgendaIndex) -> str:
         """
         Verifica se há vaga para uma demanda específica com sugestões inteligentes.
         """
-        # Extrair datas da demanda
-        datas = self._extract_dates(query)
+        datas = parse.datas
         if not datas:
             return "❓ Para verificar vagas, preciso saber o período desejado.\n\n**Exemplo:** _'Preciso de consultor de 10/01 a 20/01'_"
         
@@ -95,31 +102,12 @@ class AIAssistant:
         totalmente_livres = []
         parcialmente_livres = []
         
-        # Obter lista única de todos os consultores cadastrados
-        todos_consultores = sorted(list(set([a['consultor'] for a in agendas])))
+        # Dias ocupados de todos os consultores de uma vez (intervalos mesclados)
+        ocupacao = indice.dias_ocupados_por_consultor(data_inicio, data_fim)
         
-        for consultor in todos_consultores:
-            agendas_consultor = [a for a in agendas if a['consultor'] == consultor]
-            dias_ocupados = set()
-            
-            for agenda in agendas_consultor:
-                # Ignorar agendas vagas
-                is_vago = agenda.get('is_vago', False) or agenda.get('projeto', '').upper() in ['VAGO', 'LIVRE']
-                if is_vago:
-                    continue
-                
-                ag_inicio = datetime.strptime(agenda['data_inicio'], "%Y-%m-%d").date()
-                ag_fim = datetime.strptime(agenda['data_fim'], "%Y-%m-%d").date()
-                
-                # Verificar sobreposição e contar dias
-                if not (data_fim < ag_inicio or data_inicio > ag_fim):
-                    curr = max(data_inicio, ag_inicio)
-                    end = min(data_fim, ag_fim)
-                    while curr <= end:
-                        dias_ocupados.add(curr)
-                        curr += timedelta(days=1)
-            
-            qtd_ocupados = len(dias_ocupados)
+        # Todos os consultores cadastrados (já ordenados pelo índice)
+        for consultor in indice.consultores:
+            qtd_ocupados = ocupacao[consultor]
             if qtd_ocupados == 0:
                 totalmente_livres.append(consultor)
             elif qtd_ocupados < total_dias:
@@ -156,7 +144,7 @@ class AIAssistant:
         
         return resposta
     
-    def _prepare_context(self, agendas: List[Dict]) -> str:
+    def _prepare_context(self, agendas: List[Agenda]) -> str:
         """Prepara contexto das agendas para a IA"""
         if not agendas:
             return "Não há agendas cadastradas no momento."
@@ -165,9 +153,9 @@ class AIAssistant:
         context += "IMPORTANTE: Agendas com projeto 'VAGO' ou 'LIVRE' significam que o consultor está DISPONÍVEL nesse período.\n\n"
         
         for agenda in agendas[:50]:  # Limitar para não exceder tokens
-            inicio = datetime.strptime(agenda['data_inicio'], "%Y-%m-%d").strftime("%d/%m/%Y")
-            fim = datetime.strptime(agenda['data_fim'], "%Y-%m-%d").strftime("%d/%m/%Y")
-            is_vago = agenda.get('is_vago', False) or agenda.get('projeto', '').upper() in ['VAGO', 'LIVRE']
+            inicio = agenda.inicio.strftime("%d/%m/%Y")
+            fim = agenda.fim.strftime("%d/%m/%Y")
+            is_vago = agenda.is_vago
             
             if is_vago:
                 context += f"- Consultor: {agenda['consultor']}, DISPONÍVEL (agenda vaga), Período: {inicio} a {fim}\n"
@@ -178,77 +166,9 @@ class AIAssistant:
         
         return context
     
-    def _identify_intent(self, query: str) -> str:
-        """Identifica a intenção do usuário com maior precisão"""
-        query_lower = query.lower()
-        
-        # Palavras-chave para criar agenda
-        criar_keywords = ['agende', 'criar', 'adicionar', 'adicione', 'registrar', 'registre', 'alocar', 'aloque', 'reserve']
-        if any(keyword in query_lower for keyword in criar_keywords):
-            return "criar"
-            
-        # Palavras-chave para verificar vaga (demanda do CEO)
-        vaga_keywords = ['vaga', 'preciso de', 'tem alguem', 'tem alguém', 'quem pode', 'quem está livre', 'quem esta livre', 'sugira', 'sugestão']
-        if any(keyword in query_lower for keyword in vaga_keywords):
-            return "verificar_vaga"
-        
-        # PRIORIDADE 1: Verificar disponibilidade (livre/ocupado/pode) - ANTES de qualquer outra coisa
-        disp_keywords = ['livre', 'ocupado', 'disponível', 'disponivel', 'pode', 'está livre', 'esta livre', 'tem vaga', 'tem agenda livre']
-        if any(keyword in query_lower for keyword in disp_keywords):
-            consultor_encontrado = self._extract_consultor(query)
-            datas_encontradas = self._extract_dates(query)
-            # Se tem consultor OU data, é definitivamente uma pergunta de disponibilidade
-            if consultor_encontrado or datas_encontradas:
-                print(f"[DEBUG] Intenção identificada: disponibilidade (palavra-chave prioritária)")
-                return "disponibilidade"
-        
-        # Verificar se tem consultor + data
-        consultor_encontrado = self._extract_consultor(query)
-        datas_encontradas = self._extract_dates(query)
-        
-        # DEBUG
-        print(f"[DEBUG] Query: {query}")
-        print(f"[DEBUG] Consultor encontrado: {consultor_encontrado}")
-        print(f"[DEBUG] Datas encontradas: {datas_encontradas}")
-        
-        # Palavras-chave para listar (devem incluir plural ou "todas")
-        listar_keywords = ['liste', 'listar', 'mostre todas', 'exiba todas', 'todas as agendas', 'todos os', 'lista de']
-        if any(keyword in query_lower for keyword in listar_keywords):
-            print(f"[DEBUG] Intenção identificada: listar")
-            return "listar"
-        
-        # Palavras que indicam consulta (sem livre/ocupado)
-        consulta_keywords = ['mostre', 'exiba', 'ver', 'veja', 'consultar', 'qual', 'quais', 'quem', 'onde', 'quando']
-        tem_palavra_consulta = any(keyword in query_lower for keyword in consulta_keywords)
-        
-        # Se tem consultor E data + palavra de consulta, é consulta
-        if consultor_encontrado and datas_encontradas and tem_palavra_consulta:
-            print(f"[DEBUG] Intenção identificada: consulta (consultor+data+palavra)")
-            return "consulta"
-        
-        # Se tem consultor OU data + palavra de consulta, é consulta
-        if (consultor_encontrado or datas_encontradas) and tem_palavra_consulta:
-            print(f"[DEBUG] Intenção identificada: consulta (filtro+palavra)")
-            return "consulta"
-        
-        # Se tem apenas consultor ou data sem palavra específica, é consulta
-        if consultor_encontrado or datas_encontradas:
-            print(f"[DEBUG] Intenção identificada: consulta (apenas filtros)")
-            return "consulta"
-        
-        # Padrão: consulta (melhor do que listar tudo)
-        print(f"[DEBUG] Intenção identificada: consulta (padrão)")
-        return "consulta"
-    
-    def _handle_consulta(self, query: str, agendas: List[Dict]) -> str:
+    def _handle_consulta(self, parse: QueryParse, agendas: List[Agenda], indice: AgendaIndex) -> str:
         """Trata consultas sobre agendas específicas com filtragem inteligente"""
-        consultor = self._extract_consultor(query)
-        datas = self._extract_dates(query)
-        projeto = self._extract_projeto(query)
-        os_num = self._extract_os(query)
-        
-        # DEBUG: Remover após testes
-        print(f"[CONSULTA DEBUG] Consultor: {consultor}, Datas: {datas}, Projeto: {projeto}, OS: {os_num}")
+        consultor, datas, projeto, os_num = parse.consultor, parse.datas, parse.projeto, parse.os
         
         # Se não encontrou nenhum filtro específico, listar resumo
         if not consultor and not datas and not projeto and not os_num:
@@ -266,20 +186,17 @@ class AIAssistant:
             resposta += f"**Exemplos:** _Sirlene dia 20/12_, _André em março_"
             return resposta
         
-        # Função auxiliar de filtragem
+        # Função auxiliar de filtragem: consultor e projeto pelo índice de texto
+        # (chaves já normalizadas), datas e OS só sobre as agendas que sobraram
         def aplicar_filtros(c, d, p, o):
-            res = agendas
-            if c:
-                res = [a for a in res if self.normalize_text(c) in self.normalize_text(a['consultor'])]
+            res = indice.busca.filtrar(consultor=c, projeto=p)
             if d:
                 data_inicio, data_fim = d
                 res = [
                     a for a in res
-                    if not (datetime.strptime(a['data_fim'], "%Y-%m-%d").date() < data_inicio or
-                           datetime.strptime(a['data_inicio'], "%Y-%m-%d").date() > data_fim)
+                    if not (a.fim < data_inicio or
+                           a.inicio > data_fim)
                 ]
-            if p:
-                res = [a for a in res if self.normalize_text(p) in self.normalize_text(a['projeto'])]
             if o:
                 res = [a for a in res if o in str(a['os'])]
             return res
@@ -291,12 +208,34 @@ class AIAssistant:
         # Se filtrou por consultor e não achou nada, mas o nome pode ser um projeto
         # Ex: "Agendas da Natália" (Natália é projeto, não consultora)
         if not agendas_filtradas and consultor and not projeto:
-            print(f"[DEBUG] Tentando fallback: Consultor '{consultor}' como Projeto")
             agendas_fallback = aplicar_filtros(None, datas, consultor, os_num)
             if agendas_fallback:
                 agendas_filtradas = agendas_fallback
                 projeto = consultor # Atualiza para exibir corretamente na resposta
                 consultor = None # Remove consultor pois era projeto
+        
+        # Nomes com erro de digitação ("Sirlen", "cruz azl"): resolver pela
+        # distância de edição antes de desistir (ou recorrer ao Cohere)
+        aviso = ""
+        if not agendas_filtradas and (consultor or projeto):
+            consultor_aprox = indice.gazetteer.resolver_aproximado(consultor) if consultor else None
+            projeto_aprox = indice.projetos_aproximados.resolver(projeto) if projeto else None
+            c, p = consultor_aprox or consultor, projeto_aprox or projeto
+            if consultor and not consultor_aprox and not projeto:
+                # Como no fallback acima, o nome pode ser de um projeto
+                projeto_aprox = indice.projetos_aproximados.resolver(consultor)
+                if projeto_aprox:
+                    c, p = None, projeto_aprox
+            
+            if consultor_aprox or projeto_aprox:
+                agendas_aprox = aplicar_filtros(c, datas, p, os_num)
+                if agendas_aprox:
+                    aviso = self._aviso_aproximado([(consultor, consultor_aprox), (projeto or consultor, projeto_aprox)])
+                    agendas_filtradas = agendas_aprox
+                    consultor, projeto = c, p
+        
+        if datas:
+            data_inicio, data_fim = datas
 
         # Formatar resposta
         if not agendas_filtradas:
@@ -319,7 +258,7 @@ class AIAssistant:
             return f"📭 Não encontrei agendas para {filtros_txt}."
         
         # Criar cabeçalho da resposta
-        resposta = f"### 📋 Resultado da Consulta\n\n"
+        resposta = aviso + f"### 📋 Resultado da Consulta\n\n"
         
         # Mostrar filtros aplicados
         if consultor:
@@ -344,9 +283,9 @@ class AIAssistant:
         resposta += f"---\n\n"
         
         for agenda in agendas_filtradas[:10]:  # Limitar a 10
-            inicio = datetime.strptime(agenda['data_inicio'], "%Y-%m-%d").strftime("%d/%m/%Y")
-            fim = datetime.strptime(agenda['data_fim'], "%Y-%m-%d").strftime("%d/%m/%Y")
-            is_vago = agenda.get('is_vago', False) or agenda.get('projeto', '').upper() in ['VAGO', 'LIVRE']
+            inicio = agenda.inicio.strftime("%d/%m/%Y")
+            fim = agenda.fim.strftime("%d/%m/%Y")
+            is_vago = agenda.is_vago
             
             resposta += f"• **Consultor:** {agenda['consultor']}\n"
             
@@ -368,10 +307,16 @@ class AIAssistant:
         
         return resposta
     
-    def _handle_disponibilidade(self, query: str, agendas: List[Dict]) -> str:
+    def _aviso_aproximado(self, resolvidos: List[tuple]) -> str:
+        """Informa quais nomes digitados foram interpretados como nomes cadastrados"""
+        trechos = [f"_{escrito}_ → **{nome}**" for escrito, nome in resolvidos if escrito and nome]
+        if not trechos:
+            return ""
+        return f"🔎 Não encontrei exatamente o nome informado; considerei {', '.join(trechos)}.\n\n"
+    
+    def _handle_disponibilidade(self, parse: QueryParse, agendas: List[Agenda], indice: AgendaIndex) -> str:
         """Verifica disponibilidade de consultores com análise avançada de conflitos e sugestões"""
-        consultor = self._extract_consultor(query)
-        datas = self._extract_dates(query)
+        consultor, datas = parse.consultor, parse.datas
         
         if not consultor:
             return ("❓ Para verificar disponibilidade, mencione o nome do consultor.\n\n"
@@ -388,39 +333,28 @@ class AIAssistant:
         else:
             data_inicio, data_fim = datas
         
-        # Buscar agendas do consultor
-        agendas_consultor = [
-            a for a in agendas
-            if consultor.lower() in a['consultor'].lower()
-        ]
+        # Consultores cujo nome contém o texto informado
+        nomes = indice.buscar_consultores(consultor)
+        
+        # Nome com erro de digitação: consultor mais próximo do cadastro
+        aviso = ""
+        if not nomes:
+            resolvido = indice.gazetteer.resolver_aproximado(consultor)
+            if resolvido:
+                aviso = self._aviso_aproximado([(consultor, resolvido)])
+                consultor = resolvido
+                nomes = indice.buscar_consultores(consultor)
         
         # Se não encontrou o consultor
-        if not agendas_consultor:
+        if not nomes:
             return f"❓ Não encontrei agendas para o consultor **{consultor}**. Verifique o nome."
         
-        # Buscar conflitos no período específico
-        conflitos = []
-        dias_ocupados = set()
-        
-        for agenda in agendas_consultor:
-            # Ignorar agendas vagas
-            is_vago = agenda.get('is_vago', False) or agenda.get('projeto', '').upper() in ['VAGO', 'LIVRE']
-            if is_vago:
-                continue
-                
-            agenda_inicio = datetime.strptime(agenda['data_inicio'], "%Y-%m-%d").date()
-            agenda_fim = datetime.strptime(agenda['data_fim'], "%Y-%m-%d").date()
-            
-            # Verificar sobreposição
-            if not (data_fim < agenda_inicio or data_inicio > agenda_fim):
-                conflitos.append(agenda)
-                
-                # Mapear dias exatos ocupados dentro do período solicitado
-                curr = max(data_inicio, agenda_inicio)
-                end = min(data_fim, agenda_fim)
-                while curr <= end:
-                    dias_ocupados.add(curr)
-                    curr += timedelta(days=1)
+        # Buscar conflitos no período específico (agendas vagas não contam)
+        conflitos = sorted(
+            (a for nome in nomes for a in indice.sobrepostas(nome, data_inicio, data_fim)),
+            key=lambda a: a['data_inicio']
+        )
+        qtd_ocupados = indice.dias_ocupados(nomes, data_inicio, data_fim)
         
         # Formatar período solicitado
         if data_inicio == data_fim:
@@ -436,82 +370,60 @@ class AIAssistant:
         
         # 1. Totalmente Livre
         if not conflitos:
-            return f"""### ✅ STATUS: LIVRE
+            return aviso + f"""### ✅ STATUS: LIVRE
             
 O consultor **{consultor}** está **100% disponível** no {periodo_label}.
 
 🟢 **Pode agendar!** Não há conflitos registrados."""
 
         # 2. Totalmente Ocupado
-        if len(dias_ocupados) == total_dias:
-            # Encontrar próxima data livre (simples)
-            ultima_agenda = max([datetime.strptime(a['data_fim'], "%Y-%m-%d").date() for a in agendas_consultor])
-            proxima_livre = ultima_agenda + timedelta(days=1)
+        if qtd_ocupados == total_dias:
+            # Primeiro dia sem agenda ocupada depois do período
+            proxima_livre = indice.proximo_dia_livre(nomes, data_inicio)
             
-            resposta = f"""### 🔴 STATUS: OCUPADO
+            resposta = aviso + f"""### 🔴 STATUS: OCUPADO
             
 O consultor **{consultor}** está **totalmente ocupado** no {periodo_label}.
 
 **Conflitos encontrados:**
 """
             for c in conflitos:
-                inicio = datetime.strptime(c['data_inicio'], "%Y-%m-%d").strftime("%d/%m/%Y")
-                fim = datetime.strptime(c['data_fim'], "%Y-%m-%d").strftime("%d/%m/%Y")
+                inicio = c.inicio.strftime("%d/%m/%Y")
+                fim = c.fim.strftime("%d/%m/%Y")
                 resposta += f"• 📁 **{c['projeto']}** ({inicio} - {fim})\n"
             
             resposta += f"\n🗓️ **Sugestão:** A agenda dele(a) parece liberar a partir de **{proxima_livre.strftime('%d/%m/%Y')}**."
             return resposta
 
         # 3. Parcialmente Livre (Misto)
-        dias_livres = total_dias - len(dias_ocupados)
+        dias_livres = total_dias - qtd_ocupados
         porcentagem_livre = int((dias_livres / total_dias) * 100)
         
-        resposta = f"""### 🟡 STATUS: PARCIALMENTE LIVRE
+        resposta = aviso + f"""### 🟡 STATUS: PARCIALMENTE LIVRE
         
 O consultor **{consultor}** tem disponibilidade em **{porcentagem_livre}%** do período ({dias_livres} de {total_dias} dias).
 
 **Dias Ocupados:**
 """
         for c in conflitos:
-            inicio = datetime.strptime(c['data_inicio'], "%Y-%m-%d").strftime("%d/%m/%Y")
-            fim = datetime.strptime(c['data_fim'], "%Y-%m-%d").strftime("%d/%m/%Y")
+            inicio = c.inicio.strftime("%d/%m/%Y")
+            fim = c.fim.strftime("%d/%m/%Y")
             resposta += f"• ❌ **{c['projeto']}**: {inicio} até {fim}\n"
             
         resposta += "\n**Dias Livres neste período:**\n"
         
         # Listar intervalos livres
-        curr = data_inicio
-        intervalo_inicio = None
-        
-        while curr <= data_fim:
-            if curr not in dias_ocupados:
-                if intervalo_inicio is None:
-                    intervalo_inicio = curr
-            else:
-                if intervalo_inicio:
-                    # Fechar intervalo
-                    if intervalo_inicio == curr - timedelta(days=1):
-                        resposta += f"• ✅ {intervalo_inicio.strftime('%d/%m/%Y')}\n"
-                    else:
-                        resposta += f"• ✅ {intervalo_inicio.strftime('%d/%m/%Y')} a {(curr - timedelta(days=1)).strftime('%d/%m/%Y')}\n"
-                    intervalo_inicio = None
-            curr += timedelta(days=1)
-            
-        # Fechar último intervalo se houver
-        if intervalo_inicio:
-            if intervalo_inicio == data_fim:
-                resposta += f"• ✅ {intervalo_inicio.strftime('%d/%m/%Y')}\n"
+        for livre_inicio, livre_fim in indice.periodos_livres(nomes, data_inicio, data_fim):
+            if livre_inicio == livre_fim:
+                resposta += f"• ✅ {livre_inicio.strftime('%d/%m/%Y')}\n"
             else:
-                resposta += f"• ✅ {intervalo_inicio.strftime('%d/%m/%Y')} a {data_fim.strftime('%d/%m/%Y')}\n"
+                resposta += f"• ✅ {livre_inicio.strftime('%d/%m/%Y')} a {livre_fim.strftime('%d/%m/%Y')}\n"
                 
         return resposta
     
-    def _handle_criar_agenda(self, query: str) -> Dict:
+    def _handle_criar_agenda(self, parse: QueryParse) -> Dict:
         """Auxilia na criação de uma nova agenda"""
-        consultor = self._extract_consultor(query)
-        projeto = self._extract_projeto(query)
-        os = self._extract_os(query)
-        datas = self._extract_dates(query)
+        consultor, projeto, os, datas = parse.consultor, parse.projeto, parse.os, parse.datas
         
         # Montar resposta com instruções
         resposta = "📝 Para criar uma agenda, preciso das seguintes informações:\n\n"
@@ -566,16 +478,13 @@ O consultor **{consultor}** tem disponibilidade em **{porcentagem_livre}%** do p
                 }
             }
     
-    def _handle_listar(self, query: str, agendas: List[Dict]) -> str:
+    def _handle_listar(self, parse: QueryParse, agendas: List[Agenda]) -> str:
         """Lista agendas com filtros"""
         if not agendas:
             return "📭 Não há agendas cadastradas no momento."
         
-        query_lower = query.lower()
-        
         # Verificar filtros
-        consultor = self._extract_consultor(query)
-        projeto = self._extract_projeto(query)
+        consultor, projeto = parse.consultor, parse.projeto
         
         agendas_filtradas = agendas
         
@@ -607,8 +516,8 @@ O consultor **{consultor}** tem disponibilidade em **{porcentagem_livre}%** do p
         for cons, ags in list(consultores.items())[:5]:  # Limitar a 5 consultores
             resposta += f"**👤 {cons}** ({len(ags)} agenda(s)):\n"
             for ag in ags[:3]:  # Limitar a 3 agendas por consultor
-                inicio = datetime.strptime(ag['data_inicio'], "%Y-%m-%d").strftime("%d/%m/%Y")
-                fim = datetime.strptime(ag['data_fim'], "%Y-%m-%d").strftime("%d/%m/%Y")
+                inicio = ag.inicio.strftime("%d/%m/%Y")
+                fim = ag.fim.strftime("%d/%m/%Y")
                 resposta += f"  • {ag['projeto']} (OS {ag['os']}): {inicio} - {fim}\n"
             resposta += "\n"
         
@@ -616,16 +525,12 @@ O consultor **{consultor}** tem disponibilidade em **{porcentagem_livre}%** do p
         
         return resposta
     
-    def _interpret_query_with_cohere(self, query: str, agendas: List[Dict]) -> str:
+    def _interpret_query_with_cohere(self, parse: QueryParse, agendas: List[Agenda]) -> str:
         """Usa Cohere para interpretar a query e filtrar dados relevantes"""
         try:
-            # Extrair filtros usando métodos determinísticos
-            consultor = self._extract_consultor(query)
-            datas = self._extract_dates(query)
-            projeto = self._extract_projeto(query)
-            os_num = self._extract_os(query)
-            
-            print(f"[COHERE DEBUG] Consultor: {consultor}, Datas: {datas}, Projeto: {projeto}, OS: {os_num}")
+            # Filtros extraídos de forma determinística (parse_query)
+            query = parse.texto
+            consultor, datas, projeto, os_num = parse.consultor, parse.datas, parse.projeto, parse.os
             
             # Filtrar agendas
             agendas_filtradas = agendas
@@ -640,8 +545,8 @@ O consultor **{consultor}** tem disponibilidade em **{porcentagem_livre}%** do p
                 data_inicio, data_fim = datas
                 agendas_filtradas = [
                     a for a in agendas_filtradas
-                    if not (datetime.strptime(a['data_fim'], "%Y-%m-%d").date() < data_inicio or
-                           datetime.strptime(a['data_inicio'], "%Y-%m-%d").date() > data_fim)
+                    if not (a.fim < data_inicio or
+                           a.inicio > data_fim)
                 ]
             
             if projeto:
@@ -660,8 +565,8 @@ O consultor **{consultor}** tem disponibilidade em **{porcentagem_livre}%** do p
             if agendas_filtradas:
                 context = "Agendas encontradas:\n\n"
                 for i, agenda in enumerate(agendas_filtradas[:20], 1):
-                    inicio = datetime.strptime(agenda['data_inicio'], "%Y-%m-%d").strftime("%d/%m/%Y")
-                    fim = datetime.strptime(agenda['data_fim'], "%Y-%m-%d").strftime("%d/%m/%Y")
+                    inicio = agenda.inicio.strftime("%d/%m/%Y")
+                    fim = agenda.fim.strftime("%d/%m/%Y")
                     context += f"{i}. Consultor: {agenda['consultor']}, Projeto: {agenda['projeto']}, "
                     context += f"OS: {agenda['os']}, Período: {inicio} até {fim}\n"
                 
@@ -712,235 +617,7 @@ IMPORTANTE:
                 max_tokens=800
             )
             
-            resposta_cohere = response.text.strip()
-            print(f"[COHERE DEBUG] Resposta gerada: {len(resposta_cohere)} caracteres")
-            
-            return resposta_cohere
+            return response.text.strip()
             
         except Exception as e:
             return f"❌ Erro ao processar com IA: {str(e)}\n\nTente reformular sua pergunta ou use o Dashboard."
-    
-    def _extract_consultor(self, text: str) -> str:
-        """Extrai nome do consultor do texto com maior precisão"""
-        # Lista de consultores conhecidos para melhor matching
-        consultores_conhecidos = ['André', 'Andre', 'Gracina', 'Sirlene', 'Mayara', 'Miguel', 'Lucas']
-        
-        text_lower = text.lower()
-        
-        # Verificar consultores conhecidos primeiro (case-insensitive)
-        for consultor in consultores_conhecidos:
-            if consultor.lower() in text_lower:
-                return consultor
-        
-        # Padrões de extração
-        patterns = [
-            r'consultor[a]?\s+([A-ZÀ-Ú][a-zà-ú]+(?:\s+[A-ZÀ-Ú][a-zà-ú]+)?)',
-            r'(?:do|da|de|o|a)\s+([A-ZÀ-Ú][a-zà-ú]+(?:\s+[A-ZÀ-Ú][a-zà-ú]+)?)',
-            r'([A-ZÀ-Ú][a-zà-ú]+(?:\s+[A-ZÀ-Ú][a-zà-ú]+)?)\s+(?:está|tem|pode|livre|ocupado)',
-            r'agende\s+(?:o|a)?\s*([A-ZÀ-Ú][a-zà-ú]+(?:\s+[A-ZÀ-Ú][a-zà-ú]+)?)',
-            r'agendas?\s+(?:do|da|de)\s+([A-ZÀ-Ú][a-zà-ú]+(?:\s+[A-ZÀ-Ú][a-zà-ú]+)?)'
-        ]
-        
-        for pattern in patterns:
-            match = re.search(pattern, text)
-            if match:
-                nome = match.group(1).strip()
-                # Validar se não é uma palavra comum
-                palavras_ignorar = ['consultor', 'consultora', 'projeto', 'agenda']
-                if nome.lower() not in palavras_ignorar:
-                    return nome
-        
-        return None
-    
-    def _extract_projeto(self, text: str) -> str:
-        """Extrai nome do projeto do texto"""
-        patterns = [
-            r'[Pp]rojeto\s+([A-ZÀ-Ú][A-Za-zà-ú0-9\s]+?)(?:\s*,|\s+OS|\s+os|\s*$)',
-        ]
-        
-        for pattern in patterns:
-            match = re.search(pattern, text)
-            if match:
-                return match.group(1).strip()
-        
-        return None
-    
-    def _extract_os(self, text: str) -> str:
-        """Extrai número da OS do texto"""
-        patterns = [
-            r'OS\s*[:\-]?\s*(\d+)',
-            r'os\s*[:\-]?\s*(\d+)',
-        ]
-        
-        for pattern in patterns:
-            match = re.search(pattern, text, re.IGNORECASE)
-            if match:
-                return match.group(1)
-        
-        return None
-    
-    def _extract_dates(self, text: str) -> tuple:
-        """Extrai datas do texto com padrões mais abrangentes"""
-        hoje = datetime.now().date()
-        text_lower = text.lower()
-        
-        # Datas relativas simples
-        if any(word in text_lower for word in ['hoje', 'hoje?', 'hje']):
-            return (hoje, hoje)
-        
-        if any(word in text_lower for word in ['amanhã', 'amanha', 'amanhã?', 'amanha?']):
-            amanha = hoje + timedelta(days=1)
-            return (amanha, amanha)
-        
-        if 'depois de amanhã' in text_lower or 'depois de amanha' in text_lower:
-            depois = hoje + timedelta(days=2)
-            return (depois, depois)
-        
-        # Dias da semana
-        dias_semana = {
-            'segunda': 0, 'segunda-feira': 0, 'seg': 0,
-            'terça': 1, 'terca': 1, 'terça-feira': 1, 'terca-feira': 1, 'ter': 1,
-            'quarta': 2, 'quarta-feira': 2, 'qua': 2,
-            'quinta': 3, 'quinta-feira': 3, 'qui': 3,
-            'sexta': 4, 'sexta-feira': 4, 'sex': 4,
-            'sábado': 5, 'sabado': 5, 'sab': 5,
-            'domingo': 6, 'dom': 6
-        }
-        
-        for dia_nome, dia_num in dias_semana.items():
-            if dia_nome in text_lower:
-                dias_ate_dia = (dia_num - hoje.weekday()) % 7
-                if dias_ate_dia == 0:
-                    dias_ate_dia = 7  # Próxima ocorrência
-                data_alvo = hoje + timedelta(days=dias_ate_dia)
-                return (data_alvo, data_alvo)
-        
-        # Semanas
-        if 'próxima semana' in text_lower or 'semana que vem' in text_lower or 'proxima semana' in text_lower:
-            inicio = hoje + timedelta(days=(7 - hoje.weekday()))
-            fim = inicio + timedelta(days=6)
-            return (inicio, fim)
-        
-        if 'esta semana' in text_lower or 'essa semana' in text_lower:
-            inicio = hoje - timedelta(days=hoje.weekday())
-            fim = inicio + timedelta(days=6)
-            return (inicio, fim)
-        
-        # Meses por nome
-        meses_nome = {
-            'janeiro': 1, 'jan': 1,
-            'fevereiro': 2, 'fev': 2,
-            'março': 3, 'marco': 3, 'mar': 3,
-            'abril': 4, 'abr': 4,
-            'maio': 5, 'mai': 5,
-            'junho': 6, 'jun': 6,
-            'julho': 7, 'jul': 7,
-            'agosto': 8, 'ago': 8,
-            'setembro': 9, 'set': 9,
-            'outubro': 10, 'out': 10,
-            'novembro': 11, 'nov': 11,
-            'dezembro': 12, 'dez': 12
-        }
-        
-        for mes_nome, mes_num in meses_nome.items():
-            if mes_nome in text_lower:
-                ano = hoje.year
-                # Se o mês já passou, assume ano seguinte
-                if mes_num < hoje.month:
-                    ano += 1
-                elif mes_num == hoje.month and 'próximo' in text_lower:
-                    ano += 1
-                
-                inicio = datetime(ano, mes_num, 1).date()
-                if mes_num == 12:
-                    fim = datetime(ano, 12, 31).date()
-                else:
-                    fim = (datetime(ano, mes_num + 1, 1) - timedelta(days=1)).date()
-                return (inicio, fim)
-        
-        # "este mês" / "próximo mês"
-        if 'este mês' in text_lower or 'esse mês' in text_lower or 'este mes' in text_lower:
-            inicio = hoje.replace(day=1)
-            if hoje.month == 12:
-                fim = hoje.replace(day=31)
-            else:
-                fim = (hoje.replace(month=hoje.month + 1, day=1) - timedelta(days=1))
-            return (inicio, fim)
-        
-        if 'próximo mês' in text_lower or 'mês que vem' in text_lower or 'proximo mes' in text_lower:
-            if hoje.month == 12:
-                inicio = hoje.replace(year=hoje.year + 1, month=1, day=1)
-                fim = inicio.replace(day=31)
-            else:
-                inicio = hoje.replace(month=hoje.month + 1, day=1)
-                fim = (inicio.replace(month=inicio.month + 1, day=1) - timedelta(days=1))
-            return (inicio, fim)
-        
-        # Datas específicas (formato dd/mm/yyyy ou dd/mm/yy ou dd/mm)
-        # PRIORIDADE: Processar ANTES de "dia X"
-        date_pattern = r'(\d{1,2})[\/\-](\d{1,2})(?:[\/\-](\d{2,4}))?'
-        matches = re.findall(date_pattern, text)
-        
-        if matches:
-            dates = []
-            for match in matches:
-                try:
-                    dia, mes, ano = match[0], match[1], match[2]
-                    
-                    # Se não tem ano, usar ano atual ou próximo
-                    if not ano or ano == '':
-                        ano_ref = hoje.year
-                        mes_num = int(mes)
-                        # Se o mês já passou, assumir ano seguinte
-                        if mes_num < hoje.month or (mes_num == hoje.month and int(dia) < hoje.day):
-                            ano_ref += 1
-                        ano = str(ano_ref)
-                    elif len(ano) == 2:
-                        ano = '20' + ano
-                    
-                    data = datetime.strptime(f"{dia}/{mes}/{ano}", "%d/%m/%Y").date()
-                    dates.append(data)
-                except:
-                    continue
-            
-            if len(dates) >= 2:
-                return (min(dates), max(dates))
-            elif len(dates) == 1:
-                return (dates[0], dates[0])
-        
-        # Dia específico "dia 15", "dia 20" (apenas quando NÃO tem barra)
-        if '/' not in text and '-' not in text:
-            dia_pattern = r'dia\s+(\d{1,2})(?:\s|$|,|\?|!)'
-            match = re.search(dia_pattern, text_lower)
-            if match:
-                dia = int(match.group(1))
-                try:
-                    data_alvo = hoje.replace(day=dia)
-                    # Se o dia já passou neste mês, assume próximo mês
-                    if data_alvo < hoje:
-                        if hoje.month == 12:
-                            data_alvo = datetime(hoje.year + 1, 1, dia).date()
-                        else:
-                            data_alvo = datetime(hoje.year, hoje.month + 1, dia).date()
-                    return (data_alvo, data_alvo)
-                except ValueError:
-                    pass
-        
-        # Extrair "dias X a Y"
-        dias_pattern = r'dia[s]?\s+(\d+)\s+a[té]?\s+(\d+)'
-        match = re.search(dias_pattern, text_lower)
-        if match:
-            dia_inicio = int(match.group(1))
-            dia_fim = int(match.group(2))
-            
-            mes_ref = hoje.month
-            ano_ref = hoje.year
-            
-            try:
-                data_inicio = datetime(ano_ref, mes_ref, dia_inicio).date()
-                data_fim = datetime(ano_ref, mes_ref, dia_fim).date()
-                return (data_inicio, data_fim)
-            except:
-                pass
-        
-        return None
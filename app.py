@@ -1,7 +1,10 @@
 import streamlit as st
 from datetime import datetime, timedelta
 import pandas as pd
-from database import Database
+import numpy as np
+from database import Database, ConflitoDeVersao
+from async_database import AsyncDatabase
+from agenda_model import como_registros
 from ai_assistant import AIAssistant
 from auth import AuthManager
 from login_page import show_login_page, show_user_menu, require_auth, require_permission
@@ -444,6 +447,15 @@ def load_custom_css():
 def init_database():
     return Database()
 
+@st.cache_resource
+def init_async_database():
+    return AsyncDatabase(init_database())
+
+@st.cache_resource
+def init_realtime():
+    # Um listener por processo mantém o snapshot compartilhado atualizado
+    return init_database().iniciar_tempo_real()
+
 @st.cache_resource
 def init_ai():
     return AIAssistant()
@@ -453,6 +465,8 @@ def main():
     
     db = init_database()
     ai = init_ai()
+    if db.realtime_habilitado:
+        init_realtime()
     
     # Verificar autenticação
     if not require_auth():
@@ -475,9 +489,7 @@ def main():
         hoje = datetime.now()
         st.metric("📅 Data", hoje.strftime("%d/%m/%Y"), delta=hoje.strftime("%A"))
     with col3:
-        agendas_hoje = len([a for a in db.get_all_agendas() if 
-                           datetime.strptime(a['data_inicio'], '%Y-%m-%d').date() <= hoje.date() <= 
-                           datetime.strptime(a['data_fim'], '%Y-%m-%d').date()])
+        agendas_hoje = db.get_kpis(hoje.date())['ativas']
         st.metric("🔥 Ativas Hoje", agendas_hoje)
     
     st.markdown("---")
@@ -525,24 +537,23 @@ def chat_page(db, ai, usuario=None):
     st.caption("Pergunte sobre disponibilidade, agendas, conflitos e muito mais!")
     
     # Obter agendas para usar no formulário e consultas
-    agendas = db.get_all_agendas()
+    agendas = db.get_all_registros(perfil="timeline")
+    indice = db.get_agenda_index(perfil="timeline")
     
     # Cards de Estatísticas Rápidas
     col1, col2, col3, col4 = st.columns(4)
     hoje = datetime.now().date()
     
-    ativas = [a for a in agendas if datetime.strptime(a['data_inicio'], '%Y-%m-%d').date() <= hoje <= datetime.strptime(a['data_fim'], '%Y-%m-%d').date()]
-    proximas = [a for a in agendas if datetime.strptime(a['data_inicio'], '%Y-%m-%d').date() > hoje]
-    consultores_ativos = len(set([a['consultor'] for a in ativas]))
+    kpis = db.get_kpis(hoje)
     
     with col1:
-        st.markdown(f'<div class="stat-card"><h3>Total</h3><p>{len(agendas)}</p></div>', unsafe_allow_html=True)
+        st.markdown(f'<div class="stat-card"><h3>Total</h3><p>{kpis["total"]}</p></div>', unsafe_allow_html=True)
     with col2:
-        st.markdown(f'<div class="stat-card"><h3>Ativas</h3><p>{len(ativas)}</p></div>', unsafe_allow_html=True)
+        st.markdown(f'<div class="stat-card"><h3>Ativas</h3><p>{kpis["ativas"]}</p></div>', unsafe_allow_html=True)
     with col3:
-        st.markdown(f'<div class="stat-card"><h3>Próximas</h3><p>{len(proximas)}</p></div>', unsafe_allow_html=True)
+        st.markdown(f'<div class="stat-card"><h3>Próximas</h3><p>{kpis["proximas"]}</p></div>', unsafe_allow_html=True)
     with col4:
-        st.markdown(f'<div class="stat-card"><h3>Consultores</h3><p>{consultores_ativos}</p></div>', unsafe_allow_html=True)
+        st.markdown(f'<div class="stat-card"><h3>Consultores</h3><p>{kpis["consultores_ativos"]}</p></div>', unsafe_allow_html=True)
     
     st.markdown("##")
     
@@ -550,9 +561,9 @@ def chat_page(db, ai, usuario=None):
     with st.expander("➕ Nova Agenda Rápida", expanded=False):
         st.markdown("##### Criar nova agenda de forma rápida")
         
-        consultores_existentes = sorted(set([a['consultor'] for a in agendas])) if agendas else []
-        projetos_existentes = sorted(set([a['projeto'] for a in agendas])) if agendas else []
-        gerentes_existentes = sorted(set([a.get('gerente', '') for a in agendas if a.get('gerente')])) if agendas else []
+        consultores_existentes = db.list_consultores()
+        projetos_existentes = db.list_projetos()
+        gerentes_existentes = db.list_gerentes()
         
         with st.form("quick_agenda_form"):
             col1, col2, col3 = st.columns(3)
@@ -609,12 +620,7 @@ def chat_page(db, ai, usuario=None):
                     if data_fim < data_inicio:
                         st.error("❌ Data fim deve ser posterior à data início")
                     else:
-                        # Verificar conflitos
-                        conflito = db._check_conflito(consultor, data_inicio.strftime('%Y-%m-%d'), data_fim.strftime('%Y-%m-%d'))
-                        
-                        if conflito:
-                            st.warning(f"⚠️ Atenção: {consultor} já possui agenda neste período - {conflito['projeto']}")
-                        
+                        # create_agenda já avisa sobre conflitos
                         if db.create_agenda(
                             consultor=consultor,
                             data_inicio=data_inicio.strftime('%Y-%m-%d'),
@@ -641,18 +647,16 @@ def chat_page(db, ai, usuario=None):
     with col1:
         if st.button("📊 Ver Resumo Geral", use_container_width=True, help="Resumo completo de todas as agendas"):
             hoje = datetime.now().date()
-            ativas = [a for a in agendas if datetime.strptime(a['data_inicio'], '%Y-%m-%d').date() <= hoje <= datetime.strptime(a['data_fim'], '%Y-%m-%d').date()]
-            futuras = [a for a in agendas if datetime.strptime(a['data_inicio'], '%Y-%m-%d').date() > hoje]
-            passadas = [a for a in agendas if datetime.strptime(a['data_fim'], '%Y-%m-%d').date() < hoje]
+            kpis = db.get_kpis(hoje)
             
             response = f"### 📊 Resumo Geral de Agendas\n\n"
-            response += f"📈 **Total de Agendas:** {len(agendas)}\n\n"
-            response += f"🟢 **Em Andamento:** {len(ativas)}\n\n"
-            response += f"🔵 **Futuras:** {len(futuras)}\n\n"
-            response += f"⚫ **Concluídas:** {len(passadas)}\n\n"
+            response += f"📈 **Total de Agendas:** {kpis['total']}\n\n"
+            response += f"🟢 **Em Andamento:** {kpis['ativas']}\n\n"
+            response += f"🔵 **Futuras:** {kpis['proximas']}\n\n"
+            response += f"⚫ **Concluídas:** {kpis['concluidas']}\n\n"
             response += f"---\n\n"
-            response += f"👥 **Consultores Ativos:** {len(set([a['consultor'] for a in ativas]))}\n\n"
-            response += f"📁 **Projetos Cadastrados:** {len(set([a['projeto'] for a in agendas]))}\n\n"
+            response += f"👥 **Consultores Ativos:** {kpis['consultores_ativos']}\n\n"
+            response += f"📁 **Projetos Cadastrados:** {kpis['projetos']}\n\n"
             
             st.session_state.chat_history.append({'role': 'user', 'content': '📊 Ver Resumo Geral'})
             st.session_state.chat_history.append({'role': 'assistant', 'content': response})
@@ -664,7 +668,7 @@ def chat_page(db, ai, usuario=None):
             st.session_state.chat_history.append({'role': 'user', 'content': query})
             
             with st.spinner("🤖 Processando..."):
-                response_data = ai.process_query(query, agendas)
+                response_data = ai.process_query(query, agendas, indice)
             
             if isinstance(response_data, dict):
                 response = response_data.get("text", "")
@@ -681,7 +685,7 @@ def chat_page(db, ai, usuario=None):
             st.session_state.chat_history.append({'role': 'user', 'content': query})
             
             with st.spinner("🤖 Processando..."):
-                response_data = ai.process_query(query, agendas)
+                response_data = ai.process_query(query, agendas, indice)
             
             if isinstance(response_data, dict):
                 response = response_data.get("text", "")
@@ -703,11 +707,11 @@ def chat_page(db, ai, usuario=None):
             col1, col2, col3 = st.columns([2, 2, 1])
             
             with col1:
-                consultores_list = ['Todos'] + sorted(list(set([a['consultor'] for a in agendas])))
+                consultores_list = ['Todos'] + db.list_consultores()
                 busca_consultor = st.selectbox("👤 Consultor", consultores_list, key="busca_cons")
             
             with col2:
-                projetos_list = ['Todos'] + sorted(list(set([a['projeto'] for a in agendas])))
+                projetos_list = ['Todos'] + db.list_projetos()
                 busca_projeto = st.selectbox("📁 Projeto", projetos_list, key="busca_proj")
             
             with col3:
@@ -722,7 +726,7 @@ def chat_page(db, ai, usuario=None):
                     st.session_state.chat_history.append({'role': 'user', 'content': query})
                     
                     with st.spinner("🤖 Processando..."):
-                        response_data = ai.process_query(query, agendas)
+                        response_data = ai.process_query(query, agendas, indice)
                     
                     if isinstance(response_data, dict):
                         response = response_data.get("text", "")
@@ -742,19 +746,17 @@ def chat_page(db, ai, usuario=None):
     with col1:
         if st.button("📊 Ver Todas", use_container_width=True, help="Ver resumo de todas as agendas"):
             hoje = datetime.now().date()
-            ativas = [a for a in agendas if datetime.strptime(a['data_inicio'], '%Y-%m-%d').date() <= hoje <= datetime.strptime(a['data_fim'], '%Y-%m-%d').date()]
-            futuras = [a for a in agendas if datetime.strptime(a['data_inicio'], '%Y-%m-%d').date() > hoje]
-            passadas = [a for a in agendas if datetime.strptime(a['data_fim'], '%Y-%m-%d').date() < hoje]
+            kpis = db.get_kpis(hoje)
             
             response = f"### 📊 Resumo Geral de Agendas\n\n"
             response += f"---\n\n"
-            response += f"📈 **Total de Agendas:** {len(agendas)}\n\n"
-            response += f"🟢 **Em Andamento:** {len(ativas)}\n\n"
-            response += f"🔵 **Agendadas:** {len(futuras)}\n\n"
-            response += f"⚫ **Concluídas:** {len(passadas)}\n\n"
+            response += f"📈 **Total de Agendas:** {kpis['total']}\n\n"
+            response += f"🟢 **Em Andamento:** {kpis['ativas']}\n\n"
+            response += f"🔵 **Agendadas:** {kpis['proximas']}\n\n"
+            response += f"⚫ **Concluídas:** {kpis['concluidas']}\n\n"
             response += f"---\n\n"
-            response += f"👥 **Consultores Ativos:** {len(set([a['consultor'] for a in agendas]))}\n\n"
-            response += f"📁 **Projetos Cadastrados:** {len(set([a['projeto'] for a in agendas]))}\n\n"
+            response += f"👥 **Consultores Ativos:** {kpis['consultores']}\n\n"
+            response += f"📁 **Projetos Cadastrados:** {kpis['projetos']}\n\n"
             response += f"---\n\n"
             response += "💡 _Para visualizar detalhes completos, filtros avançados e gráficos, acesse a aba **Dashboard**._"
             
@@ -765,7 +767,7 @@ def chat_page(db, ai, usuario=None):
     with col2:
         if st.button("📅 Agendas Ativas", use_container_width=True, help="Ver agendas em andamento hoje"):
             hoje = datetime.now().date()
-            ativas = [a for a in agendas if datetime.strptime(a['data_inicio'], '%Y-%m-%d').date() <= hoje <= datetime.strptime(a['data_fim'], '%Y-%m-%d').date()]
+            ativas = [a for a in agendas if a.inicio <= hoje <= a.fim]
             
             if not ativas:
                 response = "📭 Não há agendas ativas hoje."
@@ -788,9 +790,9 @@ def chat_page(db, ai, usuario=None):
                     response += f"#### 👤 {cons}\n\n"
                     response += f"**Total ativo:** {len(ags)}\n\n"
                     for ag in ags[:5]:  # Limitar a 5 por consultor
-                        inicio = datetime.strptime(ag['data_inicio'], '%Y-%m-%d').strftime('%d/%m/%Y')
-                        fim = datetime.strptime(ag['data_fim'], '%Y-%m-%d').strftime('%d/%m/%Y')
-                        dias_restantes = (datetime.strptime(ag['data_fim'], '%Y-%m-%d').date() - hoje).days
+                        inicio = ag.inicio.strftime('%d/%m/%Y')
+                        fim = ag.fim.strftime('%d/%m/%Y')
+                        dias_restantes = (ag.fim - hoje).days
                         response += f"• **Projeto:** {ag['projeto']}\n"
                         response += f"  **OS:** {ag['os']}\n"
                         response += f"  📅 **Período:** {inicio} até {fim}\n"
@@ -807,7 +809,7 @@ def chat_page(db, ai, usuario=None):
         if st.button("🔜 Próximas Agendas", use_container_width=True, help="Ver agendas dos próximos 7 dias"):
             hoje = datetime.now().date()
             fim_periodo = hoje + timedelta(days=7)
-            proximas = [a for a in agendas if hoje < datetime.strptime(a['data_inicio'], '%Y-%m-%d').date() <= fim_periodo]
+            proximas = [a for a in agendas if hoje < a.inicio <= fim_periodo]
             
             if not proximas:
                 response = "📭 Não há agendas programadas para os próximos 7 dias."
@@ -833,9 +835,9 @@ def chat_page(db, ai, usuario=None):
                     response += f"#### 👤 {cons}\n\n"
                     response += f"**Total programado:** {len(ags)}\n\n"
                     for ag in ags[:5]:  # Limitar a 5 por consultor
-                        inicio = datetime.strptime(ag['data_inicio'], '%Y-%m-%d')
-                        fim = datetime.strptime(ag['data_fim'], '%Y-%m-%d')
-                        dias_ate = (inicio.date() - hoje).days
+                        inicio = ag.inicio
+                        fim = ag.fim
+                        dias_ate = (ag.inicio - hoje).days
                         response += f"• **Projeto:** {ag['projeto']}\n"
                         response += f"  **OS:** {ag['os']}\n"
                         response += f"  📅 **Período:** {inicio.strftime('%d/%m/%Y')} até {fim.strftime('%d/%m/%Y')}\n"
@@ -882,7 +884,7 @@ def chat_page(db, ai, usuario=None):
         st.session_state.chat_history.append({'role': 'user', 'content': user_input})
         
         with st.spinner("..."):
-            response_data = ai.process_query(user_input, agendas)
+            response_data = ai.process_query(user_input, agendas, indice)
         
         # Extrair texto e ação
         if isinstance(response_data, dict):
@@ -929,9 +931,9 @@ def chat_page(db, ai, usuario=None):
                     st.rerun()
 
 def dashboard_page(db):
-    agendas = db.get_all_agendas()
+    colunas = db.get_agenda_columns(perfil="dashboard")
     
-    if not agendas:
+    if not len(colunas):
         st.info("Nenhuma agenda cadastrada")
         
         # Botão para ir ao chat
@@ -940,29 +942,24 @@ def dashboard_page(db):
             st.rerun()
         return
     
-    df = pd.DataFrame(agendas)
-    df['data_inicio'] = pd.to_datetime(df['data_inicio'])
-    df['data_fim'] = pd.to_datetime(df['data_fim'])
-    
     hoje = datetime.now().date()
     
     # KPIs principais
     col1, col2, col3, col4 = st.columns(4)
     
-    ativas = df[(df['data_inicio'].dt.date <= hoje) & (df['data_fim'].dt.date >= hoje)]
-    proximas = df[df['data_inicio'].dt.date > hoje]
+    kpis = db.get_kpis(hoje)
     
     with col1:
-        st.markdown(f'<div class="stat-card"><h3>Total</h3><p>{len(df)}</p></div>', unsafe_allow_html=True)
+        st.markdown(f'<div class="stat-card"><h3>Total</h3><p>{kpis["total"]}</p></div>', unsafe_allow_html=True)
     
     with col2:
-        st.markdown(f'<div class="stat-card"><h3>Ativas</h3><p>{len(ativas)}</p></div>', unsafe_allow_html=True)
+        st.markdown(f'<div class="stat-card"><h3>Ativas</h3><p>{kpis["ativas"]}</p></div>', unsafe_allow_html=True)
     
     with col3:
-        st.markdown(f'<div class="stat-card"><h3>Próximas</h3><p>{len(proximas)}</p></div>', unsafe_allow_html=True)
+        st.markdown(f'<div class="stat-card"><h3>Próximas</h3><p>{kpis["proximas"]}</p></div>', unsafe_allow_html=True)
     
     with col4:
-        st.markdown(f'<div class="stat-card"><h3>Consultores</h3><p>{df["consultor"].nunique()}</p></div>', unsafe_allow_html=True)
+        st.markdown(f'<div class="stat-card"><h3>Consultores</h3><p>{kpis["consultores"]}</p></div>', unsafe_allow_html=True)
     
     st.markdown("##")
     
@@ -970,12 +967,20 @@ def dashboard_page(db):
     col1, col2, col3, col4, col5 = st.columns([2, 2, 2, 2, 1])
     
     with col1:
-        consultores = ['Todos'] + sorted(df['consultor'].unique().tolist())
-        selected_consultor = st.selectbox("👤 Consultor", consultores, key="dash_consultor")
+        # Opções pelos códigos das colunas; a chave muda com as categorias para
+        # que um código salvo na sessão não passe a apontar para outro nome
+        selected_consultor = st.selectbox(
+            "👤 Consultor", [None] + list(range(len(colunas.consultores))),
+            format_func=lambda codigo: 'Todos' if codigo is None else colunas.consultores[codigo],
+            key=f"dash_consultor_{hash(tuple(colunas.consultores))}"
+        )
     
     with col2:
-        projetos = ['Todos'] + sorted(df['projeto'].unique().tolist())
-        selected_projeto = st.selectbox("📁 Projeto", projetos, key="dash_projeto")
+        selected_projeto = st.selectbox(
+            "📁 Projeto", [None] + list(range(len(colunas.projetos))),
+            format_func=lambda codigo: 'Todos' if codigo is None else colunas.projetos[codigo],
+            key=f"dash_projeto_{hash(tuple(colunas.projetos))}"
+        )
     
     with col3:
         status_opcoes = ["Todas", "Próximas", "Em Andamento", "Concluídas"]
@@ -991,6 +996,7 @@ def dashboard_page(db):
     with col5:
         st.markdown("##")
         if st.button("🔄", use_container_width=True, help="Atualizar dados"):
+            db.invalidate_cache()
             st.rerun()
     
     # Se período personalizado, mostrar seletores de data
@@ -1012,65 +1018,49 @@ def dashboard_page(db):
                 key="filtro_data_fim"
             )
     
-    df_filtered = df.copy()
+    # Filtros como máscaras sobre as colunas; o DataFrame só é montado no fim
+    filtros = []
     
-    if selected_consultor != 'Todos':
-        df_filtered = df_filtered[df_filtered['consultor'] == selected_consultor]
+    if selected_consultor is not None:
+        filtros.append(colunas.mascara_consultor(selected_consultor))
     
-    if selected_projeto != 'Todos':
-        df_filtered = df_filtered[df_filtered['projeto'] == selected_projeto]
+    if selected_projeto is not None:
+        filtros.append(colunas.mascara_projeto(selected_projeto))
     
     # Aplicar filtro de status
     if selected_status == "Próximas":
-        df_filtered = df_filtered[df_filtered['data_inicio'].dt.date > hoje]
+        filtros.append(colunas.proximas_a(hoje))
     elif selected_status == "Em Andamento":
-        df_filtered = df_filtered[
-            (df_filtered['data_inicio'].dt.date <= hoje) & 
-            (df_filtered['data_fim'].dt.date >= hoje)
-        ]
+        filtros.append(colunas.ativas_em(hoje))
     elif selected_status == "Concluídas":
-        df_filtered = df_filtered[df_filtered['data_fim'].dt.date < hoje]
+        filtros.append(colunas.concluidas_em(hoje))
     
     # Aplicar filtros de período (corrigidos para puxar apenas datas corretas)
     if periodo == "Hoje":
-        df_filtered = df_filtered[
-            (df_filtered['data_inicio'].dt.date <= hoje) & 
-            (df_filtered['data_fim'].dt.date >= hoje)
-        ]
+        filtros.append(colunas.ativas_em(hoje))
     elif periodo == "Esta Semana":
         inicio_semana = hoje - timedelta(days=hoje.weekday())
         fim_semana = inicio_semana + timedelta(days=6)
-        df_filtered = df_filtered[
-            (df_filtered['data_fim'].dt.date >= inicio_semana) & 
-            (df_filtered['data_inicio'].dt.date <= fim_semana)
-        ]
+        filtros.append(colunas.mascara_periodo(inicio_semana, fim_semana))
     elif periodo == "Este Mês":
         inicio_mes = hoje.replace(day=1)
         if hoje.month == 12:
             fim_mes = hoje.replace(day=31)
         else:
             fim_mes = (hoje.replace(month=hoje.month + 1, day=1) - timedelta(days=1))
-        df_filtered = df_filtered[
-            (df_filtered['data_fim'].dt.date >= inicio_mes) & 
-            (df_filtered['data_inicio'].dt.date <= fim_mes)
-        ]
+        filtros.append(colunas.mascara_periodo(inicio_mes, fim_mes))
     elif periodo == "Próximos 7 Dias":
         fim_7_dias = hoje + timedelta(days=7)
-        df_filtered = df_filtered[
-            (df_filtered['data_inicio'].dt.date >= hoje) & 
-            (df_filtered['data_inicio'].dt.date <= fim_7_dias)
-        ]
+        filtros.append(colunas.mascara_inicio_entre(hoje, fim_7_dias))
     elif periodo == "Próximos 30 Dias":
         fim_30_dias = hoje + timedelta(days=30)
-        df_filtered = df_filtered[
-            (df_filtered['data_inicio'].dt.date >= hoje) & 
-            (df_filtered['data_inicio'].dt.date <= fim_30_dias)
-        ]
+        filtros.append(colunas.mascara_inicio_entre(hoje, fim_30_dias))
     elif periodo == "📅 Período Personalizado" and data_inicio_filtro and data_fim_filtro:
-        df_filtered = df_filtered[
-            (df_filtered['data_fim'].dt.date >= data_inicio_filtro) & 
-            (df_filtered['data_inicio'].dt.date <= data_fim_filtro)
-        ]
+        filtros.append(colunas.mascara_periodo(data_inicio_filtro, data_fim_filtro))
+    
+    # Sem filtro ativo, o DataFrame é montado sem cópia das colunas
+    mascara = np.logical_and.reduce(filtros) if filtros else None
+    df_filtered = colunas.to_frame(mascara)
     
     st.markdown("##")
     
@@ -1237,7 +1227,7 @@ def dashboard_page(db):
             col1, col2 = st.columns(2)
             
             with col1:
-                consultor_count = df_filtered['consultor'].value_counts().head(10)
+                consultor_count = colunas.contagem_consultores(mascara).head(10)
                 fig1 = px.bar(
                     x=consultor_count.values,
                     y=consultor_count.index,
@@ -1255,7 +1245,7 @@ def dashboard_page(db):
                 st.plotly_chart(fig1, use_container_width=True)
             
             with col2:
-                projeto_count = df_filtered['projeto'].value_counts()
+                projeto_count = colunas.contagem_projetos(mascara)
                 fig2 = px.pie(
                     values=projeto_count.values,
                     names=projeto_count.index,
@@ -1325,7 +1315,7 @@ def consultor_agenda_page(db, usuario):
     st.markdown(f"## 📋 Minha Agenda - {consultor_nome}")
     
     # Buscar agendas do consultor
-    agendas = db.get_agendas_by_consultor(consultor_nome)
+    agendas = como_registros(db.get_agendas_by_consultor(consultor_nome, perfil="dashboard"))
     
     if not agendas:
         st.info("📭 Você ainda não possui agendas cadastradas.")
@@ -1338,8 +1328,8 @@ def consultor_agenda_page(db, usuario):
     st.markdown("### 📊 Minhas Agendas")
     
     for agenda in sorted(agendas, key=lambda x: x['data_inicio'], reverse=True)[:20]:
-        inicio = datetime.strptime(agenda['data_inicio'], "%Y-%m-%d").strftime("%d/%m/%Y")
-        fim = datetime.strptime(agenda['data_fim'], "%Y-%m-%d").strftime("%d/%m/%Y")
+        inicio = agenda.inicio.strftime("%d/%m/%Y")
+        fim = agenda.fim.strftime("%d/%m/%Y")
         is_vago = agenda.get('is_vago', False)
         
         with st.expander(f"📅 {inicio} - {fim} | {agenda['projeto']}", expanded=False):
@@ -1388,11 +1378,21 @@ def consultor_agenda_page(db, usuario):
                     salvar = st.form_submit_button("💾 Salvar Detalhes", use_container_width=True)
                     
                     if salvar:
-                        if db.atualizar_detalhes_agenda(agenda['id'], horas, descricao):
-                            st.success("✅ Detalhes salvos com sucesso!")
-                            st.rerun()
-                        else:
-                            st.error("❌ Erro ao salvar detalhes")
+                        try:
+                            if db.atualizar_detalhes_agenda(agenda['id'], horas, descricao,
+                                                            expected_updated_at=agenda.get('updated_at')):
+                                st.success("✅ Detalhes salvos com sucesso!")
+                                st.rerun()
+                            else:
+                                st.error("❌ Erro ao salvar detalhes")
+                        except ConflitoDeVersao as conflito:
+                            atual = conflito.atual
+                            st.warning(
+                                "⚠️ Esta agenda foi alterada por outra pessoa enquanto você editava. "
+                                "Revise os valores atuais e salve novamente:\n\n"
+                                f"⏱️ Horas: {atual.get('horas_cliente') or 0}h\n\n"
+                                f"📋 Entrega: {atual.get('descricao_entrega') or '-'}"
+                            )
                 
                 # Exibir detalhes atuais se existirem
                 if agenda.get('horas_cliente') or agenda.get('descricao_entrega'):
@@ -1409,6 +1409,10 @@ def usuarios_page(db):
     
     st.markdown("## 👥 Gerenciamento de Usuários")
     
+    # Usuários e consultores são buscados ao mesmo tempo
+    adb = init_async_database()
+    usuarios, consultores = adb.executar(adb.listar_usuarios(), adb.list_consultores())
+    
     # Criar novo usuário
     with st.expander("➕ Criar Novo Usuário", expanded=False):
         with st.form("criar_usuario"):
@@ -1424,9 +1428,6 @@ def usuarios_page(db):
                 
                 consultor_vinc = None
                 if tipo == "CONSULTOR":
-                    # Buscar consultores existentes
-                    agendas = db.get_all_agendas()
-                    consultores = sorted(list(set([a['consultor'] for a in agendas])))
                     consultor_vinc = st.selectbox("Consultor Vinculado", consultores)
             
             submit = st.form_submit_button("Criar Usuário", use_container_width=True)
@@ -1446,8 +1447,6 @@ def usuarios_page(db):
     # Listar usuários existentes
     st.markdown("### 📋 Usuários Cadastrados")
     
-    usuarios = auth.listar_usuarios()
-    
     if usuarios:
         for user in usuarios:
             with st.expander(f"{'✅' if user['ativo'] else '❌'} {user['nome']} - {user['email']}", expanded=False):
@@ -1479,33 +1478,32 @@ def config_page(db):
     with tab1:
         st.markdown("### 📊 Estatísticas do Sistema")
         
-        agendas = db.get_all_agendas()
+        # Exportação usa todas as colunas de negócio
+        agendas = db.get_all_agendas(perfil="dashboard")
+        kpis = db.get_kpis()
         
         col1, col2, col3, col4 = st.columns(4)
         
         with col1:
-            st.markdown(f'<div class="stat-card"><h3>Total Agendas</h3><p>{len(agendas)}</p><div class="stat-subtitle">Cadastradas no sistema</div></div>', unsafe_allow_html=True)
+            st.markdown(f'<div class="stat-card"><h3>Total Agendas</h3><p>{kpis["total"]}</p><div class="stat-subtitle">Cadastradas no sistema</div></div>', unsafe_allow_html=True)
         
         with col2:
-            consultores = len(set([a['consultor'] for a in agendas]))
-            st.markdown(f'<div class="stat-card"><h3>Consultores</h3><p>{consultores}</p><div class="stat-subtitle">Diferentes consultores</div></div>', unsafe_allow_html=True)
+            st.markdown(f'<div class="stat-card"><h3>Consultores</h3><p>{kpis["consultores"]}</p><div class="stat-subtitle">Diferentes consultores</div></div>', unsafe_allow_html=True)
         
         with col3:
-            projetos = len(set([a['projeto'] for a in agendas]))
-            st.markdown(f'<div class="stat-card"><h3>Projetos</h3><p>{projetos}</p><div class="stat-subtitle">Projetos únicos</div></div>', unsafe_allow_html=True)
+            st.markdown(f'<div class="stat-card"><h3>Projetos</h3><p>{kpis["projetos"]}</p><div class="stat-subtitle">Projetos únicos</div></div>', unsafe_allow_html=True)
         
         with col4:
-            os_total = len(set([a['os'] for a in agendas if a.get('os')]))
-            st.markdown(f'<div class="stat-card"><h3>OS</h3><p>{os_total}</p><div class="stat-subtitle">Ordens de serviço</div></div>', unsafe_allow_html=True)
+            st.markdown(f'<div class="stat-card"><h3>OS</h3><p>{kpis["os"]}</p><div class="stat-subtitle">Ordens de serviço</div></div>', unsafe_allow_html=True)
         
         st.markdown("##")
         
         # Gráfico de agendas por consultor
         if agendas:
-            df_consultores = pd.DataFrame([{'Consultor': k, 'Agendas': len(list(v))} 
-                                          for k, v in pd.DataFrame(agendas).groupby('consultor')])
+            contagem = db.get_agenda_columns(perfil="dashboard").contagem_consultores()
+            df_consultores = pd.DataFrame({'Consultor': contagem.index, 'Agendas': contagem.values})
             
-            fig = px.bar(df_consultores.sort_values('Agendas', ascending=False), 
+            fig = px.bar(df_consultores, 
                         x='Consultor', y='Agendas',
                         title='Distribuição de Agendas por Consultor',
                         color='Agendas',
@@ -1519,10 +1517,10 @@ def config_page(db):
         # Top 10 projetos mais frequentes
         if agendas:
             st.markdown("#### 📁 Top 10 Projetos Mais Frequentes")
-            df_projetos = pd.DataFrame(agendas)
-            top_projetos = df_projetos['projeto'].value_counts().head(10)
+            top_projetos = db.get_top_projects(10)
             
-            for idx, (projeto, count) in enumerate(top_projetos.items(), 1):
+            for idx, item in enumerate(top_projetos, 1):
+                projeto, count = item['projeto'], item['agendas']
                 col1, col2 = st.columns([4, 1])
                 with col1:
                     st.write(f"**{idx}. {projeto}**")
@@ -1543,16 +1541,13 @@ def config_page(db):
             
             if st.button("🗑️ Limpar Agendas Antigas", type="secondary"):
                 data_limite = (datetime.now() - timedelta(days=dias_antigas)).date()
-                agendas_antigas = [a for a in agendas if datetime.strptime(a['data_fim'], '%Y-%m-%d').date() < data_limite]
+                agendas_antigas = [a for a in db.get_all_registros(perfil="dashboard") if a.fim < data_limite]
                 
                 if agendas_antigas:
                     st.warning(f"📋 {len(agendas_antigas)} agendas serão removidas")
                     
                     if st.button("✅ Confirmar Remoção"):
-                        removidas = 0
-                        for agenda in agendas_antigas:
-                            if db.delete_agenda(agenda['id']):
-                                removidas += 1
+                        removidas = db.delete_where(data_fim_antes=data_limite.strftime('%Y-%m-%d'))
                         
                         st.success(f"✅ {removidas} agendas removidas com sucesso!")
                         st.rerun()
@@ -1570,10 +1565,7 @@ def config_page(db):
                     st.warning(f"📋 {len(agendas_vazias)} agendas vazias encontradas")
                     
                     if st.button("✅ Confirmar Limpeza"):
-                        removidas = 0
-                        for agenda in agendas_vazias:
-                            if db.delete_agenda(agenda['id']):
-                                removidas += 1
+                        removidas = db.delete_where(is_vago=True)
                         
                         st.success(f"✅ {removidas} agendas vazias removidas!")
                         st.rerun()
@@ -1656,35 +1648,26 @@ def config_page(db):
                     st.dataframe(df_import.head(5), use_container_width=True)
                     
                     if st.button("✅ Importar Agendas", use_container_width=True):
-                        importadas = 0
-                        erros = 0
+                        df_lote = df_import.copy()
+                        
+                        # Converter datas de uma vez (datas inválidas ficam vazias e são rejeitadas)
+                        for coluna in ['data_inicio', 'data_fim']:
+                            if coluna in df_lote.columns:
+                                df_lote[coluna] = pd.to_datetime(df_lote[coluna], errors='coerce').dt.strftime('%Y-%m-%d')
+                        
+                        with st.spinner(f"Importando {len(df_lote)} agendas..."):
+                            resultados = db.create_agendas_bulk(df_lote.to_dict('records'))
+                        
+                        importadas = sum(1 for r in resultados if r['ok'])
+                        erros = len(resultados) - importadas
+                        com_conflito = sum(1 for r in resultados if r['ok'] and r['conflito'])
                         
-                        progress_bar = st.progress(0)
-                        status_text = st.empty()
+                        for idx, resultado in enumerate(resultados):
+                            if resultado['erro']:
+                                st.error(f"Erro na linha {idx + 1}: {resultado['erro']}")
                         
-                        for idx, row in df_import.iterrows():
-                            try:
-                                # Converter datas se necessário
-                                data_inicio = pd.to_datetime(row['data_inicio']).strftime('%Y-%m-%d')
-                                data_fim = pd.to_datetime(row['data_fim']).strftime('%Y-%m-%d')
-                                
-                                if db.create_agenda(
-                                    consultor=row['consultor'],
-                                    data_inicio=data_inicio,
-                                    data_fim=data_fim,
-                                    projeto=row['projeto'],
-                                    os=row.get('os'),
-                                    gerente=row.get('gerente')
-                                ):
-                                    importadas += 1
-                                else:
-                                    erros += 1
-                            except Exception as e:
-                                erros += 1
-                                st.error(f"Erro na linha {idx + 1}: {str(e)}")
-                            
-                            progress_bar.progress((idx + 1) / len(df_import))
-                            status_text.text(f"Processando: {idx + 1}/{len(df_import)}")
+                        if com_conflito:
+                            st.warning(f"⚠️ {com_conflito} agendas importadas possuem conflito com agendas existentes")
                         
                         st.success(f"✅ Importação concluída: {importadas} sucesso, {erros} erros")
                         st.rerun()
@@ -0,0 +1,154 @@
+"""
+Cliente assíncrono do Supabase para leituras concorrentes
+
+O Streamlit executa as páginas de forma síncrona; aqui as consultas rodam em
+um event loop próprio (thread de fundo), com um pool HTTP compartilhado e
+conexões keep-alive. AsyncDatabase.executar dispara leituras independentes
+ao mesmo tempo, então a página espera pela mais lenta e não pela soma delas.
+"""
+import asyncio
+import threading
+from typing import Any, Dict, List, Optional
+import httpx
+import streamlit as st
+from postgrest.exceptions import APIError
+from supabase import acreate_client, AsyncClient, AsyncClientOptions
+from agenda_model import normalizar_texto
+from database import (
+    Database, COLUNA_INEXISTENTE, PERFIS_PROJECAO, SNAPSHOT_TTL_SECONDS,
+    _LeitorAgendas, _snapshot
+)
+
+# Limites do pool HTTP compartilhado por todas as sessões
+MAX_CONEXOES = 10
+KEEPALIVE_SEGUNDOS = 30
+TIMEOUT_SEGUNDOS = 30
+
+
+class AsyncDatabase:
+    """Leituras assíncronas das mesmas tabelas de Database"""
+
+    def __init__(self, db: Database, max_conexoes: int = MAX_CONEXOES):
+        """
+        Inicializa o event loop e o cliente assíncrono
+
+        Args:
+            db: Database síncrono (credenciais e nome da tabela)
+            max_conexoes: Conexões simultâneas no pool HTTP
+        """
+        self.table_name = getattr(db, "table_name", "agendas")
+        self.client: Optional[AsyncClient] = None
+
+        self._loop = asyncio.new_event_loop()
+        self._thread = threading.Thread(target=self._loop.run_forever, name="async-database", daemon=True)
+        self._thread.start()
+
+        if not db.supabase_url or not db.supabase_key:
+            return
+
+        try:
+            self.client = self._rodar(self._conectar(db.supabase_url, db.supabase_key, max_conexoes))
+        except Exception as e:
+            print(f"Erro ao conectar (assíncrono): {str(e)}")
+            self.client = None
+
+    async def _conectar(self, url: str, key: str, max_conexoes: int) -> AsyncClient:
+        # O httpx.AsyncClient precisa ser criado dentro do loop que vai usá-lo
+        http = httpx.AsyncClient(
+            limits=httpx.Limits(
+                max_connections=max_conexoes,
+                max_keepalive_connections=max_conexoes,
+                keepalive_expiry=KEEPALIVE_SEGUNDOS
+            ),
+            timeout=TIMEOUT_SEGUNDOS
+        )
+        return await acreate_client(url, key, options=AsyncClientOptions(httpx_client=http))
+
+    def _rodar(self, corrotina):
+        """Executa uma corrotina no loop de fundo e aguarda o resultado"""
+        return asyncio.run_coroutine_threadsafe(corrotina, self._loop).result()
+
+    def executar(self, *leituras) -> List[Any]:
+        """
+        Executa leituras independentes ao mesmo tempo
+
+        Args:
+            leituras: Corrotinas deste cliente (ex.: db.listar_usuarios())
+
+        Returns:
+            Resultados na mesma ordem; leituras com erro retornam lista vazia
+        """
+        async def _todas():
+            return await asyncio.gather(*leituras, return_exceptions=True)
+
+        resultados = self._rodar(_todas())
+
+        # Erros exibidos na thread da página (st.error não funciona no loop de fundo)
+        for i, resultado in enumerate(resultados):
+            if isinstance(resultado, Exception):
+                st.error(f"❌ Erro ao buscar dados: {str(resultado)}")
+                resultados[i] = []
+        return resultados
+
+    def _ensure_connection(self) -> None:
+        if self.client is None:
+            raise ConnectionError("Sem conexão com o banco de dados")
+
+    def _executar_consulta(self, query):
+        """Executor de _LeitorAgendas: roda a consulta no loop de fundo (chamado de outra thread)"""
+        return self._rodar(query.execute())
+
+    def _leitor(self) -> _LeitorAgendas:
+        """Leitor das agendas sobre o cliente assíncrono (usar via asyncio.to_thread)"""
+        return _LeitorAgendas(self.client, self.table_name, self._executar_consulta)
+
+    async def get_all_agendas(self, perfil: str = "full") -> List[Dict]:
+        """
+        Retorna todas as agendas, usando o snapshot compartilhado com Database
+
+        Mesmo caminho de Database.get_all_agendas (_LeitorAgendas): busca única
+        por perfil, renovação por data_version e sincronização incremental. O
+        leitor roda em uma thread auxiliar, liberando o loop para as consultas.
+
+        Args:
+            perfil: Perfil de projeção (veja PERFIS_PROJECAO)
+        """
+        cached = _snapshot.get(perfil, SNAPSHOT_TTL_SECONDS)
+        if cached is not None:
+            return list(cached)
+
+        self._ensure_connection()
+        return await asyncio.to_thread(self._leitor().get_all_agendas, perfil)
+
+    async def get_agendas_by_consultor(self, consultor: str, perfil: str = "full") -> List[Dict]:
+        """Agendas de um consultor (busca parcial sem acentos, data_inicio decrescente)"""
+        self._ensure_connection()
+
+        def montar(coluna: str, padrao: str):
+            return self.client.table(self.table_name)\
+                .select(PERFIS_PROJECAO[perfil])\
+                .ilike(coluna, padrao)\
+                .order("data_inicio", desc=True)
+
+        try:
+            response = await montar("consultor_busca", f"%{normalizar_texto(consultor)}%").execute()
+        except APIError as e:
+            # Sem as colunas de setup_busca.sql
+            if e.code != COLUNA_INEXISTENTE:
+                raise
+            response = await montar("consultor", f"%{consultor}%").execute()
+        return response.data if response.data else []
+
+    async def list_consultores(self) -> List[str]:
+        """Consultores cadastrados (mesmo cache e leitura de Database.list_consultores)"""
+        self._ensure_connection()
+        return await asyncio.to_thread(self._leitor().listar_dimensao, "consultores")
+
+    async def listar_usuarios(self) -> List[Dict]:
+        """Lista todos os usuários (mesmas colunas de AuthManager.listar_usuarios)"""
+        self._ensure_connection()
+        response = await self.client.table("usuarios")\
+            .select("id, email, nome, tipo_usuario, consultor_vinculado, ativo")\
+            .order("created_at", desc=True)\
+            .execute()
+        return response.data if response.data else []
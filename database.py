@@ -1,8 +1,841 @@
+import asyncio
 import os
-from supabase import create_client, Client
-from datetime import datetime
-from typing import List, Dict, Optional
+import threading
+import time
+from supabase import create_client, acreate_client, Client
+from datetime import date, datetime, timedelta
+from typing import List, Dict, Optional, Iterator, Tuple
 import streamlit as st
+from postgrest.exceptions import APIError
+from agenda_index import AgendaIndex
+from agenda_columns import AgendaColumns
+from agenda_model import Agenda, como_registros, normalizar_texto
+
+# Tempo (em segundos) em que o snapshot compartilhado de agendas é reaproveitado
+SNAPSHOT_TTL_SECONDS = 60
+
+# Janela de sobreposição da sincronização incremental: cobre transações que
+# gravaram updated_at antes da última leitura mas só confirmaram depois dela
+SYNC_MARGEM_SEGUNDOS = 30
+
+# Intervalo máximo entre recargas completas do snapshot (descarta qualquer desvio)
+SYNC_COMPLETO_SEGUNDOS = 3600
+
+# Perfis de projeção das leituras de agendas: cada tela pede apenas as colunas que usa
+PERFIS_PROJECAO = {
+    "periodo": "id, consultor, data_inicio, data_fim, is_vago, updated_at",
+    "conflict": "id, consultor, projeto, os, data_inicio, data_fim",
+    "timeline": "id, consultor, projeto, os, gerente, data_inicio, data_fim, is_vago, updated_at",
+    "dashboard": "id, consultor, projeto, os, gerente, data_inicio, data_fim, is_vago, "
+                 "horas_cliente, descricao_entrega, updated_at",
+    "full": "*",
+}
+
+# Perfil com as colunas usadas pelos indicadores (projeto, os)
+PERFIL_AGREGADOS = "timeline"
+
+# Código do PostgREST para função RPC inexistente (migração ainda não aplicada)
+FUNCAO_INEXISTENTE = "PGRST202"
+
+# Código do Postgres para coluna inexistente (ex.: colunas de setup_busca.sql)
+COLUNA_INEXISTENTE = "42703"
+
+# Códigos de tabela inexistente: PostgREST (cache de schema) e Postgres
+TABELA_INEXISTENTE = ("PGRST205", "42P01")
+
+# Tabelas de dimensão (setup_dimensoes.sql) e a coluna de agendas correspondente
+DIMENSOES = {"consultores": "consultor", "projetos": "projeto", "gerentes": "gerente"}
+
+# Tempo em que as listas de dimensão são reaproveitadas (escritas locais as invalidam)
+DIMENSOES_TTL_SECONDS = 600
+
+# Tempo máximo de espera pela inscrição no canal de tempo real
+REALTIME_TIMEOUT_SECONDS = 15
+
+# Indicadores retornados por Database.get_kpis (e pela função agendas_kpis)
+KPIS = ("total", "ativas", "proximas", "concluidas", "consultores", "consultores_ativos", "projetos", "os")
+
+
+def _colunas_perfil(perfil: str) -> Optional[set]:
+    """Colunas de um perfil (None significa todas as colunas)"""
+    projecao = PERFIS_PROJECAO[perfil]
+    if projecao == "*":
+        return None
+    return {coluna.strip() for coluna in projecao.split(",")}
+
+
+def _perfil_atende(fonte: str, pedido: str) -> bool:
+    """Indica se linhas buscadas com o perfil fonte servem para o perfil pedido"""
+    colunas_fonte = _colunas_perfil(fonte)
+    if colunas_fonte is None:
+        return True
+    colunas_pedido = _colunas_perfil(pedido)
+    return colunas_pedido is not None and colunas_pedido <= colunas_fonte
+
+
+class ConflitoDeVersao(Exception):
+    """
+    A agenda foi alterada depois da versão lida (updated_at diferente)
+    
+    Attributes:
+        atual: Linha atual da agenda no banco
+    """
+    
+    def __init__(self, atual: Dict):
+        super().__init__(f"Agenda {atual.get('id')} alterada em {atual.get('updated_at')}")
+        self.atual = atual
+
+
+class _EntradaSnapshot:
+    """Cópia das agendas de um perfil e as marcas da última sincronização"""
+    
+    __slots__ = ("loaded_at", "full_at", "rows", "updated_max", "removido_max", "versao_dados",
+                 "registros", "indice", "colunas")
+    
+    def __init__(self, rows: List[Dict], updated_max: Optional[datetime],
+                 removido_max: Optional[datetime], full_at: float,
+                 versao_dados: Optional[Tuple[int, Optional[str]]] = None):
+        self.loaded_at = time.monotonic()
+        self.full_at = full_at
+        self.rows = rows
+        self.updated_max = updated_max
+        self.removido_max = removido_max
+        # Database.data_version() medida antes da busca (None: desconhecida)
+        self.versao_dados = versao_dados
+        self.registros: Optional[List[Agenda]] = None
+        self.indice: Optional[AgendaIndex] = None
+        self.colunas: Optional[AgendaColumns] = None
+    
+    def get_registros(self) -> List[Agenda]:
+        """Linhas como registros Agenda (datas convertidas uma vez por snapshot)"""
+        if self.registros is None:
+            self.registros = como_registros(self.rows)
+        return self.registros
+    
+    def get_indice(self) -> AgendaIndex:
+        """Índice de intervalos das linhas, construído na primeira consulta"""
+        if self.indice is None:
+            self.indice = AgendaIndex(self.get_registros())
+        return self.indice
+    
+    def get_colunas(self) -> AgendaColumns:
+        """Colunas NumPy das linhas, construídas na primeira consulta"""
+        if self.colunas is None:
+            self.colunas = AgendaColumns(self.get_registros())
+        return self.colunas
+
+
+class _SnapshotCache:
+    """
+    Snapshot de agendas compartilhado por todas as sessões do processo
+    
+    Guarda uma cópia por perfil de projeção. Inserções, remoções e
+    invalidações incrementam a versão: uma busca iniciada antes delas não
+    pode gravar seu resultado (já desatualizado) no cache. Edições de linhas
+    já presentes só entram no registro de edições; a busca em andamento grava
+    o resultado com elas reaplicadas (vale o updated_at mais recente).
+    """
+    
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.version = 0
+        self.entries: Dict[str, _EntradaSnapshot] = {}
+        # Resultados de RPCs de agregação: chave -> (loaded_at, valor)
+        self.agregados: Dict[tuple, Tuple[float, object]] = {}
+        # Edições desde a última mudança de versão: id -> (sequência, linha completa)
+        self.edicoes: Dict[int, Tuple[int, Dict]] = {}
+        self.sequencia = 0
+    
+    def get(self, perfil: str, ttl: float) -> Optional[List[Dict]]:
+        """Retorna as agendas em cache que atendem ao perfil ou None"""
+        entrada = self.fresh_entry(perfil, ttl)
+        return entrada.rows if entrada is not None else None
+    
+    def fresh_entry(self, perfil: str, ttl: float) -> Optional[_EntradaSnapshot]:
+        """Entrada dentro do TTL cujas colunas atendem ao perfil"""
+        agora = time.monotonic()
+        with self._lock:
+            for fonte, entrada in self.entries.items():
+                if agora - entrada.loaded_at <= ttl and _perfil_atende(fonte, perfil):
+                    return entrada
+            return None
+    
+    def entry(self, perfil: str) -> Optional[_EntradaSnapshot]:
+        """Entrada do perfil, mesmo expirada (base da sincronização incremental)"""
+        with self._lock:
+            return self.entries.get(perfil)
+    
+    def current_version(self) -> Tuple[int, int]:
+        """Marca do início de uma busca: (versão, sequência de edições)"""
+        with self._lock:
+            return (self.version, self.sequencia)
+    
+    def _bump(self) -> None:
+        """Nova versão: buscas anteriores serão descartadas, então as edições também"""
+        self.version += 1
+        self.edicoes = {}
+    
+    def store(self, perfil: str, entrada: _EntradaSnapshot, version: Tuple[int, int]) -> None:
+        """
+        Grava o resultado de uma busca iniciada na versão informada
+        
+        Edições aplicadas durante a busca são reaplicadas ao resultado, salvo
+        quando a linha buscada tem updated_at mais recente que a editada.
+        """
+        with self._lock:
+            if version[0] != self.version:
+                return
+            if self.sequencia != version[1]:
+                colunas = _colunas_perfil(perfil)
+                atuais = {row["id"]: row for row in entrada.rows}
+                reaplicar = [
+                    linha if colunas is None else {c: linha.get(c) for c in colunas}
+                    for agenda_id, (sequencia, linha) in self.edicoes.items()
+                    if sequencia > version[1] and agenda_id in atuais
+                    and not _mais_recente(atuais[agenda_id], linha)
+                ]
+                if reaplicar:
+                    entrada.rows = _aplicar_delta(entrada.rows, reaplicar, [])
+            self.entries[perfil] = entrada
+    
+    def renew(self, perfil: str, entrada: _EntradaSnapshot, version: Tuple[int, int]) -> bool:
+        """
+        Renova o TTL de uma entrada expirada cujos dados não mudaram no banco
+        
+        Só vale se nenhuma escrita ocorreu desde a versão informada e a entrada
+        ainda é a mesma (não foi substituída nem invalidada).
+        """
+        with self._lock:
+            if version != (self.version, self.sequencia) or self.entries.get(perfil) is not entrada \
+                    or entrada.loaded_at == float("-inf"):
+                return False
+            entrada.loaded_at = time.monotonic()
+            return True
+    
+    def get_agregado(self, chave: tuple, ttl: float):
+        """Agregado em cache dentro do TTL ou None"""
+        with self._lock:
+            item = self.agregados.get(chave)
+            if item is None or time.monotonic() - item[0] > ttl:
+                return None
+            return item[1]
+    
+    def store_agregado(self, chave: tuple, valor, version: Tuple[int, int]) -> None:
+        """Grava um agregado calculado a partir da versão informada"""
+        with self._lock:
+            if version == (self.version, self.sequencia):
+                self.agregados[chave] = (time.monotonic(), valor)
+    
+    def patch(self, gravadas: List[Dict] = (), removidas: List[int] = ()) -> None:
+        """
+        Aplica ao snapshot as linhas devolvidas por uma escrita deste processo
+        
+        As entradas continuam válidas (a próxima leitura não vai à rede); as
+        marcas de sincronização não avançam, para que a sincronização
+        incremental ainda traga escritas de outros processos. Linhas com
+        updated_at anterior ao da cópia em cache (evento atrasado) são
+        ignoradas. Inserções e remoções incrementam a versão (buscas em
+        andamento não gravam resultados anteriores); edições de linhas já
+        presentes em todas as entradas só entram no registro de edições,
+        reaplicado por store.
+        """
+        with self._lock:
+            ids_entradas = [{row["id"] for row in entrada.rows} for entrada in self.entries.values()]
+            # Colunas de dimensão cujo nome mudou em uma linha conhecida: o nome
+            # antigo pode ter sido podado no banco (setup_dimensoes.sql)
+            renomeadas = {
+                coluna
+                for entrada in self.entries.values()
+                for anterior, linha in _pares_por_id(entrada.rows, gravadas)
+                for coluna in DIMENSOES.values()
+                if coluna in anterior and coluna in linha and anterior[coluna] != linha[coluna]
+            }
+            if removidas or not ids_entradas or any(
+                linha["id"] not in ids for linha in gravadas for ids in ids_entradas
+            ):
+                self._bump()
+            else:
+                for linha in gravadas:
+                    anterior = self.edicoes.get(linha["id"])
+                    if anterior is not None and _mais_recente(anterior[1], linha):
+                        continue
+                    self.sequencia += 1
+                    self.edicoes[linha["id"]] = (self.sequencia, linha)
+            
+            for perfil, entrada in list(self.entries.items()):
+                colunas = _colunas_perfil(perfil)
+                atuais = {row["id"]: row for row in entrada.rows}
+                projetadas = [
+                    linha if colunas is None else {c: linha.get(c) for c in colunas}
+                    for linha in gravadas
+                    if linha["id"] not in atuais or not _mais_recente(atuais[linha["id"]], linha)
+                ]
+                nova = _EntradaSnapshot(
+                    _aplicar_delta(entrada.rows, projetadas, list(removidas)),
+                    entrada.updated_max, entrada.removido_max, entrada.full_at
+                )
+                nova.loaded_at = entrada.loaded_at
+                self.entries[perfil] = nova
+            
+            # Indicadores do servidor ficam desatualizados; listas de dimensão
+            # só ganham os nomes novos (remoções e renomeações podem podar
+            # nomes no banco, então nesses casos as listas são descartadas)
+            agregados = {}
+            for chave, (loaded_at, valor) in self.agregados.items():
+                if chave[0] != "dimensao" or removidas or DIMENSOES[chave[1]] in renomeadas:
+                    continue
+                coluna = DIMENSOES[chave[1]]
+                nomes = set(valor) | {linha.get(coluna) for linha in gravadas if linha.get(coluna)}
+                agregados[chave] = (loaded_at, sorted(nomes))
+            self.agregados = agregados
+    
+    def invalidate_dimensoes(self) -> None:
+        """Descarta as listas de dimensão (um nome pode ter saído do banco)"""
+        with self._lock:
+            self.agregados = {chave: item for chave, item in self.agregados.items() if chave[0] != "dimensao"}
+    
+    def invalidate(self) -> None:
+        """
+        Expira o snapshot. Perfis com marcas de sincronização mantêm as linhas
+        para que a próxima leitura busque só o que mudou.
+        """
+        with self._lock:
+            self._bump()
+            self.agregados = {}
+            self.entries = {
+                perfil: entrada for perfil, entrada in self.entries.items()
+                if entrada.updated_max is not None
+            }
+            for entrada in self.entries.values():
+                entrada.loaded_at = float("-inf")
+
+
+_snapshot = _SnapshotCache()
+
+
+class _Voo:
+    """Leitura em andamento: resultado (ou erro) e o evento de conclusão"""
+    
+    __slots__ = ("evento", "resultado", "erro")
+    
+    def __init__(self):
+        self.evento = threading.Event()
+        self.resultado = None
+        self.erro: Optional[BaseException] = None
+
+
+class _SingleFlight:
+    """
+    Agrupa leituras idênticas simultâneas
+    
+    A primeira chamada com uma chave faz a busca; as que chegam enquanto ela
+    está em andamento esperam e recebem o mesmo resultado (ou a mesma exceção).
+    """
+    
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._voos: Dict[tuple, _Voo] = {}
+    
+    def do(self, chave: tuple, buscar):
+        with self._lock:
+            voo = self._voos.get(chave)
+            lider = voo is None
+            if lider:
+                voo = self._voos[chave] = _Voo()
+        
+        if not lider:
+            voo.evento.wait()
+            if voo.erro is not None:
+                raise voo.erro
+            return voo.resultado
+        
+        try:
+            voo.resultado = buscar()
+            return voo.resultado
+        except BaseException as e:
+            voo.erro = e
+            raise
+        finally:
+            with self._lock:
+                del self._voos[chave]
+            voo.evento.set()
+
+
+_voos = _SingleFlight()
+
+
+class ReplayChangeSource:
+    """
+    Fonte de mudanças local: reproduz um log de eventos, na ordem
+    
+    Substitui o Supabase Realtime em testes e desenvolvimento. Os eventos têm
+    o mesmo formato de SupabaseChangeSource: {"type": "INSERT" | "UPDATE" |
+    "DELETE", "record": linha nova, "old_record": linha anterior}.
+    """
+    
+    def __init__(self, eventos: List[Dict] = ()):
+        self.eventos = list(eventos)
+        self._callback = None
+    
+    def iniciar(self, callback) -> None:
+        """Entrega os eventos do log e passa a entregar os publicados depois"""
+        self._callback = callback
+        for evento in list(self.eventos):
+            callback(evento)
+    
+    def publicar(self, evento: Dict) -> None:
+        """Acrescenta um evento ao log (entregue na hora se a fonte estiver ativa)"""
+        self.eventos.append(evento)
+        if self._callback is not None:
+            self._callback(evento)
+    
+    def parar(self) -> None:
+        self._callback = None
+
+
+class SupabaseChangeSource:
+    """
+    Eventos de INSERT, UPDATE e DELETE da tabela via Supabase Realtime
+    
+    O cliente de tempo real do supabase-py é assíncrono: a inscrição roda em
+    um event loop próprio (thread de fundo) e cada evento é repassado ao
+    callback nessa thread. A tabela precisa estar na publicação
+    supabase_realtime (setup_realtime.sql).
+    """
+    
+    def __init__(self, supabase_url: str, supabase_key: str, table_name: str = "agendas"):
+        self.supabase_url = supabase_url
+        self.supabase_key = supabase_key
+        self.table_name = table_name
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._client = None
+        self._canal = None
+    
+    def iniciar(self, callback) -> None:
+        self._loop = asyncio.new_event_loop()
+        threading.Thread(target=self._loop.run_forever, name="realtime-agendas", daemon=True).start()
+        asyncio.run_coroutine_threadsafe(self._assinar(callback), self._loop)\
+            .result(timeout=REALTIME_TIMEOUT_SECONDS)
+    
+    async def _assinar(self, callback) -> None:
+        self._client = await acreate_client(self.supabase_url, self.supabase_key)
+        self._canal = self._client.channel(f"{self.table_name}-mudancas")
+        self._canal.on_postgres_changes(
+            "*", schema="public", table=self.table_name,
+            callback=lambda payload: callback(payload["data"])
+        )
+        await self._canal.subscribe()
+    
+    def parar(self) -> None:
+        if self._loop is None:
+            return
+        if self._canal is not None:
+            asyncio.run_coroutine_threadsafe(self._client.remove_channel(self._canal), self._loop)\
+                .result(timeout=REALTIME_TIMEOUT_SECONDS)
+            self._canal = None
+        self._loop.call_soon_threadsafe(self._loop.stop)
+        self._loop = None
+
+
+class RealtimeListener:
+    """
+    Aplica ao snapshot compartilhado as mudanças publicadas por uma fonte
+    
+    Cada evento entra pelo mesmo caminho das escritas locais
+    (_SnapshotCache.patch): as entradas continuam dentro do TTL e os índices
+    são reconstruídos na próxima leitura, então as telas mostram edições de
+    outros usuários sem nova consulta. As marcas de sincronização não
+    avançam; a sincronização incremental continua cobrindo eventos perdidos.
+    """
+    
+    def __init__(self, fonte):
+        self.fonte = fonte
+        self.ativo = False
+        self.aplicados = 0
+    
+    def iniciar(self) -> None:
+        self.fonte.iniciar(self.aplicar)
+        self.ativo = True
+    
+    def parar(self) -> None:
+        self.fonte.parar()
+        self.ativo = False
+    
+    def aplicar(self, evento: Dict) -> bool:
+        """
+        Aplica um evento ao snapshot
+        
+        Returns:
+            True se o evento era uma mudança de agenda reconhecida
+        """
+        tipo = str(evento.get("type") or "").upper()
+        if tipo in ("INSERT", "UPDATE"):
+            linha = evento.get("record") or {}
+            if linha.get("id") is None:
+                return False
+            _snapshot.patch(gravadas=[linha])
+        elif tipo == "DELETE":
+            # Sem REPLICA IDENTITY FULL, old_record traz apenas a chave primária
+            agenda_id = (evento.get("old_record") or {}).get("id")
+            if agenda_id is None:
+                return False
+            _snapshot.patch(removidas=[agenda_id])
+        else:
+            return False
+        
+        self.aplicados += 1
+        return True
+
+
+def _projecao_ordenada(perfil: str, order: Tuple[str, ...]) -> str:
+    """Projeção do perfil acrescida das colunas de ordenação (necessárias ao cursor)"""
+    projecao = PERFIS_PROJECAO[perfil]
+    colunas = _colunas_perfil(perfil)
+    if colunas is not None:
+        faltando = [c for c in order if c not in colunas]
+        if faltando:
+            projecao = ", ".join([projecao] + faltando)
+    return projecao
+
+
+def _entrada_completa(perfil: str, rows: List[Dict],
+                      versao_dados: Optional[Tuple[int, Optional[str]]] = None) -> _EntradaSnapshot:
+    """Entrada do snapshot para uma carga completa (linhas em data_inicio decrescente)"""
+    colunas = _colunas_perfil(perfil)
+    updated_max = None
+    if colunas is None or "updated_at" in colunas:
+        updated_max = _max_timestamp(r.get("updated_at") for r in rows)
+    # Remoções anteriores à carga completa já não estão nas linhas
+    return _EntradaSnapshot(rows, updated_max, updated_max, time.monotonic(), versao_dados)
+
+
+def _valor_texto(valor) -> Optional[str]:
+    """Converte um valor importado (str, número, NaN) em texto limpo ou None"""
+    if valor is None or (isinstance(valor, float) and valor != valor):
+        return None
+    if isinstance(valor, float) and valor.is_integer():
+        valor = int(valor)  # Colunas numéricas com vazios viram float no pandas
+    texto = str(valor).strip()
+    return texto or None
+
+
+def _filtro_keyset(order: Tuple[str, ...], cursor: tuple) -> str:
+    """
+    Monta o filtro PostgREST "depois do cursor" para uma ordenação composta
+    
+    Para (a, b): a > va OU (a = va E b > vb)
+    """
+    def valor(v) -> str:
+        texto = str(v).replace('\\', '\\\\').replace('"', '\\"')
+        return f'"{texto}"'
+    
+    condicoes = []
+    for i, coluna in enumerate(order):
+        iguais = [f"{order[j]}.eq.{valor(cursor[j])}" for j in range(i)]
+        maior = f"{coluna}.gt.{valor(cursor[i])}"
+        condicoes.append(f"and({','.join(iguais + [maior])})" if iguais else maior)
+    return ",".join(condicoes)
+
+
+def _executar(query):
+    """Executor das consultas do cliente síncrono"""
+    return query.execute()
+
+
+def _paginar_keyset(montar, order: Tuple[str, ...], page_size: int = 1000,
+                    executar=_executar) -> Iterator[Dict]:
+    """
+    Percorre uma consulta em páginas, com cursor por chave (keyset)
+    
+    Args:
+        montar: Função que devolve a consulta base (select e filtros, sem ordem)
+        order: Colunas de ordenação crescente; a última deve ser única
+        page_size: Linhas por requisição
+        executar: Executa uma consulta e devolve a resposta (veja _LeitorAgendas)
+    
+    Yields:
+        Linhas na ordem de order
+    """
+    cursor = None
+    while True:
+        query = montar()
+        if cursor is not None:
+            query = query.or_(_filtro_keyset(order, cursor))
+        for coluna in order:
+            query = query.order(coluna)
+        
+        pagina = executar(query.limit(page_size)).data or []
+        if not pagina:
+            # Parar só na página vazia: o servidor pode limitar abaixo de page_size
+            return
+        
+        yield from pagina
+        cursor = tuple(pagina[-1][coluna] for coluna in order)
+
+
+def _parse_timestamp(valor: Optional[str]) -> Optional[datetime]:
+    """Converte um timestamp ISO do PostgREST em datetime"""
+    if not valor:
+        return None
+    try:
+        return datetime.fromisoformat(valor.replace("Z", "+00:00"))
+    except ValueError:
+        return None
+
+
+def _max_timestamp(valores) -> Optional[datetime]:
+    """Maior timestamp da sequência (ignora vazios)"""
+    datas = [d for d in (_parse_timestamp(v) for v in valores) if d is not None]
+    return max(datas) if datas else None
+
+
+def _maior(*datas: Optional[datetime]) -> Optional[datetime]:
+    """Maior data entre as informadas (ignora None)"""
+    validas = [d for d in datas if d is not None]
+    return max(validas) if validas else None
+
+
+def _mais_recente(atual: Dict, nova: Dict) -> bool:
+    """Indica se a linha atual tem updated_at posterior ao da nova (sem as duas marcas: False)"""
+    antes, depois = _parse_timestamp(atual.get("updated_at")), _parse_timestamp(nova.get("updated_at"))
+    return antes is not None and depois is not None and antes > depois
+
+
+def _pares_por_id(rows: List[Dict], linhas: List[Dict]) -> List[Tuple[Dict, Dict]]:
+    """Pares (linha em rows, linha nova) com o mesmo id"""
+    atuais = {row["id"]: row for row in rows}
+    return [(atuais[linha["id"]], linha) for linha in linhas if linha["id"] in atuais]
+
+
+def _aplicar_delta(rows: List[Dict], alteradas: List[Dict], removidas: List[int]) -> List[Dict]:
+    """Aplica linhas alteradas e removidas a um snapshot (data_inicio decrescente)"""
+    por_id = {row["id"]: row for row in rows}
+    for row in alteradas:
+        por_id[row["id"]] = row
+    for agenda_id in removidas:
+        por_id.pop(agenda_id, None)
+    return sorted(por_id.values(), key=lambda r: (r["data_inicio"], r["id"]), reverse=True)
+
+
+def _formatar_conflito(agenda: Dict) -> str:
+    """Formata uma agenda conflitante para as mensagens de aviso"""
+    inicio = datetime.strptime(agenda['data_inicio'], "%Y-%m-%d").strftime('%d/%m/%Y')
+    fim = datetime.strptime(agenda['data_fim'], "%Y-%m-%d").strftime('%d/%m/%Y')
+    os_info = f" (OS {agenda['os']})" if agenda.get('os') else ""
+    return f"• {agenda['projeto']}{os_info}: {inicio} a {fim}"
+
+
+class _LeitorAgendas:
+    """
+    Leitura das agendas para o snapshot compartilhado
+    
+    Concentra a renovação do snapshot (TTL, busca única por perfil,
+    data_version e sincronização incremental) e a paginação por chave.
+    As consultas passam pelo executor informado: Database executa direto no
+    cliente síncrono; AsyncDatabase roda este leitor em uma thread auxiliar
+    e executa cada consulta no seu event loop.
+    """
+    
+    def __init__(self, client, table_name: str, executar=_executar):
+        """
+        Args:
+            client: Cliente Supabase (síncrono ou assíncrono, conforme o executor)
+            table_name: Tabela de agendas
+            executar: Executa uma consulta montada e devolve a resposta
+        """
+        self.client = client
+        self.table_name = table_name
+        self.executar = executar
+    
+    def get_all_agendas(self, perfil: str = "full") -> List[Dict]:
+        """
+        Agendas do snapshot dentro do TTL; senão uma busca compartilhada pelas
+        leituras simultâneas do mesmo perfil (síncronas ou não)
+        
+        Raises:
+            Exception: Falha na carga completa (nada é gravado no snapshot)
+        """
+        cached = _snapshot.get(perfil, SNAPSHOT_TTL_SECONDS)
+        if cached is not None:
+            return list(cached)
+        return list(_voos.do(("get_all_agendas", perfil), lambda: self._sync_se_expirado(perfil)))
+    
+    def _sync_se_expirado(self, perfil: str) -> List[Dict]:
+        """
+        sync(perfil), a menos que outra busca já tenha renovado o snapshot ou
+        que a versão dos dados (data_version) não tenha mudado desde a busca
+        que gerou a entrada expirada
+        """
+        cached = _snapshot.get(perfil, SNAPSHOT_TTL_SECONDS)
+        if cached is not None:
+            return cached
+        
+        version = _snapshot.current_version()
+        entrada = _snapshot.entry(perfil)
+        versao_dados = self.data_version()
+        if entrada is not None and versao_dados is not None and entrada.versao_dados == versao_dados \
+                and _snapshot.renew(perfil, entrada, version):
+            return entrada.rows
+        return self.sync(perfil, versao_dados)
+    
+    def data_version(self) -> Optional[Tuple[int, Optional[str]]]:
+        """
+        Versão dos dados da tabela: (quantidade de agendas, maior updated_at)
+        
+        Consulta mínima (uma linha, só updated_at, com contagem exata): inserções
+        e edições movem o updated_at, remoções mudam a contagem.
+        
+        Returns:
+            Tupla (count, max updated_at) ou None se não foi possível medir
+        """
+        try:
+            response = self.executar(
+                self.client.table(self.table_name)
+                .select("updated_at", count="exact")
+                .order("updated_at", desc=True, nullsfirst=False)
+                .limit(1)
+            )
+            maior = response.data[0].get("updated_at") if response.data else None
+            return (response.count, maior)
+        except Exception:
+            return None  # Sem a medida, a leitura segue pela sincronização
+    
+    def sync(self, perfil: str = "full", versao_dados: Optional[Tuple[int, Optional[str]]] = None) -> List[Dict]:
+        """
+        Atualiza o snapshot do perfil buscando apenas o que mudou
+        
+        Pede as agendas com updated_at posterior à última sincronização e os
+        ids registrados em agendas_removidas (setup_sync.sql) desde então. Sem
+        snapshot anterior, perfil sem updated_at, tabela de remoções ausente ou
+        após SYNC_COMPLETO_SEGUNDOS, faz a carga completa.
+        
+        Args:
+            perfil: Perfil de projeção (veja PERFIS_PROJECAO)
+            versao_dados: data_version() medida pelo chamador antes da busca
+        
+        Returns:
+            Lista de dicionários com as agendas (data_inicio decrescente)
+        
+        Raises:
+            Exception: Falha na carga completa
+        """
+        version = _snapshot.current_version()
+        entrada = _snapshot.entry(perfil)
+        if versao_dados is None:
+            versao_dados = self.data_version()
+        
+        if entrada is not None and entrada.updated_max is not None \
+                and time.monotonic() - entrada.full_at < SYNC_COMPLETO_SEGUNDOS:
+            try:
+                margem = timedelta(seconds=SYNC_MARGEM_SEGUNDOS)
+                alteradas = list(self.iter_agendas(
+                    perfil=perfil,
+                    atualizadas_desde=(entrada.updated_max - margem).isoformat()
+                ))
+                removidas = list(self.iter_removidas(
+                    None if entrada.removido_max is None else (entrada.removido_max - margem).isoformat()
+                ))
+                
+                rows = _aplicar_delta(entrada.rows, alteradas, [r["id"] for r in removidas])
+                nova = _EntradaSnapshot(
+                    rows,
+                    _maior(entrada.updated_max, _max_timestamp(r.get("updated_at") for r in alteradas)),
+                    _maior(entrada.removido_max, _max_timestamp(r.get("removido_em") for r in removidas)),
+                    entrada.full_at,
+                    versao_dados
+                )
+                _snapshot.store(perfil, nova, version)
+                return list(rows)
+            except Exception:
+                pass  # Sem tabela de remoções ou falha parcial: recarregar tudo
+        
+        rows = list(self.iter_agendas(perfil=perfil))
+        rows.reverse()
+        _snapshot.store(perfil, _entrada_completa(perfil, rows, versao_dados), version)
+        return list(rows)
+    
+    def iter_agendas(self, page_size: int = 1000, order: Tuple[str, ...] = ("data_inicio", "id"),
+                     perfil: str = "full", atualizadas_desde: Optional[str] = None) -> Iterator[Dict]:
+        """
+        Percorre todas as agendas em páginas, com cursor por chave (keyset)
+        
+        Cada página continua a partir da última linha lida, sem OFFSET, então o
+        custo por página é constante.
+        
+        Args:
+            page_size: Linhas por requisição
+            order: Colunas de ordenação crescente; a última deve ser única
+            perfil: Perfil de projeção (veja PERFIS_PROJECAO)
+            atualizadas_desde: Se informado, apenas agendas com updated_at >= este timestamp
+        
+        Yields:
+            Dicionários com as agendas, na ordem de order
+        """
+        projecao = _projecao_ordenada(perfil, order)
+        
+        def montar():
+            query = self.client.table(self.table_name).select(projecao)
+            if atualizadas_desde is not None:
+                query = query.gte("updated_at", atualizadas_desde)
+            return query
+        
+        return _paginar_keyset(montar, order, page_size, self.executar)
+    
+    def iter_removidas(self, desde: Optional[str] = None, page_size: int = 1000) -> Iterator[Dict]:
+        """
+        Percorre as lápides de agendas_removidas em páginas, por (removido_em, id)
+        
+        Args:
+            desde: Se informado, apenas remoções com removido_em >= este timestamp
+        """
+        def montar():
+            query = self.client.table("agendas_removidas").select("id, removido_em")
+            if desde is not None:
+                query = query.gte("removido_em", desde)
+            return query
+        
+        return _paginar_keyset(montar, ("removido_em", "id"), page_size, self.executar)
+    
+    def nomes_dimensao(self, tabela: str, page_size: int = 1000) -> List[str]:
+        """
+        Nomes de uma tabela de dimensão (setup_dimensoes.sql), em ordem alfabética
+        
+        Paginado por id, como as agendas, para não ser truncado pelo PostgREST.
+        
+        Raises:
+            APIError: Tabela inexistente (TABELA_INEXISTENTE) ou outra falha
+        """
+        linhas = _paginar_keyset(lambda: self.client.table(tabela).select("id, nome"),
+                                 ("id",), page_size, self.executar)
+        return sorted(r["nome"] for r in linhas if r.get("nome"))
+    
+    def listar_dimensao(self, tabela: str) -> List[str]:
+        """
+        Nomes de uma tabela de dimensão, em cache por DIMENSOES_TTL_SECONDS
+        
+        Sem a tabela no banco (setup_dimensoes.sql), usa os nomes distintos
+        da coluna correspondente nas agendas do snapshot.
+        
+        Raises:
+            Exception: Falha na leitura (exceto tabela inexistente)
+        """
+        chave = ("dimensao", tabela)
+        cached = _snapshot.get_agregado(chave, DIMENSOES_TTL_SECONDS)
+        if cached is not None:
+            return list(cached)
+        
+        version = _snapshot.current_version()
+        try:
+            nomes = self.nomes_dimensao(tabela)
+        except APIError as e:
+            if e.code not in TABELA_INEXISTENTE:
+                raise
+            coluna = DIMENSOES[tabela]
+            nomes = sorted({r[coluna] for r in self.get_all_agendas(PERFIL_AGREGADOS) if r.get(coluna)})
+        
+        _snapshot.store_agregado(chave, nomes, version)
+        return list(nomes)
+
 
 class Database:
     """Classe para gerenciar operações com Supabase"""
@@ -13,12 +846,14 @@ class Database:
         self.supabase_url = None
         self.supabase_key = None
         self.client = None
+        realtime = None
         
         try:
             # Tentar secrets do Streamlit primeiro
             if hasattr(st, 'secrets') and 'SUPABASE_URL' in st.secrets:
                 self.supabase_url = st.secrets["SUPABASE_URL"]
                 self.supabase_key = st.secrets.get("SUPABASE_KEY") or st.secrets.get("SUPABASE_ANON_KEY")
+                realtime = st.secrets.get("SUPABASE_REALTIME")
         except:
             pass
         
@@ -26,6 +861,11 @@ class Database:
         if not self.supabase_url:
             self.supabase_url = os.getenv("SUPABASE_URL")
             self.supabase_key = os.getenv("SUPABASE_KEY") or os.getenv("SUPABASE_ANON_KEY")
+        if realtime is None:
+            realtime = os.getenv("SUPABASE_REALTIME")
+        
+        # Tempo real é opcional (requer setup_realtime.sql); veja iniciar_tempo_real
+        self.realtime_habilitado = str(realtime).strip().lower() in ("1", "true", "sim")
         
         if not self.supabase_url or not self.supabase_key:
             print("⚠️ Credenciais do Supabase não configuradas.")
@@ -39,6 +879,34 @@ class Database:
         
         self.table_name = "agendas"
     
+    def iniciar_tempo_real(self, fonte=None) -> Optional[RealtimeListener]:
+        """
+        Passa a aplicar ao snapshot as mudanças feitas por outros usuários
+        
+        Args:
+            fonte: Fonte de eventos (padrão: SupabaseChangeSource desta tabela;
+                   ReplayChangeSource em testes)
+        
+        Returns:
+            Listener ativo ou None se a inscrição falhou (o app segue por TTL)
+        """
+        if fonte is None:
+            if not self.supabase_url or not self.supabase_key:
+                return None
+            fonte = SupabaseChangeSource(self.supabase_url, self.supabase_key, self.table_name)
+        
+        listener = RealtimeListener(fonte)
+        try:
+            listener.iniciar()
+        except Exception as e:
+            print(f"Erro ao iniciar tempo real: {str(e)}")
+            try:
+                fonte.parar()
+            except Exception:
+                pass
+            return None
+        return listener
+    
     def _ensure_connection(self) -> bool:
         """Verifica se há conexão com o banco"""
         if self.client is None:
@@ -47,10 +915,15 @@ class Database:
         return True
     
     def create_agenda(self, consultor: str, data_inicio: str, data_fim: str, 
-                     projeto: str, os: Optional[str] = None, gerente: Optional[str] = None) -> bool:
+                     projeto: str, os: Optional[str] = None, gerente: Optional[str] = None) -> Optional[Dict]:
         """
         Cria uma nova agenda
         
+        Usa a função criar_agenda (setup_conflitos.sql), que verifica conflitos
+        e insere na mesma transação, com as reservas do consultor serializadas.
+        Sem a função no banco, verifica e insere em duas requisições. A linha
+        gravada é aplicada ao snapshot, sem nova busca.
+        
         Args:
             consultor: Nome do consultor
             data_inicio: Data de início (YYYY-MM-DD)
@@ -60,15 +933,41 @@ class Database:
             gerente: Nome do gerente (opcional)
         
         Returns:
-            bool: True se sucesso, False caso contrário
+            Dict com a agenda gravada se sucesso, None caso contrário
         """
         if not self._ensure_connection():
-            return False
+            return None
         
         try:
             # Verificar se é uma agenda vaga
             is_vago = projeto.upper() == "VAGO" or projeto.upper() == "LIVRE"
             
+            try:
+                resultado = self.client.rpc("criar_agenda", {
+                    "p_consultor": consultor,
+                    "p_data_inicio": data_inicio,
+                    "p_data_fim": data_fim,
+                    "p_projeto": projeto,
+                    "p_os": os or None,
+                    "p_gerente": gerente or None
+                }).execute().data
+            except APIError as e:
+                if e.code != FUNCAO_INEXISTENTE:
+                    raise
+                resultado = None
+            
+            if resultado is not None:
+                conflito = "\n".join(_formatar_conflito(agenda) for agenda in resultado.get("conflitos") or [])
+                if resultado.get("agenda") is None:
+                    # Restrição de exclusão ativa: o conflito impediu a inserção
+                    st.error(f"❌ O consultor {consultor} já possui agendas no período:\n\n{conflito}")
+                    return None
+                
+                _snapshot.patch([resultado["agenda"]])
+                if conflito:
+                    st.warning(f"⚠️ Atenção: O consultor {consultor} já possui agendas no período:\n\n{conflito}")
+                return resultado["agenda"]
+            
             # Se não é VAGO, verificar conflito de agendas
             if not is_vago:
                 conflito = self._check_conflito(consultor, data_inicio, data_fim)
@@ -92,87 +991,464 @@ class Database:
             
             response = self.client.table(self.table_name).insert(data).execute()
             
-            if response.data:
-                return True
-            return False
+            if not response.data:
+                _snapshot.invalidate()
+                return None
+            
+            _snapshot.patch(response.data)
+            return response.data[0]
             
         except Exception as e:
             st.error(f"❌ Erro ao criar agenda: {str(e)}")
-            return False
+            return None
+    
+    def create_agendas_bulk(self, rows: List[Dict], chunk_size: int = 500) -> List[Dict]:
+        """
+        Cria várias agendas usando inserções em lote
+        
+        As linhas são validadas em memória, os conflitos de todo o lote são
+        verificados com uma única consulta e as inserções são enviadas em
+        blocos de até chunk_size linhas por requisição. Se um bloco é
+        recusado, suas linhas são reenviadas uma a uma, e só as que o banco
+        recusar ficam com erro.
+        
+        As inserções em lote não passam por criar_agenda (setup_conflitos.sql):
+        sem o bloqueio por consultor, o conflito com uma agenda criada ao mesmo
+        tempo por outra sessão pode não ser avisado. Com a restrição de
+        exclusão ativa, o banco recusa a linha conflitante mesmo assim.
+        
+        Args:
+            rows: Dicts com consultor, data_inicio, data_fim (YYYY-MM-DD), projeto,
+                  os e opcionalmente gerente
+            chunk_size: Quantidade máxima de linhas por requisição de inserção
+        
+        Returns:
+            Lista com um resultado por linha, na mesma ordem de rows:
+            {"ok": bool, "erro": str ou None, "conflito": str ou None, "agenda": dict ou None}
+        """
+        resultados = [{"ok": False, "erro": None, "conflito": None, "agenda": None} for _ in rows]
+        
+        if not self._ensure_connection():
+            for resultado in resultados:
+                resultado["erro"] = "Sem conexão com o banco de dados"
+            return resultados
+        
+        # 1. Validação em memória
+        validas = []  # (posição, payload)
+        agora = datetime.now().isoformat()
+        for pos, row in enumerate(rows):
+            consultor = _valor_texto(row.get("consultor"))
+            projeto = _valor_texto(row.get("projeto"))
+            data_inicio = _valor_texto(row.get("data_inicio"))
+            data_fim = _valor_texto(row.get("data_fim"))
+            os_num = _valor_texto(row.get("os"))
+            
+            if not consultor or not projeto or not data_inicio or not data_fim:
+                resultados[pos]["erro"] = "Consultor, projeto, data início e data fim são obrigatórios"
+                continue
+            if not os_num:
+                resultados[pos]["erro"] = "OS é obrigatória"
+                continue
+            try:
+                inicio_dt = datetime.strptime(data_inicio, "%Y-%m-%d").date()
+                fim_dt = datetime.strptime(data_fim, "%Y-%m-%d").date()
+            except ValueError:
+                resultados[pos]["erro"] = "Datas devem estar no formato YYYY-MM-DD"
+                continue
+            if fim_dt < inicio_dt:
+                resultados[pos]["erro"] = "Data fim deve ser posterior à data início"
+                continue
+            
+            data = {
+                "consultor": consultor,
+                "data_inicio": data_inicio,
+                "data_fim": data_fim,
+                "projeto": projeto,
+                "is_vago": projeto.upper() in ("VAGO", "LIVRE"),
+                "os": os_num,
+                # Inserção multi-linha exige as mesmas chaves em todas as linhas
+                "gerente": _valor_texto(row.get("gerente")),
+                "created_at": agora
+            }
+            validas.append((pos, data))
+        
+        if not validas:
+            return resultados
+        
+        # 2. Agendas do banco que podem conflitar com o lote
+        ocupadas = [d for _, d in validas if not d["is_vago"]]
+        existentes: Dict[str, List[Dict]] = {}
+        if ocupadas:
+            inicio_lote = min(d["data_inicio"] for d in ocupadas)
+            fim_lote = max(d["data_fim"] for d in ocupadas)
+            consultores_lote = sorted(set(d["consultor"] for d in ocupadas))
+            try:
+                # Paginado: lotes grandes passam do limite de linhas do PostgREST
+                for agenda in _paginar_keyset(
+                    lambda: self._filtro_sobreposicao(inicio_lote, fim_lote).in_("consultor", consultores_lote),
+                    ("data_inicio", "id")
+                ):
+                    existentes.setdefault(agenda["consultor"], []).append(agenda)
+            except Exception as e:
+                # Conflitos são apenas avisos; seguir com a importação
+                st.warning(f"⚠️ Não foi possível verificar conflitos com as agendas existentes: {str(e)}")
+        
+        # 3. Inserções em blocos (bloco recusado: uma linha por requisição)
+        inseridas = 0
+        for i in range(0, len(validas), max(1, chunk_size)):
+            bloco = validas[i:i + max(1, chunk_size)]
+            try:
+                self._inserir_bloco(bloco, resultados)
+            except Exception:
+                for linha in bloco:
+                    try:
+                        self._inserir_bloco([linha], resultados)
+                    except Exception as e:
+                        resultados[linha[0]]["erro"] = f"Erro ao inserir: {str(e)}"
+        
+        # 4. Conflitos das linhas gravadas (banco + linhas gravadas antes no próprio lote)
+        for pos, data in validas:
+            if not resultados[pos]["ok"]:
+                continue
+            inseridas += 1
+            if data["is_vago"]:
+                continue
+            agendas_consultor = existentes.setdefault(data["consultor"], [])
+            conflitos = [
+                _formatar_conflito(a) for a in agendas_consultor
+                if a["data_fim"] >= data["data_inicio"] and a["data_inicio"] <= data["data_fim"]
+            ]
+            if conflitos:
+                resultados[pos]["conflito"] = "\n".join(conflitos)
+            agendas_consultor.append(data)
+        
+        if inseridas:
+            _snapshot.invalidate()
+        
+        return resultados
+    
+    def _inserir_bloco(self, bloco: List[Tuple[int, Dict]], resultados: List[Dict]) -> None:
+        """Insere as linhas (posição, payload) em uma requisição e registra os resultados"""
+        response = self.client.table(self.table_name)\
+            .insert([data for _, data in bloco])\
+            .execute()
+        gravadas = response.data or []
+        for j, (pos, _) in enumerate(bloco):
+            if j < len(gravadas):
+                resultados[pos]["ok"] = True
+                resultados[pos]["agenda"] = gravadas[j]
+            else:
+                resultados[pos]["erro"] = "Inserção não confirmada pelo banco"
     
     def _check_conflito(self, consultor: str, data_inicio: str, data_fim: str) -> Optional[str]:
         """
         Verifica se há conflito de agendas para o consultor
         
+        Com snapshot válido, consulta o índice de intervalos em memória; senão a
+        sobreposição (data_fim >= inicio AND data_inicio <= fim AND NOT is_vago)
+        é filtrada no PostgREST, trazendo apenas as agendas conflitantes.
+        
         Returns:
             String com detalhes do conflito ou None
         """
         try:
-            # Buscar agendas que se sobrepõem
-            response = self.client.table(self.table_name)\
-                .select("*")\
-                .eq("consultor", consultor)\
-                .execute()
+            entrada = _snapshot.fresh_entry("conflict", SNAPSHOT_TTL_SECONDS)
+            if entrada is not None:
+                conflitos = entrada.get_indice().sobrepostas(
+                    consultor,
+                    datetime.strptime(data_inicio, "%Y-%m-%d").date(),
+                    datetime.strptime(data_fim, "%Y-%m-%d").date()
+                )
+            else:
+                conflitos = self._query_sobreposicao(data_inicio, data_fim)\
+                    .eq("consultor", consultor)\
+                    .execute().data
             
-            if not response.data:
+            if not conflitos:
                 return None
             
-            conflitos = []
-            data_inicio_dt = datetime.strptime(data_inicio, "%Y-%m-%d").date()
-            data_fim_dt = datetime.strptime(data_fim, "%Y-%m-%d").date()
-            
-            for agenda in response.data:
-                agenda_inicio = datetime.strptime(agenda['data_inicio'], "%Y-%m-%d").date()
-                agenda_fim = datetime.strptime(agenda['data_fim'], "%Y-%m-%d").date()
-                
-                # Verificar sobreposição
-                # Ignorar agendas VAGO ao verificar conflitos
-                if agenda.get('is_vago', False):
-                    continue
-                    
-                if not (data_fim_dt < agenda_inicio or data_inicio_dt > agenda_fim):
-                    os_info = f" (OS {agenda['os']})" if agenda.get('os') else ""
-                    conflitos.append(
-                        f"• {agenda['projeto']}{os_info}: "
-                        f"{agenda_inicio.strftime('%d/%m/%Y')} a {agenda_fim.strftime('%d/%m/%Y')}"
-                    )
-            
-            if conflitos:
-                return "\n".join(conflitos)
-            
-            return None
+            return "\n".join(_formatar_conflito(agenda) for agenda in conflitos)
             
         except Exception as e:
             return None
     
-    def get_all_agendas(self) -> List[Dict]:
+    def _query_sobreposicao(self, data_inicio: str, data_fim: str):
+        """Consulta de agendas ocupadas que se sobrepõem ao período, por data_inicio"""
+        return self._filtro_sobreposicao(data_inicio, data_fim).order("data_inicio")
+    
+    def _filtro_sobreposicao(self, data_inicio: str, data_fim: str):
+        """
+        Monta a consulta de agendas ocupadas que se sobrepõem ao período, sem ordem
+        
+        Agendas com is_vago nulo (anteriores à coluna) contam como ocupadas.
+        """
+        return self.client.table(self.table_name)\
+            .select(PERFIS_PROJECAO["conflict"])\
+            .gte("data_fim", data_inicio)\
+            .lte("data_inicio", data_fim)\
+            .not_.is_("is_vago", "true")
+    
+    def get_all_agendas(self, perfil: str = "full") -> List[Dict]:
         """
         Retorna todas as agendas
         
+        Usa o snapshot compartilhado entre as sessões enquanto ele estiver
+        dentro do TTL; escritas feitas por este processo são aplicadas a ele.
+        Sessões que encontram o snapshot expirado ao mesmo tempo compartilham
+        uma única busca; se data_version() não mudou, o snapshot expirado é
+        renovado sem trazer as linhas de novo. A busca é paginada (iter_agendas), então o limite de
+        linhas do PostgREST não trunca o resultado.
+        
+        Args:
+            perfil: Perfil de projeção (veja PERFIS_PROJECAO)
+        
         Returns:
-            Lista de dicionários com as agendas
+            Lista de dicionários com as agendas (data_inicio decrescente)
         """
         if not self._ensure_connection():
             return []
         
         try:
-            response = self.client.table(self.table_name)\
-                .select("*")\
-                .order("data_inicio", desc=True)\
-                .execute()
-            
-            return response.data if response.data else []
-            
+            return self._leitor().get_all_agendas(perfil)
         except Exception as e:
             st.error(f"❌ Erro ao buscar agendas: {str(e)}")
             return []
     
-    def get_agendas_by_consultor(self, consultor: str) -> List[Dict]:
+    def _leitor(self) -> "_LeitorAgendas":
+        """Leitor das agendas sobre o cliente síncrono"""
+        return _LeitorAgendas(self.client, self.table_name, _executar)
+    
+    def data_version(self) -> Optional[Tuple[int, Optional[str]]]:
+        """
+        Versão dos dados da tabela: (quantidade de agendas, maior updated_at)
+        
+        Returns:
+            Tupla (count, max updated_at) ou None se não foi possível medir
+        """
+        if not self._ensure_connection():
+            return None
+        return self._leitor().data_version()
+    
+    def sync(self, perfil: str = "full", versao_dados: Optional[Tuple[int, Optional[str]]] = None) -> List[Dict]:
+        """
+        Atualiza o snapshot do perfil buscando apenas o que mudou (veja _LeitorAgendas.sync)
+        
+        Args:
+            perfil: Perfil de projeção (veja PERFIS_PROJECAO)
+            versao_dados: data_version() medida pelo chamador antes da busca
+        
+        Returns:
+            Lista de dicionários com as agendas (data_inicio decrescente)
+        """
+        if not self._ensure_connection():
+            return []
+        
+        try:
+            return self._leitor().sync(perfil, versao_dados)
+        except Exception as e:
+            st.error(f"❌ Erro ao buscar agendas: {str(e)}")
+            return []
+    
+    def iter_agendas(self, page_size: int = 1000, order: Tuple[str, ...] = ("data_inicio", "id"),
+                     perfil: str = "full", atualizadas_desde: Optional[str] = None) -> Iterator[Dict]:
+        """
+        Percorre todas as agendas em páginas, com cursor por chave (veja _LeitorAgendas.iter_agendas)
+        
+        Erros de rede são propagados para que uma leitura parcial não seja
+        confundida com uma completa.
+        """
+        if self.client is None:
+            return iter(())
+        return self._leitor().iter_agendas(page_size, order, perfil, atualizadas_desde)
+    
+    def get_all_registros(self, perfil: str = "timeline") -> List[Agenda]:
+        """
+        Retorna todas as agendas como registros Agenda (veja agenda_model)
+        
+        Os registros são criados uma vez por snapshot e compartilhados entre
+        as sessões: datas já convertidas e is_vago normalizado.
+        
+        Args:
+            perfil: Perfil de projeção (veja PERFIS_PROJECAO)
+        
+        Returns:
+            Lista de registros (data_inicio decrescente)
+        """
+        rows = self.get_all_agendas(perfil)
+        entrada = _snapshot.fresh_entry(perfil, SNAPSHOT_TTL_SECONDS)
+        if entrada is None:
+            return como_registros(rows)
+        return list(entrada.get_registros())
+    
+    def get_agenda_index(self, perfil: str = "timeline") -> AgendaIndex:
+        """
+        Retorna o índice de intervalos das agendas (veja agenda_index.AgendaIndex)
+        
+        O índice é construído uma vez por snapshot e compartilhado entre as sessões.
+        
+        Args:
+            perfil: Perfil de projeção das agendas indexadas
+        """
+        rows = self.get_all_agendas(perfil)
+        entrada = _snapshot.fresh_entry(perfil, SNAPSHOT_TTL_SECONDS)
+        if entrada is None:
+            return AgendaIndex(rows)
+        return entrada.get_indice()
+    
+    def get_agenda_columns(self, perfil: str = "dashboard") -> AgendaColumns:
+        """
+        Retorna as agendas em colunas NumPy (veja agenda_columns.AgendaColumns)
+        
+        As colunas são construídas uma vez por snapshot e compartilhadas entre as sessões.
+        
+        Args:
+            perfil: Perfil de projeção das agendas
+        """
+        rows = self.get_all_agendas(perfil)
+        entrada = _snapshot.fresh_entry(perfil, SNAPSHOT_TTL_SECONDS)
+        if entrada is None:
+            return AgendaColumns(como_registros(rows))
+        return entrada.get_colunas()
+    
+    def get_kpis(self, hoje: Optional[date] = None) -> Dict[str, int]:
+        """
+        Retorna os indicadores das agendas sem baixar a tabela
+        
+        Com um snapshot válido, calcula localmente (colunas NumPy); senão
+        chama a função agendas_kpis (setup_kpis.sql), que devolve uma linha.
+        Só quando a função não existe no banco o snapshot é carregado para o
+        cálculo local; outras falhas exibem o erro e devolvem zeros.
+        
+        Args:
+            hoje: Data de referência (padrão: hoje)
+        
+        Returns:
+            Dict com total, ativas, proximas, concluidas, consultores,
+            consultores_ativos, projetos e os
+        """
+        hoje = hoje or datetime.now().date()
+        
+        entrada = _snapshot.fresh_entry(PERFIL_AGREGADOS, SNAPSHOT_TTL_SECONDS)
+        if entrada is not None:
+            return entrada.get_colunas().kpis(hoje)
+        
+        chave = ("kpis", hoje.isoformat())
+        cached = _snapshot.get_agregado(chave, SNAPSHOT_TTL_SECONDS)
+        if cached is not None:
+            return dict(cached)
+        
+        if not self._ensure_connection():
+            return dict.fromkeys(KPIS, 0)
+        
+        version = _snapshot.current_version()
+        try:
+            linha = self.client.rpc("agendas_kpis", {"hoje": hoje.isoformat()}).execute().data[0]
+            kpis = {k: int(linha.get(k) or 0) for k in KPIS}
+        except Exception as e:
+            if isinstance(e, APIError) and e.code == FUNCAO_INEXISTENTE:
+                # Função ainda não criada: calcular a partir do snapshot
+                return self.get_agenda_columns(PERFIL_AGREGADOS).kpis(hoje)
+            # Falha transitória: não baixar a tabela inteira por causa dela
+            st.error(f"❌ Erro ao calcular indicadores: {str(e)}")
+            return dict.fromkeys(KPIS, 0)
+        
+        _snapshot.store_agregado(chave, kpis, version)
+        return dict(kpis)
+    
+    def get_top_projects(self, n: int = 10) -> List[Dict]:
+        """
+        Retorna os projetos com mais agendas
+        
+        Mesma estratégia de get_kpis, com a função agendas_top_projetos
+        (setup_dimensoes.sql).
+        
+        Args:
+            n: Quantidade de projetos
+        
+        Returns:
+            Lista de dicts com 'projeto' e 'agendas', em ordem decrescente
+        """
+        entrada = _snapshot.fresh_entry(PERFIL_AGREGADOS, SNAPSHOT_TTL_SECONDS)
+        if entrada is not None:
+            return entrada.get_colunas().top_projetos(n)
+        
+        chave = ("top_projetos", n)
+        cached = _snapshot.get_agregado(chave, SNAPSHOT_TTL_SECONDS)
+        if cached is not None:
+            return list(cached)
+        
+        if not self._ensure_connection():
+            return []
+        
+        version = _snapshot.current_version()
+        try:
+            data = self.client.rpc("agendas_top_projetos", {"n": n}).execute().data or []
+            top = [{'projeto': r['projeto'], 'agendas': int(r['agendas'])} for r in data]
+        except Exception as e:
+            if isinstance(e, APIError) and e.code == FUNCAO_INEXISTENTE:
+                return self.get_agenda_columns(PERFIL_AGREGADOS).top_projetos(n)
+            st.error(f"❌ Erro ao buscar projetos: {str(e)}")
+            return []
+        
+        _snapshot.store_agregado(chave, top, version)
+        return list(top)
+    
+    def _listar_dimensao(self, tabela: str) -> List[str]:
+        """Nomes de uma tabela de dimensão, em ordem alfabética (veja _LeitorAgendas.listar_dimensao)"""
+        if not self._ensure_connection():
+            return []
+        
+        try:
+            return self._leitor().listar_dimensao(tabela)
+        except Exception as e:
+            st.error(f"❌ Erro ao buscar {tabela}: {str(e)}")
+            return []
+    
+    def list_consultores(self) -> List[str]:
+        """Consultores cadastrados (tabela consultores), em ordem alfabética"""
+        return self._listar_dimensao("consultores")
+    
+    def list_projetos(self) -> List[str]:
+        """Projetos cadastrados (tabela projetos), em ordem alfabética"""
+        return self._listar_dimensao("projetos")
+    
+    def list_gerentes(self) -> List[str]:
+        """Gerentes cadastrados (tabela gerentes), em ordem alfabética"""
+        return self._listar_dimensao("gerentes")
+    
+    def invalidate_cache(self) -> None:
+        """Descarta o snapshot compartilhado, forçando nova busca na próxima leitura"""
+        _snapshot.invalidate()
+    
+    def _buscar_texto(self, montar, coluna: str, valor: str) -> List[Dict]:
+        """
+        Executa uma busca parcial por texto, sem diferenciar acentos
+        
+        Filtra a coluna {coluna}_busca (setup_busca.sql, índice de trigramas)
+        com o texto normalizado; sem a coluna no banco, usa ILIKE na coluna
+        original.
+        
+        Args:
+            montar: Função (coluna, padrão ILIKE) -> consulta PostgREST
+            coluna: Coluna original (consultor ou projeto)
+            valor: Texto buscado
+        """
+        try:
+            return montar(f"{coluna}_busca", f"%{normalizar_texto(valor)}%").execute().data or []
+        except APIError as e:
+            if e.code != COLUNA_INEXISTENTE:
+                raise
+            return montar(coluna, f"%{valor}%").execute().data or []
+    
+    def get_agendas_by_consultor(self, consultor: str, perfil: str = "full") -> List[Dict]:
         """
         Retorna agendas de um consultor específico
         
+        A busca é parcial e não diferencia maiúsculas nem acentos.
+        
         Args:
             consultor: Nome do consultor
+            perfil: Perfil de projeção (veja PERFIS_PROJECAO)
         
         Returns:
             Lista de dicionários com as agendas
@@ -181,24 +1457,27 @@ class Database:
             return []
         
         try:
-            response = self.client.table(self.table_name)\
-                .select("*")\
-                .ilike("consultor", f"%{consultor}%")\
-                .order("data_inicio", desc=True)\
-                .execute()
-            
-            return response.data if response.data else []
+            return self._buscar_texto(
+                lambda coluna, padrao: self.client.table(self.table_name)
+                    .select(PERFIS_PROJECAO[perfil])
+                    .ilike(coluna, padrao)
+                    .order("data_inicio", desc=True),
+                "consultor", consultor
+            )
             
         except Exception as e:
             st.error(f"❌ Erro ao buscar agendas: {str(e)}")
             return []
     
-    def get_agendas_by_projeto(self, projeto: str) -> List[Dict]:
+    def get_agendas_by_projeto(self, projeto: str, perfil: str = "full") -> List[Dict]:
         """
         Retorna agendas de um projeto específico
         
+        A busca é parcial e não diferencia maiúsculas nem acentos.
+        
         Args:
             projeto: Nome do projeto
+            perfil: Perfil de projeção (veja PERFIS_PROJECAO)
         
         Returns:
             Lista de dicionários com as agendas
@@ -207,25 +1486,27 @@ class Database:
             return []
         
         try:
-            response = self.client.table(self.table_name)\
-                .select("*")\
-                .ilike("projeto", f"%{projeto}%")\
-                .order("data_inicio", desc=True)\
-                .execute()
-            
-            return response.data if response.data else []
+            return self._buscar_texto(
+                lambda coluna, padrao: self.client.table(self.table_name)
+                    .select(PERFIS_PROJECAO[perfil])
+                    .ilike(coluna, padrao)
+                    .order("data_inicio", desc=True),
+                "projeto", projeto
+            )
             
         except Exception as e:
             st.error(f"❌ Erro ao buscar agendas: {str(e)}")
             return []
     
-    def get_agendas_by_date_range(self, data_inicio: str, data_fim: str) -> List[Dict]:
+    def get_agendas_by_date_range(self, data_inicio: str, data_fim: str,
+                                  perfil: str = "full") -> List[Dict]:
         """
         Retorna agendas em um período específico
         
         Args:
             data_inicio: Data de início (YYYY-MM-DD)
             data_fim: Data de fim (YYYY-MM-DD)
+            perfil: Perfil de projeção (veja PERFIS_PROJECAO)
         
         Returns:
             Lista de dicionários com as agendas
@@ -233,15 +1514,17 @@ class Database:
         if not self._ensure_connection():
             return []
         
-        try:
-            response = self.client.table(self.table_name)\
-                .select("*")\
+        def buscar() -> List[Dict]:
+            return self.client.table(self.table_name)\
+                .select(PERFIS_PROJECAO[perfil])\
                 .gte("data_fim", data_inicio)\
                 .lte("data_inicio", data_fim)\
                 .order("data_inicio", desc=True)\
-                .execute()
-            
-            return response.data if response.data else []
+                .execute().data or []
+        
+        try:
+            # Períodos iguais pedidos ao mesmo tempo compartilham uma requisição
+            return list(_voos.do(("get_agendas_by_date_range", data_inicio, data_fim, perfil), buscar))
             
         except Exception as e:
             st.error(f"❌ Erro ao buscar agendas: {str(e)}")
@@ -263,36 +1546,28 @@ class Database:
             return {"disponivel": False, "agendas": [], "mensagem": "Erro de conexão"}
         
         try:
-            response = self.client.table(self.table_name)\
-                .select("*")\
-                .ilike("consultor", f"%{consultor}%")\
-                .execute()
-            
-            if not response.data:
-                return {
-                    "disponivel": True,
-                    "agendas": [],
-                    "mensagem": f"✅ {consultor} está livre no período solicitado."
-                }
-            
-            conflitos = []
-            data_inicio_dt = datetime.strptime(data_inicio, "%Y-%m-%d").date()
-            data_fim_dt = datetime.strptime(data_fim, "%Y-%m-%d").date()
-            
-            for agenda in response.data:
-                agenda_inicio = datetime.strptime(agenda['data_inicio'], "%Y-%m-%d").date()
-                agenda_fim = datetime.strptime(agenda['data_fim'], "%Y-%m-%d").date()
-                
-                # Verificar sobreposição
-                if not (data_fim_dt < agenda_inicio or data_inicio_dt > agenda_fim):
-                    conflitos.append(agenda)
+            entrada = _snapshot.fresh_entry("conflict", SNAPSHOT_TTL_SECONDS)
+            if entrada is not None:
+                indice = entrada.get_indice()
+                inicio_dt = datetime.strptime(data_inicio, "%Y-%m-%d").date()
+                fim_dt = datetime.strptime(data_fim, "%Y-%m-%d").date()
+                conflitos = sorted(
+                    (a for nome in indice.buscar_consultores(consultor)
+                     for a in indice.sobrepostas(nome, inicio_dt, fim_dt)),
+                    key=lambda a: a['data_inicio']
+                )
+            else:
+                conflitos = self._buscar_texto(
+                    lambda coluna, padrao: self._query_sobreposicao(data_inicio, data_fim).ilike(coluna, padrao),
+                    "consultor", consultor
+                )
             
             if conflitos:
                 mensagem = f"❌ {consultor} está ocupado(a) no período. Agendas conflitantes:\n\n"
                 for c in conflitos:
                     inicio = datetime.strptime(c['data_inicio'], "%Y-%m-%d").strftime("%d/%m/%Y")
                     fim = datetime.strptime(c['data_fim'], "%Y-%m-%d").strftime("%d/%m/%Y")
-                    mensagem += f"• {c['projeto']} (OS {c['os']}): {inicio} a {fim}\n"
+                    mensagem += f"• {c['projeto']} (OS {c.get('os') or '-'}): {inicio} a {fim}\n"
                 
                 return {
                     "disponivel": False,
@@ -313,31 +1588,71 @@ class Database:
                 "mensagem": f"❌ Erro ao verificar disponibilidade: {str(e)}"
             }
     
-    def update_agenda(self, agenda_id: int, **kwargs) -> bool:
+    def update_agenda(self, agenda_id: int, expected_updated_at: Optional[str] = None,
+                      **kwargs) -> Optional[Dict]:
         """
         Atualiza uma agenda existente
         
+        A linha gravada é aplicada ao snapshot, sem nova busca.
+        
         Args:
             agenda_id: ID da agenda
+            expected_updated_at: updated_at da versão lida; se informado, só
+                                 atualiza se a agenda não mudou desde então
             **kwargs: Campos a atualizar
         
         Returns:
-            bool: True se sucesso, False caso contrário
+            Dict com a agenda gravada se sucesso, None caso contrário
+        
+        Raises:
+            ConflitoDeVersao: A agenda foi alterada depois de expected_updated_at
         """
         if not self._ensure_connection():
-            return False
+            return None
         
         try:
-            response = self.client.table(self.table_name)\
-                .update(kwargs)\
-                .eq("id", agenda_id)\
-                .execute()
-            
-            return bool(response.data)
+            return self._atualizar(agenda_id, kwargs, expected_updated_at)
             
+        except ConflitoDeVersao:
+            raise
         except Exception as e:
             st.error(f"❌ Erro ao atualizar agenda: {str(e)}")
-            return False
+            return None
+    
+    def _atualizar(self, agenda_id: int, data: Dict, expected_updated_at: Optional[str]) -> Optional[Dict]:
+        """
+        UPDATE condicional em uma requisição (filtro por id e, se informado, updated_at)
+        
+        Sem linha atualizada, busca a linha atual para distinguir agenda
+        removida (None) de conflito de versão (ConflitoDeVersao).
+        """
+        query = self.client.table(self.table_name)\
+            .update(data)\
+            .eq("id", agenda_id)
+        if expected_updated_at is not None:
+            query = query.eq("updated_at", expected_updated_at)
+        
+        response = query.execute()
+        if response.data:
+            _snapshot.patch(response.data)
+            if set(data) & set(DIMENSOES.values()):
+                # A linha anterior pode não estar no snapshot (patch não vê a troca)
+                _snapshot.invalidate_dimensoes()
+            return response.data[0]
+        
+        if expected_updated_at is None:
+            return None
+        
+        atual = self.client.table(self.table_name)\
+            .select("*")\
+            .eq("id", agenda_id)\
+            .execute().data
+        if not atual:
+            _snapshot.patch(removidas=[agenda_id])
+            return None
+        
+        _snapshot.patch(atual)
+        raise ConflitoDeVersao(atual[0])
     
     def delete_agenda(self, agenda_id: int) -> bool:
         """
@@ -357,6 +1672,7 @@ class Database:
                 .delete()\
                 .eq("id", agenda_id)\
                 .execute()
+            _snapshot.patch(removidas=[agenda_id])
             
             return True
             
@@ -364,6 +1680,73 @@ class Database:
             st.error(f"❌ Erro ao deletar agenda: {str(e)}")
             return False
     
+    def delete_where(self, data_fim_antes: Optional[str] = None,
+                     is_vago: Optional[bool] = None) -> int:
+        """
+        Deleta, em uma única requisição, as agendas que atendem ao predicado
+        
+        Args:
+            data_fim_antes: Remove agendas com data_fim anterior a esta data (YYYY-MM-DD)
+            is_vago: Remove apenas agendas com este valor de is_vago
+        
+        Returns:
+            int: Quantidade de agendas removidas
+        """
+        if not self._ensure_connection():
+            return 0
+        
+        if data_fim_antes is None and is_vago is None:
+            # Nunca apagar a tabela inteira por engano
+            st.error("❌ Informe ao menos um filtro para remover agendas")
+            return 0
+        
+        try:
+            # Só a contagem volta na resposta, não as linhas removidas
+            query = self.client.table(self.table_name).delete(count="exact", returning="minimal")
+            if data_fim_antes is not None:
+                query = query.lt("data_fim", data_fim_antes)
+            if is_vago is not None:
+                query = query.eq("is_vago", is_vago)
+            
+            response = query.execute()
+            _snapshot.invalidate()
+            
+            return response.count or 0
+            
+        except Exception as e:
+            st.error(f"❌ Erro ao deletar agendas: {str(e)}")
+            return 0
+    
+    def delete_many(self, ids: List[int], chunk_size: int = 200) -> int:
+        """
+        Deleta várias agendas por id, uma requisição por bloco de ids
+        
+        Args:
+            ids: IDs das agendas
+            chunk_size: Quantidade máxima de ids por requisição
+        
+        Returns:
+            int: Quantidade de agendas removidas
+        """
+        if not self._ensure_connection() or not ids:
+            return 0
+        
+        removidas = 0
+        try:
+            for i in range(0, len(ids), max(1, chunk_size)):
+                bloco = list(ids[i:i + max(1, chunk_size)])
+                response = self.client.table(self.table_name)\
+                    .delete(count="exact", returning="minimal")\
+                    .in_("id", bloco)\
+                    .execute()
+                removidas += response.count or 0
+        except Exception as e:
+            st.error(f"❌ Erro ao deletar agendas: {str(e)}")
+        finally:
+            _snapshot.invalidate()
+        
+        return removidas
+    
     def get_consultores_livres(self, data_inicio: str, data_fim: str, 
                                todos_consultores: List[str]) -> List[str]:
         """
@@ -381,7 +1764,7 @@ class Database:
             return []
         
         try:
-            agendas = self.get_agendas_by_date_range(data_inicio, data_fim)
+            agendas = self.get_agendas_by_date_range(data_inicio, data_fim, perfil="periodo")
             consultores_ocupados = set([a['consultor'] for a in agendas])
             consultores_livres = [c for c in todos_consultores if c not in consultores_ocupados]
             
@@ -391,20 +1774,28 @@ class Database:
             return []
     
     def atualizar_detalhes_agenda(self, agenda_id: int, horas_cliente: Optional[float] = None, 
-                                  descricao_entrega: Optional[str] = None) -> bool:
+                                  descricao_entrega: Optional[str] = None,
+                                  expected_updated_at: Optional[str] = None) -> Optional[Dict]:
         """
         Atualiza os detalhes de horas e descrição de uma agenda
         
+        A linha gravada é aplicada ao snapshot, sem nova busca.
+        
         Args:
             agenda_id: ID da agenda
             horas_cliente: Horas trabalhadas no cliente
             descricao_entrega: Descrição da entrega realizada
+            expected_updated_at: updated_at da versão lida (veja update_agenda)
         
         Returns:
-            bool: True se sucesso, False caso contrário
+            Dict com a agenda gravada se sucesso (só o id quando não há o que
+            atualizar), None caso contrário
+        
+        Raises:
+            ConflitoDeVersao: A agenda foi alterada depois de expected_updated_at
         """
         if not self._ensure_connection():
-            return False
+            return None
         
         try:
             data = {}
@@ -416,15 +1807,12 @@ class Database:
                 data["descricao_entrega"] = descricao_entrega
             
             if not data:
-                return True  # Nada para atualizar
+                return {"id": agenda_id}  # Nada para atualizar
             
-            response = self.client.table(self.table_name)\
-                .update(data)\
-                .eq("id", agenda_id)\
-                .execute()
-            
-            return bool(response.data)
+            return self._atualizar(agenda_id, data, expected_updated_at)
             
+        except ConflitoDeVersao:
+            raise
         except Exception as e:
             st.error(f"❌ Erro ao atualizar detalhes: {str(e)}")
-            return False
+            return None
@@ -0,0 +1,285 @@
+"""
+Gazetteer de consultores: reconhece nomes do cadastro nas mensagens
+
+Os apelidos (nome completo, primeiro nome e primeiro + último nome, sem
+acentos e em minúsculas) são compilados em um autômato Aho-Corasick. Uma
+única passada pela mensagem encontra todas as ocorrências, qualquer que
+seja o tamanho do cadastro. Nomes com erro de digitação ("Sirlen", "cruz
+azl") são resolvidos por distância de edição em uma BK-tree (NomesAproximados).
+"""
+from collections import deque
+from functools import lru_cache
+from typing import Dict, Iterable, List, NamedTuple, Optional, Tuple
+from agenda_busca import tokens
+from agenda_model import normalizar_texto
+
+# Apelidos mais curtos que isto (ex.: "Li") geram falsos positivos
+TAMANHO_MINIMO_APELIDO = 3
+
+# Cadastros distintos mantidos em gazetteer_para e projetos_para
+GAZETTEER_CACHE_SIZE = 8
+
+
+class Ocorrencia(NamedTuple):
+    """Apelido encontrado na mensagem"""
+    inicio: int
+    fim: int
+    trecho: str
+    nomes: Tuple[str, ...]
+
+
+def _dobrar(texto: str) -> Tuple[str, List[int]]:
+    """
+    Texto sem acentos, em minúsculas e com espaços simples, e a posição no
+    texto original de cada caractere resultante
+    """
+    saida: List[str] = []
+    posicoes: List[int] = []
+    for i, caractere in enumerate(texto):
+        if caractere.isspace():
+            if saida and saida[-1] != " ":
+                saida.append(" ")
+                posicoes.append(i)
+            continue
+        for dobrado in normalizar_texto(caractere):
+            saida.append(dobrado)
+            posicoes.append(i)
+    return "".join(saida), posicoes
+
+
+def _apelidos(nome: str) -> List[str]:
+    """Formas pelas quais um consultor costuma ser citado"""
+    partes = tokens(normalizar_texto(nome))
+    if not partes:
+        return []
+    apelidos = [" ".join(partes), partes[0]]
+    if len(partes) > 2:
+        apelidos.append(f"{partes[0]} {partes[-1]}")
+    return [a for a in dict.fromkeys(apelidos) if len(a) >= TAMANHO_MINIMO_APELIDO]
+
+
+class Gazetteer:
+    """
+    Autômato Aho-Corasick sobre os apelidos dos consultores
+
+    Nomes que diferem só por acentos ou maiúsculas contam como um único
+    consultor (vale o primeiro informado). Um apelido compartilhado (dois
+    "André") fica associado a todos os consultores que o usam.
+    """
+
+    def __init__(self, nomes: Iterable[str]):
+        canonicos: Dict[str, str] = {}
+        for nome in nomes:
+            if nome:
+                canonicos.setdefault(normalizar_texto(nome), nome)
+
+        self.nomes = sorted(canonicos.values())
+        apelidos: Dict[str, List[str]] = {}
+        for nome in self.nomes:
+            for apelido in _apelidos(nome):
+                apelidos.setdefault(apelido, []).append(nome)
+
+        self.apelidos = list(apelidos)
+        self._nomes_apelido = [tuple(apelidos[a]) for a in self.apelidos]
+        self._aproximados: Optional[NomesAproximados] = None
+
+        # Trie (transições por estado), links de falha e saídas (apelidos)
+        self._transicoes: List[Dict[str, int]] = [{}]
+        self._falha: List[int] = [0]
+        self._saidas: List[List[int]] = [[]]
+        for indice, apelido in enumerate(self.apelidos):
+            estado = 0
+            for caractere in apelido:
+                proximo = self._transicoes[estado].get(caractere)
+                if proximo is None:
+                    proximo = len(self._transicoes)
+                    self._transicoes[estado][caractere] = proximo
+                    self._transicoes.append({})
+                    self._falha.append(0)
+                    self._saidas.append([])
+                estado = proximo
+            self._saidas[estado].append(indice)
+
+        fila = deque(self._transicoes[0].values())
+        while fila:
+            estado = fila.popleft()
+            for caractere, proximo in self._transicoes[estado].items():
+                fila.append(proximo)
+                falha = self._falha[estado]
+                while falha and caractere not in self._transicoes[falha]:
+                    falha = self._falha[falha]
+                self._falha[proximo] = self._transicoes[falha].get(caractere, 0)
+                self._saidas[proximo] = self._saidas[proximo] + self._saidas[self._falha[proximo]]
+
+    def __len__(self) -> int:
+        return len(self.nomes)
+
+    def encontrar(self, texto: str) -> List[Ocorrencia]:
+        """Todas as ocorrências de apelidos como palavras inteiras, em ordem de posição"""
+        dobrado, posicoes = _dobrar(texto)
+        ocorrencias = []
+        estado = 0
+        for fim, caractere in enumerate(dobrado):
+            while estado and caractere not in self._transicoes[estado]:
+                estado = self._falha[estado]
+            estado = self._transicoes[estado].get(caractere, 0)
+            for indice in self._saidas[estado]:
+                inicio = fim - len(self.apelidos[indice]) + 1
+                # Só palavras inteiras ("Ana" não casa com "Banana")
+                if inicio > 0 and dobrado[inicio - 1].isalnum():
+                    continue
+                if fim + 1 < len(dobrado) and dobrado[fim + 1].isalnum():
+                    continue
+                a, b = posicoes[inicio], posicoes[fim] + 1
+                ocorrencias.append(Ocorrencia(a, b, texto[a:b], self._nomes_apelido[indice]))
+        ocorrencias.sort(key=lambda o: (o.inicio, -(o.fim - o.inicio)))
+        return ocorrencias
+
+    def melhor(self, texto: str) -> Optional[Ocorrencia]:
+        """Ocorrência mais longa (a primeira, em caso de empate)"""
+        ocorrencias = self.encontrar(texto)
+        if not ocorrencias:
+            return None
+        return max(ocorrencias, key=lambda o: (o.fim - o.inicio, -o.inicio))
+
+    def consultor(self, texto: str) -> Optional[str]:
+        """
+        Consultor citado na mensagem
+
+        Returns:
+            Nome do cadastro; se o apelido é de mais de um consultor, o trecho
+            como escrito (as telas buscam todos os nomes que o contêm)
+        """
+        ocorrencia = self.melhor(texto)
+        if ocorrencia is None:
+            return None
+        return ocorrencia.nomes[0] if len(ocorrencia.nomes) == 1 else ocorrencia.trecho
+
+    def resolver_aproximado(self, nome: str) -> Optional[str]:
+        """Consultor do cadastro mais próximo de um nome digitado com erro (ou None)"""
+        if self._aproximados is None:
+            self._aproximados = NomesAproximados(dict(zip(self.apelidos, self._nomes_apelido)))
+        return self._aproximados.resolver(nome)
+
+
+def distancia(a: str, b: str) -> int:
+    """
+    Distância de Levenshtein (inserções, remoções e trocas)
+
+    É uma métrica (vale a desigualdade triangular), requisito da BK-tree.
+    """
+    if len(a) < len(b):
+        a, b = b, a
+    anterior = list(range(len(b) + 1))
+    for i, x in enumerate(a, 1):
+        atual = [i]
+        for j, y in enumerate(b, 1):
+            atual.append(min(anterior[j] + 1, atual[j - 1] + 1, anterior[j - 1] + (x != y)))
+        anterior = atual
+    return anterior[-1]
+
+
+def tolerancia(termo: str) -> int:
+    """
+    Erros aceitos para o tamanho do termo: nenhum abaixo de
+    TAMANHO_MINIMO_APELIDO, um até 6 caracteres ("Ana", "Miguel") e dois acima
+    """
+    if len(termo) < TAMANHO_MINIMO_APELIDO:
+        return 0
+    return 1 if len(termo) <= 6 else 2
+
+
+class BKTree:
+    """
+    Árvore BK sobre a distância de edição
+
+    Cada filho fica sob a distância até o pai; pela desigualdade triangular,
+    a busca com tolerância t só desce nos filhos com distância em [d - t, d + t].
+    """
+
+    def __init__(self, termos: Iterable[str]):
+        # Nó: (termo, {distância: nó filho})
+        self._raiz: Optional[Tuple[str, Dict[int, tuple]]] = None
+        for termo in termos:
+            self.adicionar(termo)
+
+    def adicionar(self, termo: str) -> None:
+        if self._raiz is None:
+            self._raiz = (termo, {})
+            return
+        no = self._raiz
+        while True:
+            d = distancia(termo, no[0])
+            if d == 0:
+                return
+            filho = no[1].get(d)
+            if filho is None:
+                no[1][d] = (termo, {})
+                return
+            no = filho
+
+    def buscar(self, termo: str, maximo: int) -> List[Tuple[int, str]]:
+        """Termos a até `maximo` edições, como (distância, termo), do mais próximo ao mais distante"""
+        if self._raiz is None:
+            return []
+        achados = []
+        pilha = [self._raiz]
+        while pilha:
+            valor, filhos = pilha.pop()
+            d = distancia(termo, valor)
+            if d <= maximo:
+                achados.append((d, valor))
+            for distancia_filho, filho in filhos.items():
+                if d - maximo <= distancia_filho <= d + maximo:
+                    pilha.append(filho)
+        return sorted(achados)
+
+
+class NomesAproximados:
+    """Resolve nomes digitados com erro para os nomes cadastrados"""
+
+    def __init__(self, apelidos: Dict[str, Tuple[str, ...]]):
+        """
+        Args:
+            apelidos: Forma normalizada (sem acentos, minúsculas) -> nomes que ela representa
+        """
+        self._apelidos = apelidos
+        self._arvore = BKTree(apelidos)
+
+    def resolver(self, nome: str) -> Optional[str]:
+        """
+        Nome cadastrado mais próximo do texto, se houver um único candidato
+        na menor distância encontrada (dentro da tolerância)
+        """
+        termo = " ".join(tokens(normalizar_texto(nome)))
+        achados = self._arvore.buscar(termo, tolerancia(termo))
+        if not achados:
+            return None
+        menor = achados[0][0]
+        nomes = {n for d, apelido in achados if d == menor for n in self._apelidos[apelido]}
+        return nomes.pop() if len(nomes) == 1 else None
+
+
+@lru_cache(maxsize=GAZETTEER_CACHE_SIZE)
+def _gazetteer(nomes: Tuple[str, ...]) -> Gazetteer:
+    return Gazetteer(nomes)
+
+
+def gazetteer_para(nomes: Iterable[str]) -> Gazetteer:
+    """Gazetteer do cadastro (o mesmo objeto enquanto os nomes não mudam)"""
+    return _gazetteer(tuple(sorted(n for n in nomes if n)))
+
+
+@lru_cache(maxsize=GAZETTEER_CACHE_SIZE)
+def _projetos(nomes: Tuple[str, ...]) -> NomesAproximados:
+    apelidos: Dict[str, List[str]] = {}
+    for nome in nomes:
+        chave = " ".join(tokens(normalizar_texto(nome)))
+        if chave:
+            apelidos.setdefault(chave, []).append(nome)
+    return NomesAproximados({chave: tuple(lista) for chave, lista in apelidos.items()})
+
+
+def projetos_para(nomes: Iterable[str]) -> NomesAproximados:
+    """Resolução aproximada dos nomes de projeto (a mesma enquanto os nomes não mudam)"""
+    return _projetos(tuple(sorted({n for n in nomes if n})))
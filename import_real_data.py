@@ -148,45 +148,45 @@ def limpar_banco():
     """
     print("\n⚠️  LIMPANDO BANCO DE DADOS...")
     try:
-        # Buscar todas as agendas
-        response = supabase.table("agendas").select("id").execute()
+        # Deletar todas em uma única requisição (o PostgREST exige um filtro)
+        response = supabase.table("agendas").delete().gte("id", 0).execute()
         
         if response.data:
-            print(f"   Encontradas {len(response.data)} agendas para remover")
-            
-            # Deletar todas
-            for agenda in response.data:
-                supabase.table("agendas").delete().eq("id", agenda["id"]).execute()
-            
+            print(f"   {len(response.data)} agendas removidas")
             print(f"   ✓ Banco limpo!\n")
         else:
             print("   ✓ Banco já estava vazio\n")
     except Exception as e:
         print(f"   ❌ Erro ao limpar banco: {e}\n")
 
-def importar_agendas(agendas):
+def importar_agendas(agendas, tamanho_lote=500):
     """
-    Importa agendas para o Supabase
+    Importa agendas para o Supabase em lotes (uma requisição por lote)
     """
     print(f"\n📤 Importando {len(agendas)} agendas...")
     sucesso = 0
     erros = 0
     
+    # Adicionar timestamp
+    agora = datetime.now().isoformat()
     for agenda in agendas:
+        agenda["created_at"] = agora
+        # Inserção multi-linha exige as mesmas chaves em todas as linhas
+        agenda.setdefault("gerente", None)
+    
+    for i in range(0, len(agendas), tamanho_lote):
+        lote = agendas[i:i + tamanho_lote]
         try:
-            # Adicionar timestamp
-            agenda["created_at"] = datetime.now().isoformat()
-            
-            response = supabase.table("agendas").insert(agenda).execute()
+            response = supabase.table("agendas").insert(lote).execute()
             
-            if response.data:
-                sucesso += 1
-            else:
-                erros += 1
-                print(f"   ❌ Erro ao inserir: {agenda['consultor']} - {agenda['projeto']}")
+            inseridas = len(response.data or [])
+            sucesso += inseridas
+            if inseridas < len(lote):
+                erros += len(lote) - inseridas
+                print(f"   ❌ Lote {i // tamanho_lote + 1}: {len(lote) - inseridas} agendas não inseridas")
         except Exception as e:
-            erros += 1
-            print(f"   ❌ Erro: {e}")
+            erros += len(lote)
+            print(f"   ❌ Erro no lote {i // tamanho_lote + 1}: {e}")
     
     print(f"\n✅ Importação concluída!")
     print(f"   Sucesso: {sucesso}")
@@ -0,0 +1,279 @@
+"""
+Interpretação das mensagens do assistente (intenção, consultor, datas, projeto, OS)
+
+parse_query extrai todas as entidades de uma mensagem em uma única passada,
+com os padrões compilados uma vez no carregamento do módulo. O resultado é
+imutável e memoizado por (texto, dia de hoje, cadastro): datas relativas
+como "amanhã" mudam de um dia para o outro, e o consultor é reconhecido pelo
+gazetteer do cadastro atual (gazetteer.py).
+"""
+import re
+from datetime import date, datetime, timedelta
+from functools import lru_cache
+from typing import NamedTuple, Optional, Tuple
+from gazetteer import Gazetteer, gazetteer_para
+
+# Mensagens distintas mantidas no cache de parse_query
+PARSE_CACHE_SIZE = 256
+
+# Cadastro usado quando o chamador não informa um gazetteer (sem snapshot)
+CONSULTORES_CONHECIDOS = ('André', 'Gracina', 'Sirlene', 'Mayara', 'Miguel', 'Lucas')
+
+_NOME = r'([A-ZÀ-Ú][a-zà-ú]+(?:\s+[A-ZÀ-Ú][a-zà-ú]+)?)'
+
+_PADROES_CONSULTOR = tuple(re.compile(padrao) for padrao in (
+    r'consultor[a]?\s+' + _NOME,
+    r'(?:do|da|de|o|a)\s+' + _NOME,
+    _NOME + r'\s+(?:está|tem|pode|livre|ocupado)',
+    r'agende\s+(?:o|a)?\s*' + _NOME,
+    r'agendas?\s+(?:do|da|de)\s+' + _NOME,
+))
+
+# Palavras que os padrões capturam mas não são nomes
+_PALAVRAS_IGNORAR = ('consultor', 'consultora', 'projeto', 'agenda')
+
+_PADRAO_PROJETO = re.compile(r'[Pp]rojeto\s+([A-ZÀ-Ú][A-Za-zà-ú0-9\s]+?)(?:\s*,|\s+OS|\s+os|\s*$)')
+_PADRAO_OS = re.compile(r'OS\s*[:\-]?\s*(\d+)', re.IGNORECASE)
+_PADRAO_DATA = re.compile(r'(\d{1,2})[\/\-](\d{1,2})(?:[\/\-](\d{2,4}))?')
+_PADRAO_DIA = re.compile(r'dia\s+(\d{1,2})(?:\s|$|,|\?|!)')
+_PADRAO_DIAS = re.compile(r'dia[s]?\s+(\d+)\s+a[té]?\s+(\d+)')
+
+_DIAS_SEMANA = {
+    'segunda': 0, 'segunda-feira': 0, 'seg': 0,
+    'terça': 1, 'terca': 1, 'terça-feira': 1, 'terca-feira': 1, 'ter': 1,
+    'quarta': 2, 'quarta-feira': 2, 'qua': 2,
+    'quinta': 3, 'quinta-feira': 3, 'qui': 3,
+    'sexta': 4, 'sexta-feira': 4, 'sex': 4,
+    'sábado': 5, 'sabado': 5, 'sab': 5,
+    'domingo': 6, 'dom': 6
+}
+
+_MESES = {
+    'janeiro': 1, 'jan': 1,
+    'fevereiro': 2, 'fev': 2,
+    'março': 3, 'marco': 3, 'mar': 3,
+    'abril': 4, 'abr': 4,
+    'maio': 5, 'mai': 5,
+    'junho': 6, 'jun': 6,
+    'julho': 7, 'jul': 7,
+    'agosto': 8, 'ago': 8,
+    'setembro': 9, 'set': 9,
+    'outubro': 10, 'out': 10,
+    'novembro': 11, 'nov': 11,
+    'dezembro': 12, 'dez': 12
+}
+
+# Palavras-chave das intenções, na ordem de prioridade
+_CRIAR = ('agende', 'criar', 'adicionar', 'adicione', 'registrar', 'registre', 'alocar', 'aloque', 'reserve')
+_VERIFICAR_VAGA = ('vaga', 'preciso de', 'tem alguem', 'tem alguém', 'quem pode', 'quem está livre',
+                   'quem esta livre', 'sugira', 'sugestão')
+_DISPONIBILIDADE = ('livre', 'ocupado', 'disponível', 'disponivel', 'pode', 'está livre', 'esta livre',
+                    'tem vaga', 'tem agenda livre')
+_LISTAR = ('liste', 'listar', 'mostre todas', 'exiba todas', 'todas as agendas', 'todos os', 'lista de')
+
+
+class QueryParse(NamedTuple):
+    """Entidades extraídas de uma mensagem do usuário"""
+    texto: str
+    intencao: str
+    consultor: Optional[str]
+    datas: Optional[Tuple[date, date]]
+    projeto: Optional[str]
+    os: Optional[str]
+
+
+def parse_query(texto: str, hoje: Optional[date] = None,
+                gazetteer: Optional[Gazetteer] = None) -> QueryParse:
+    """
+    Interpreta uma mensagem (resultado memoizado por texto, dia e cadastro)
+
+    Args:
+        texto: Pergunta ou comando do usuário
+        hoje: Data de referência das datas relativas (padrão: hoje)
+        gazetteer: Consultores do cadastro (AgendaIndex.gazetteer); padrão:
+                   CONSULTORES_CONHECIDOS
+    """
+    return _parse_query(texto, hoje or datetime.now().date(), gazetteer or gazetteer_para(CONSULTORES_CONHECIDOS))
+
+
+@lru_cache(maxsize=PARSE_CACHE_SIZE)
+def _parse_query(texto: str, hoje: date, gazetteer: Gazetteer) -> QueryParse:
+    texto_lower = texto.lower()
+    consultor = extrair_consultor(texto, gazetteer)
+    datas = extrair_datas(texto, hoje)
+    return QueryParse(
+        texto=texto,
+        intencao=_identificar_intencao(texto_lower, consultor, datas),
+        consultor=consultor,
+        datas=datas,
+        projeto=extrair_projeto(texto),
+        os=extrair_os(texto),
+    )
+
+
+def _identificar_intencao(texto_lower: str, consultor: Optional[str], datas) -> str:
+    """Identifica a intenção do usuário a partir das palavras-chave e entidades"""
+    if any(palavra in texto_lower for palavra in _CRIAR):
+        return "criar"
+
+    # Demanda por consultor em um período (pedido do CEO)
+    if any(palavra in texto_lower for palavra in _VERIFICAR_VAGA):
+        return "verificar_vaga"
+
+    # Livre/ocupado com consultor OU data é pergunta de disponibilidade
+    if any(palavra in texto_lower for palavra in _DISPONIBILIDADE) and (consultor or datas):
+        return "disponibilidade"
+
+    if any(palavra in texto_lower for palavra in _LISTAR):
+        return "listar"
+
+    # Padrão: consulta (com ou sem filtros, melhor do que listar tudo)
+    return "consulta"
+
+
+def extrair_consultor(texto: str, gazetteer: Optional[Gazetteer] = None) -> Optional[str]:
+    """Extrai o nome do consultor do texto"""
+    # Consultores do cadastro primeiro (uma passada, sem acentos nem maiúsculas)
+    if gazetteer is not None:
+        consultor = gazetteer.consultor(texto)
+        if consultor:
+            return consultor
+
+    # Nomes fora do cadastro (ex.: consultor novo em "Agende o João Silva")
+    for padrao in _PADROES_CONSULTOR:
+        match = padrao.search(texto)
+        if match:
+            nome = match.group(1).strip()
+            # "do Projeto Alpha" não é consultor
+            if nome.split()[0].lower() not in _PALAVRAS_IGNORAR:
+                return nome
+
+    return None
+
+
+def extrair_projeto(texto: str) -> Optional[str]:
+    """Extrai o nome do projeto do texto"""
+    match = _PADRAO_PROJETO.search(texto)
+    return match.group(1).strip() if match else None
+
+
+def extrair_os(texto: str) -> Optional[str]:
+    """Extrai o número da OS do texto"""
+    match = _PADRAO_OS.search(texto)
+    return match.group(1) if match else None
+
+
+def extrair_datas(texto: str, hoje: date) -> Optional[Tuple[date, date]]:
+    """Extrai o período (início, fim) do texto, relativo a hoje"""
+    texto_lower = texto.lower()
+
+    # Datas relativas simples
+    if 'hoje' in texto_lower or 'hje' in texto_lower:
+        return (hoje, hoje)
+
+    if 'amanhã' in texto_lower or 'amanha' in texto_lower:
+        amanha = hoje + timedelta(days=1)
+        return (amanha, amanha)
+
+    if 'depois de amanhã' in texto_lower or 'depois de amanha' in texto_lower:
+        depois = hoje + timedelta(days=2)
+        return (depois, depois)
+
+    # Dias da semana (próxima ocorrência)
+    for dia_nome, dia_num in _DIAS_SEMANA.items():
+        if dia_nome in texto_lower:
+            dias_ate_dia = (dia_num - hoje.weekday()) % 7
+            if dias_ate_dia == 0:
+                dias_ate_dia = 7
+            data_alvo = hoje + timedelta(days=dias_ate_dia)
+            return (data_alvo, data_alvo)
+
+    # Semanas
+    if 'próxima semana' in texto_lower or 'semana que vem' in texto_lower or 'proxima semana' in texto_lower:
+        inicio = hoje + timedelta(days=(7 - hoje.weekday()))
+        return (inicio, inicio + timedelta(days=6))
+
+    if 'esta semana' in texto_lower or 'essa semana' in texto_lower:
+        inicio = hoje - timedelta(days=hoje.weekday())
+        return (inicio, inicio + timedelta(days=6))
+
+    # Meses por nome
+    for mes_nome, mes_num in _MESES.items():
+        if mes_nome in texto_lower:
+            ano = hoje.year
+            # Se o mês já passou, assume ano seguinte
+            if mes_num < hoje.month:
+                ano += 1
+            elif mes_num == hoje.month and 'próximo' in texto_lower:
+                ano += 1
+
+            inicio = date(ano, mes_num, 1)
+            if mes_num == 12:
+                fim = date(ano, 12, 31)
+            else:
+                fim = date(ano, mes_num + 1, 1) - timedelta(days=1)
+            return (inicio, fim)
+
+    # "este mês" / "próximo mês"
+    if 'este mês' in texto_lower or 'esse mês' in texto_lower or 'este mes' in texto_lower:
+        inicio = hoje.replace(day=1)
+        if hoje.month == 12:
+            fim = hoje.replace(day=31)
+        else:
+            fim = hoje.replace(month=hoje.month + 1, day=1) - timedelta(days=1)
+        return (inicio, fim)
+
+    if 'próximo mês' in texto_lower or 'mês que vem' in texto_lower or 'proximo mes' in texto_lower:
+        if hoje.month == 12:
+            inicio = hoje.replace(year=hoje.year + 1, month=1, day=1)
+            fim = inicio.replace(day=31)
+        else:
+            inicio = hoje.replace(month=hoje.month + 1, day=1)
+            fim = inicio.replace(month=inicio.month + 1, day=1) - timedelta(days=1)
+        return (inicio, fim)
+
+    # Datas específicas (dd/mm/yyyy, dd/mm/yy ou dd/mm), antes de "dia X"
+    datas = []
+    for dia, mes, ano in _PADRAO_DATA.findall(texto):
+        try:
+            if not ano:
+                # Sem ano: ano atual, ou o seguinte se a data já passou
+                ano_ref = hoje.year
+                if int(mes) < hoje.month or (int(mes) == hoje.month and int(dia) < hoje.day):
+                    ano_ref += 1
+                ano = str(ano_ref)
+            elif len(ano) == 2:
+                ano = '20' + ano
+            datas.append(datetime.strptime(f"{dia}/{mes}/{ano}", "%d/%m/%Y").date())
+        except ValueError:
+            continue
+
+    if datas:
+        return (min(datas), max(datas))
+
+    # Dia específico "dia 15" (apenas quando NÃO tem barra)
+    if '/' not in texto and '-' not in texto:
+        match = _PADRAO_DIA.search(texto_lower)
+        if match:
+            dia = int(match.group(1))
+            try:
+                data_alvo = hoje.replace(day=dia)
+                # Se o dia já passou neste mês, assume próximo mês
+                if data_alvo < hoje:
+                    if hoje.month == 12:
+                        data_alvo = date(hoje.year + 1, 1, dia)
+                    else:
+                        data_alvo = date(hoje.year, hoje.month + 1, dia)
+                return (data_alvo, data_alvo)
+            except ValueError:
+                pass
+
+    # "dias X a Y" no mês atual
+    match = _PADRAO_DIAS.search(texto_lower)
+    if match:
+        try:
+            return (hoje.replace(day=int(match.group(1))), hoje.replace(day=int(match.group(2))))
+        except ValueError:
+            pass
+
+    return None
@@ -0,0 +1,34 @@
+-- Script SQL para busca parcial sem acentos por consultor e projeto
+-- Execute este script no SQL Editor do seu projeto Supabase, depois de setup_database.sql
+
+-- Extensões (no Supabase ficam no schema "extensions")
+CREATE EXTENSION IF NOT EXISTS pg_trgm WITH SCHEMA extensions;
+CREATE EXTENSION IF NOT EXISTS unaccent WITH SCHEMA extensions;
+
+-- unaccent() não é IMMUTABLE (depende do dicionário no search_path);
+-- este invólucro fixa o dicionário e pode ser usado em colunas geradas
+CREATE OR REPLACE FUNCTION f_unaccent(texto TEXT)
+RETURNS TEXT AS $$
+    SELECT extensions.unaccent('extensions.unaccent'::regdictionary, texto)
+$$ LANGUAGE sql IMMUTABLE PARALLEL SAFE STRICT;
+
+COMMENT ON FUNCTION f_unaccent(TEXT) IS 'unaccent imutável, usado nas colunas de busca';
+
+-- Colunas de busca: minúsculas e sem acentos, como agenda_model.normalizar_texto
+ALTER TABLE agendas
+    ADD COLUMN IF NOT EXISTS consultor_busca TEXT
+    GENERATED ALWAYS AS (lower(f_unaccent(consultor))) STORED;
+
+ALTER TABLE agendas
+    ADD COLUMN IF NOT EXISTS projeto_busca TEXT
+    GENERATED ALWAYS AS (lower(f_unaccent(projeto))) STORED;
+
+COMMENT ON COLUMN agendas.consultor_busca IS 'Consultor em minúsculas e sem acentos (busca)';
+COMMENT ON COLUMN agendas.projeto_busca IS 'Projeto em minúsculas e sem acentos (busca)';
+
+-- Índices de trigramas: atendem ILIKE '%texto%' (os índices btree não atendem)
+CREATE INDEX IF NOT EXISTS idx_agendas_consultor_busca_trgm
+    ON agendas USING gin (consultor_busca extensions.gin_trgm_ops);
+
+CREATE INDEX IF NOT EXISTS idx_agendas_projeto_busca_trgm
+    ON agendas USING gin (projeto_busca extensions.gin_trgm_ops);
@@ -0,0 +1,78 @@
+-- Script SQL para detecção de conflitos no banco (Database.create_agenda)
+-- Execute este script no SQL Editor do seu projeto Supabase, depois de setup_database.sql
+
+-- btree_gist permite combinar o consultor (TEXT) e o período no mesmo índice GiST
+CREATE EXTENSION IF NOT EXISTS btree_gist;
+
+-- Antes de criar a coluna, confira se há agendas com datas invertidas
+-- (o daterange não aceita fim anterior ao início):
+-- SELECT id, consultor, data_inicio, data_fim FROM agendas WHERE data_fim < data_inicio;
+
+-- Período da agenda como intervalo fechado [data_inicio, data_fim]
+ALTER TABLE agendas
+    ADD COLUMN IF NOT EXISTS periodo DATERANGE
+    GENERATED ALWAYS AS (daterange(data_inicio, data_fim, '[]')) STORED;
+
+COMMENT ON COLUMN agendas.periodo IS 'Período da agenda (daterange fechado), usado na detecção de conflitos';
+
+-- Índice para "agendas do consultor que se sobrepõem ao período"
+CREATE INDEX IF NOT EXISTS idx_agendas_consultor_periodo ON agendas USING gist (consultor, periodo);
+
+-- Cria a agenda e informa os conflitos em uma única chamada
+-- Retorna {"agenda": linha criada ou null, "conflitos": [agendas ocupadas sobrepostas]}
+CREATE OR REPLACE FUNCTION criar_agenda(
+    p_consultor TEXT,
+    p_data_inicio DATE,
+    p_data_fim DATE,
+    p_projeto TEXT,
+    p_os TEXT DEFAULT NULL,
+    p_gerente TEXT DEFAULT NULL
+)
+RETURNS JSONB AS $$
+DECLARE
+    v_is_vago BOOLEAN := UPPER(p_projeto) IN ('VAGO', 'LIVRE');
+    v_conflitos JSONB := '[]'::JSONB;
+    v_agenda agendas;
+BEGIN
+    -- Reservas do mesmo consultor são serializadas até o fim da transação:
+    -- duas inserções simultâneas não deixam de ver uma à outra
+    PERFORM pg_advisory_xact_lock(hashtext('agendas:' || p_consultor));
+
+    IF NOT v_is_vago THEN
+        SELECT COALESCE(jsonb_agg(jsonb_build_object(
+                   'id', a.id,
+                   'consultor', a.consultor,
+                   'projeto', a.projeto,
+                   'os', a.os,
+                   'data_inicio', a.data_inicio,
+                   'data_fim', a.data_fim
+               ) ORDER BY a.data_inicio), '[]'::JSONB)
+        INTO v_conflitos
+        FROM agendas a
+        WHERE a.consultor = p_consultor
+          AND a.periodo && daterange(p_data_inicio, p_data_fim, '[]')
+          AND NOT COALESCE(a.is_vago, FALSE);
+    END IF;
+
+    INSERT INTO agendas (consultor, data_inicio, data_fim, projeto, os, gerente, is_vago)
+    VALUES (p_consultor, p_data_inicio, p_data_fim, p_projeto, p_os, p_gerente, v_is_vago)
+    RETURNING * INTO v_agenda;
+
+    RETURN jsonb_build_object('agenda', to_jsonb(v_agenda), 'conflitos', v_conflitos);
+EXCEPTION
+    -- Com a restrição de exclusão (abaixo) ativa, o conflito impede a inserção
+    WHEN exclusion_violation THEN
+        RETURN jsonb_build_object('agenda', NULL, 'conflitos', v_conflitos);
+END;
+$$ LANGUAGE plpgsql;
+
+COMMENT ON FUNCTION criar_agenda(TEXT, DATE, DATE, TEXT, TEXT, TEXT) IS 'Cria uma agenda e retorna as agendas ocupadas em conflito';
+
+GRANT EXECUTE ON FUNCTION criar_agenda(TEXT, DATE, DATE, TEXT, TEXT, TEXT) TO anon, authenticated;
+
+-- Opcional: proibir conflitos em vez de apenas avisar
+-- Agendas VAGO/LIVRE não entram na restrição. Resolva os conflitos existentes antes de ativar.
+-- ALTER TABLE agendas
+--     ADD CONSTRAINT agendas_sem_conflito
+--     EXCLUDE USING gist (consultor WITH =, periodo WITH &&)
+--     WHERE (NOT COALESCE(is_vago, FALSE));
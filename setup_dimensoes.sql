@@ -0,0 +1,160 @@
+-- Script SQL para as tabelas de dimensão (consultores, projetos e gerentes)
+-- Execute este script no SQL Editor do seu projeto Supabase, depois de setup_database.sql
+-- Também cria agendas_top_projetos (Database.get_top_projects); sem este script, o app
+-- calcula os projetos com mais agendas pelo snapshot em memória
+
+-- Um registro por nome; as agendas passam a apontar para eles por chave inteira
+CREATE TABLE IF NOT EXISTS consultores (
+    id BIGSERIAL PRIMARY KEY,
+    nome TEXT NOT NULL UNIQUE,
+    created_at TIMESTAMP WITH TIME ZONE DEFAULT NOW()
+);
+
+CREATE TABLE IF NOT EXISTS projetos (
+    id BIGSERIAL PRIMARY KEY,
+    nome TEXT NOT NULL UNIQUE,
+    created_at TIMESTAMP WITH TIME ZONE DEFAULT NOW()
+);
+
+CREATE TABLE IF NOT EXISTS gerentes (
+    id BIGSERIAL PRIMARY KEY,
+    nome TEXT NOT NULL UNIQUE,
+    created_at TIMESTAMP WITH TIME ZONE DEFAULT NOW()
+);
+
+COMMENT ON TABLE consultores IS 'Consultores distintos das agendas (Database.list_consultores)';
+COMMENT ON TABLE projetos IS 'Projetos distintos das agendas (Database.list_projetos)';
+COMMENT ON TABLE gerentes IS 'Gerentes distintos das agendas (Database.list_gerentes)';
+
+-- Chaves estrangeiras nas agendas (os nomes continuam nas colunas de texto)
+ALTER TABLE agendas ADD COLUMN IF NOT EXISTS consultor_id BIGINT REFERENCES consultores(id);
+ALTER TABLE agendas ADD COLUMN IF NOT EXISTS projeto_id BIGINT REFERENCES projetos(id);
+ALTER TABLE agendas ADD COLUMN IF NOT EXISTS gerente_id BIGINT REFERENCES gerentes(id);
+
+COMMENT ON COLUMN agendas.consultor_id IS 'Consultor da agenda (consultores.id)';
+COMMENT ON COLUMN agendas.projeto_id IS 'Projeto da agenda (projetos.id)';
+COMMENT ON COLUMN agendas.gerente_id IS 'Gerente da agenda (gerentes.id)';
+
+CREATE INDEX IF NOT EXISTS idx_agendas_consultor_id ON agendas(consultor_id);
+CREATE INDEX IF NOT EXISTS idx_agendas_projeto_id ON agendas(projeto_id);
+CREATE INDEX IF NOT EXISTS idx_agendas_gerente_id ON agendas(gerente_id);
+
+-- Preencher as dimensões e as chaves a partir das agendas existentes
+INSERT INTO consultores (nome) SELECT DISTINCT consultor FROM agendas WHERE consultor IS NOT NULL
+ON CONFLICT (nome) DO NOTHING;
+INSERT INTO projetos (nome) SELECT DISTINCT projeto FROM agendas WHERE projeto IS NOT NULL
+ON CONFLICT (nome) DO NOTHING;
+INSERT INTO gerentes (nome) SELECT DISTINCT gerente FROM agendas WHERE gerente IS NOT NULL AND gerente <> ''
+ON CONFLICT (nome) DO NOTHING;
+
+UPDATE agendas a SET consultor_id = c.id FROM consultores c WHERE c.nome = a.consultor AND a.consultor_id IS DISTINCT FROM c.id;
+UPDATE agendas a SET projeto_id = p.id FROM projetos p WHERE p.nome = a.projeto AND a.projeto_id IS DISTINCT FROM p.id;
+UPDATE agendas a SET gerente_id = g.id FROM gerentes g WHERE g.nome = a.gerente AND a.gerente_id IS DISTINCT FROM g.id;
+
+-- Trigger: nomes novos entram nas dimensões e as chaves acompanham os nomes
+-- (SECURITY DEFINER: a API grava nas dimensões mesmo sem política de escrita)
+CREATE OR REPLACE FUNCTION vincular_dimensoes_agenda()
+RETURNS TRIGGER AS $$
+BEGIN
+    IF NEW.consultor IS NULL THEN
+        NEW.consultor_id := NULL;
+    ELSE
+        INSERT INTO consultores (nome) VALUES (NEW.consultor) ON CONFLICT (nome) DO NOTHING;
+        SELECT id INTO NEW.consultor_id FROM consultores WHERE nome = NEW.consultor;
+    END IF;
+
+    IF NEW.projeto IS NULL THEN
+        NEW.projeto_id := NULL;
+    ELSE
+        INSERT INTO projetos (nome) VALUES (NEW.projeto) ON CONFLICT (nome) DO NOTHING;
+        SELECT id INTO NEW.projeto_id FROM projetos WHERE nome = NEW.projeto;
+    END IF;
+
+    IF NEW.gerente IS NULL OR NEW.gerente = '' THEN
+        NEW.gerente_id := NULL;
+    ELSE
+        INSERT INTO gerentes (nome) VALUES (NEW.gerente) ON CONFLICT (nome) DO NOTHING;
+        SELECT id INTO NEW.gerente_id FROM gerentes WHERE nome = NEW.gerente;
+    END IF;
+
+    RETURN NEW;
+END;
+$$ LANGUAGE plpgsql SECURITY DEFINER SET search_path = public;
+
+DROP TRIGGER IF EXISTS vincular_dimensoes_agendas ON agendas;
+
+CREATE TRIGGER vincular_dimensoes_agendas
+    BEFORE INSERT OR UPDATE OF consultor, projeto, gerente ON agendas
+    FOR EACH ROW
+    EXECUTE FUNCTION vincular_dimensoes_agenda();
+
+-- Trigger: nomes que deixaram de ser usados saem das dimensões, para que as
+-- listas do app (list_consultores etc.) não acumulem nomes antigos
+CREATE OR REPLACE FUNCTION podar_dimensoes_agenda()
+RETURNS TRIGGER AS $$
+BEGIN
+    IF OLD.consultor_id IS NOT NULL AND (TG_OP = 'DELETE' OR NEW.consultor_id IS DISTINCT FROM OLD.consultor_id) THEN
+        DELETE FROM consultores c WHERE c.id = OLD.consultor_id
+            AND NOT EXISTS (SELECT 1 FROM agendas a WHERE a.consultor_id = OLD.consultor_id);
+    END IF;
+
+    IF OLD.projeto_id IS NOT NULL AND (TG_OP = 'DELETE' OR NEW.projeto_id IS DISTINCT FROM OLD.projeto_id) THEN
+        DELETE FROM projetos p WHERE p.id = OLD.projeto_id
+            AND NOT EXISTS (SELECT 1 FROM agendas a WHERE a.projeto_id = OLD.projeto_id);
+    END IF;
+
+    IF OLD.gerente_id IS NOT NULL AND (TG_OP = 'DELETE' OR NEW.gerente_id IS DISTINCT FROM OLD.gerente_id) THEN
+        DELETE FROM gerentes g WHERE g.id = OLD.gerente_id
+            AND NOT EXISTS (SELECT 1 FROM agendas a WHERE a.gerente_id = OLD.gerente_id);
+    END IF;
+
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql SECURITY DEFINER SET search_path = public;
+
+DROP TRIGGER IF EXISTS podar_dimensoes_agendas ON agendas;
+
+CREATE TRIGGER podar_dimensoes_agendas
+    AFTER DELETE OR UPDATE OF consultor, projeto, gerente ON agendas
+    FOR EACH ROW
+    EXECUTE FUNCTION podar_dimensoes_agenda();
+
+-- Remover nomes já sem agendas (execuções anteriores deste script)
+DELETE FROM consultores c WHERE NOT EXISTS (SELECT 1 FROM agendas a WHERE a.consultor_id = c.id);
+DELETE FROM projetos p WHERE NOT EXISTS (SELECT 1 FROM agendas a WHERE a.projeto_id = p.id);
+DELETE FROM gerentes g WHERE NOT EXISTS (SELECT 1 FROM agendas a WHERE a.gerente_id = g.id);
+
+-- Projetos com mais agendas, agrupados pela chave inteira
+CREATE OR REPLACE FUNCTION agendas_top_projetos(n INTEGER DEFAULT 10)
+RETURNS TABLE (
+    projeto TEXT,
+    agendas BIGINT
+) AS $$
+    SELECT p.nome, t.agendas
+    FROM (
+        SELECT a.projeto_id, COUNT(*) AS agendas
+        FROM agendas a
+        WHERE a.projeto_id IS NOT NULL
+        GROUP BY a.projeto_id
+    ) t
+    JOIN projetos p ON p.id = t.projeto_id
+    ORDER BY t.agendas DESC, p.nome
+    LIMIT n;
+$$ LANGUAGE sql STABLE;
+
+COMMENT ON FUNCTION agendas_top_projetos(INTEGER) IS 'Os n projetos com mais agendas';
+
+GRANT EXECUTE ON FUNCTION agendas_top_projetos(INTEGER) TO anon, authenticated;
+
+-- Habilitar RLS (o app só lê as dimensões)
+ALTER TABLE consultores ENABLE ROW LEVEL SECURITY;
+ALTER TABLE projetos ENABLE ROW LEVEL SECURITY;
+ALTER TABLE gerentes ENABLE ROW LEVEL SECURITY;
+
+DROP POLICY IF EXISTS "Permitir leitura para todos" ON consultores;
+DROP POLICY IF EXISTS "Permitir leitura para todos" ON projetos;
+DROP POLICY IF EXISTS "Permitir leitura para todos" ON gerentes;
+
+CREATE POLICY "Permitir leitura para todos" ON consultores FOR SELECT USING (true);
+CREATE POLICY "Permitir leitura para todos" ON projetos FOR SELECT USING (true);
+CREATE POLICY "Permitir leitura para todos" ON gerentes FOR SELECT USING (true);
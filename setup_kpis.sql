@@ -0,0 +1,33 @@
+-- Script SQL com a função de agregação dos indicadores (Database.get_kpis)
+-- Execute este script no SQL Editor do seu projeto Supabase, depois de setup_database.sql
+-- (agendas_top_projetos, de Database.get_top_projects, fica em setup_dimensoes.sql,
+-- porque agrupa pela chave inteira do projeto)
+
+-- Indicadores das agendas em relação a uma data (uma única linha)
+CREATE OR REPLACE FUNCTION agendas_kpis(hoje DATE DEFAULT CURRENT_DATE)
+RETURNS TABLE (
+    total BIGINT,
+    ativas BIGINT,
+    proximas BIGINT,
+    concluidas BIGINT,
+    consultores BIGINT,
+    consultores_ativos BIGINT,
+    projetos BIGINT,
+    os BIGINT
+) AS $$
+    SELECT
+        COUNT(*),
+        COUNT(*) FILTER (WHERE a.data_inicio <= hoje AND a.data_fim >= hoje),
+        COUNT(*) FILTER (WHERE a.data_inicio > hoje),
+        COUNT(*) FILTER (WHERE a.data_fim < hoje),
+        COUNT(DISTINCT a.consultor),
+        COUNT(DISTINCT a.consultor) FILTER (WHERE a.data_inicio <= hoje AND a.data_fim >= hoje),
+        COUNT(DISTINCT a.projeto),
+        COUNT(DISTINCT NULLIF(a.os, ''))
+    FROM agendas a;
+$$ LANGUAGE sql STABLE;
+
+COMMENT ON FUNCTION agendas_kpis(DATE) IS 'Totais, ativas, próximas, concluídas e contagens distintas das agendas';
+
+-- Permitir chamada pela API (mesmo acesso de leitura da tabela agendas)
+GRANT EXECUTE ON FUNCTION agendas_kpis(DATE) TO anon, authenticated;
@@ -0,0 +1,18 @@
+-- Script SQL para o feed de mudanças em tempo real (Database.iniciar_tempo_real)
+-- Execute este script no SQL Editor do seu projeto Supabase, depois de setup_database.sql
+
+-- Publicar INSERT, UPDATE e DELETE de agendas no Supabase Realtime
+DO $$
+BEGIN
+    IF NOT EXISTS (
+        SELECT 1 FROM pg_publication_tables
+        WHERE pubname = 'supabase_realtime' AND schemaname = 'public' AND tablename = 'agendas'
+    ) THEN
+        ALTER PUBLICATION supabase_realtime ADD TABLE agendas;
+    END IF;
+END $$;
+
+-- Opcional: eventos de DELETE com a linha removida inteira (o app só precisa do id)
+-- ALTER TABLE agendas REPLICA IDENTITY FULL;
+
+-- Depois de aplicar, ative no app com SUPABASE_REALTIME = "true" (secrets.toml ou variável de ambiente)
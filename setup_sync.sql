@@ -0,0 +1,52 @@
+-- Script SQL para sincronização incremental das agendas (Database.sync)
+-- Execute este script no SQL Editor do seu projeto Supabase, depois de setup_database.sql
+
+-- O app busca apenas as linhas com updated_at posterior à última sincronização
+CREATE INDEX IF NOT EXISTS idx_agendas_updated_at ON agendas(updated_at);
+
+-- Garantir updated_at preenchido também em linhas antigas
+UPDATE agendas SET updated_at = COALESCE(updated_at, created_at, NOW()) WHERE updated_at IS NULL;
+
+-- Tabela de "lápides": registra as agendas removidas para propagar exclusões
+CREATE TABLE IF NOT EXISTS agendas_removidas (
+    id BIGINT PRIMARY KEY,
+    removido_em TIMESTAMP WITH TIME ZONE NOT NULL DEFAULT NOW()
+);
+
+COMMENT ON TABLE agendas_removidas IS 'IDs de agendas removidas, usados pela sincronização incremental';
+COMMENT ON COLUMN agendas_removidas.id IS 'ID da agenda removida';
+COMMENT ON COLUMN agendas_removidas.removido_em IS 'Data e hora da remoção';
+
+CREATE INDEX IF NOT EXISTS idx_agendas_removidas_removido_em ON agendas_removidas(removido_em);
+
+-- Trigger que alimenta a tabela de lápides a cada DELETE
+-- (SECURITY DEFINER: com RLS a API só lê as lápides; a gravação vem do trigger)
+CREATE OR REPLACE FUNCTION registrar_agenda_removida()
+RETURNS TRIGGER AS $$
+BEGIN
+    INSERT INTO agendas_removidas (id, removido_em)
+    VALUES (OLD.id, NOW())
+    ON CONFLICT (id) DO UPDATE SET removido_em = EXCLUDED.removido_em;
+    RETURN OLD;
+END;
+$$ LANGUAGE plpgsql SECURITY DEFINER SET search_path = public;
+
+DROP TRIGGER IF EXISTS registrar_agendas_removidas ON agendas;
+
+CREATE TRIGGER registrar_agendas_removidas
+    AFTER DELETE ON agendas
+    FOR EACH ROW
+    EXECUTE FUNCTION registrar_agenda_removida();
+
+-- Habilitar RLS (o app só precisa ler as lápides)
+ALTER TABLE agendas_removidas ENABLE ROW LEVEL SECURITY;
+
+DROP POLICY IF EXISTS "Permitir leitura para todos" ON agendas_removidas;
+
+CREATE POLICY "Permitir leitura para todos"
+ON agendas_removidas FOR SELECT
+USING (true);
+
+-- Manutenção (opcional): lápides antigas podem ser descartadas, pois os
+-- snapshots do app são renovados por completo bem antes disso
+-- DELETE FROM agendas_removidas WHERE removido_em < NOW() - INTERVAL '30 days';
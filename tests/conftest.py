@@ -0,0 +1,327 @@
+"""
+Cliente Supabase falso para os testes
+
+Tabelas em memória e o subconjunto do construtor do PostgREST usado por
+database.py (select/insert/update/delete, filtros, or_ do cursor keyset,
+order, limit, count e rpc). Os filtros são aplicados de verdade, então a
+paginação e a sincronização incremental são exercitadas como no banco.
+"""
+import copy
+import re
+from datetime import datetime, timedelta, timezone
+import pytest
+from postgrest.exceptions import APIError
+import database
+
+# Colunas NOT NULL de setup_database.sql
+NAO_NULOS = {"agendas": ("consultor", "data_inicio", "data_fim", "projeto", "os")}
+
+
+class Resposta:
+    def __init__(self, data, count=None):
+        self.data = data
+        self.count = count
+
+
+def _comparar(valor, texto) -> int:
+    """Compara o valor da linha com o valor do filtro (texto vindo da URL)"""
+    if isinstance(valor, bool):
+        texto = str(texto).lower() == "true"
+    elif isinstance(valor, int):
+        texto = int(texto)
+    else:
+        valor, texto = str(valor), str(texto)
+    return (valor > texto) - (valor < texto)
+
+
+def _condicao(coluna: str, operador: str, texto):
+    """Função linha -> bool de um filtro PostgREST"""
+    def condicao(linha):
+        valor = linha.get(coluna)
+        if operador == "is":
+            return valor is None if texto == "null" else valor is (str(texto).lower() == "true")
+        if operador == "in":
+            return valor in texto
+        if operador == "ilike":
+            padrao = "^" + re.escape(str(texto)).replace("%", ".*") + "$"
+            return valor is not None and re.match(padrao, str(valor), re.IGNORECASE) is not None
+        if valor is None:
+            return False
+        c = _comparar(valor, texto)
+        return {"eq": c == 0, "gt": c > 0, "gte": c >= 0, "lt": c < 0, "lte": c <= 0}[operador]
+    return condicao
+
+
+def _dividir(texto: str):
+    """Divide por vírgulas fora de parênteses e de aspas"""
+    partes, atual, nivel, aspas, escape = [], "", 0, False, False
+    for caractere in texto:
+        if escape:
+            atual += caractere
+            escape = False
+            continue
+        if caractere == "\\":
+            atual += caractere
+            escape = True
+            continue
+        if caractere == '"':
+            aspas = not aspas
+        elif not aspas and caractere == "(":
+            nivel += 1
+        elif not aspas and caractere == ")":
+            nivel -= 1
+        elif not aspas and nivel == 0 and caractere == ",":
+            partes.append(atual)
+            atual = ""
+            continue
+        atual += caractere
+    return partes + [atual]
+
+
+def _expressao(texto: str):
+    """Converte uma expressão do or_ (a.gt."v" ou and(...)) em função linha -> bool"""
+    if texto.startswith("and(") and texto.endswith(")"):
+        termos = [_expressao(t) for t in _dividir(texto[4:-1])]
+        return lambda linha: all(t(linha) for t in termos)
+    coluna, operador, valor = texto.split(".", 2)
+    if valor.startswith('"') and valor.endswith('"'):
+        valor = valor[1:-1].replace('\\"', '"').replace("\\\\", "\\")
+    return _condicao(coluna, operador, valor)
+
+
+class ConsultaFalsa:
+    """Construtor de consulta: acumula a operação e os filtros até execute()"""
+
+    def __init__(self, cliente, tabela: str):
+        self.cliente = cliente
+        self.tabela = tabela
+        self.operacao = "select"
+        self.colunas = "*"
+        self.count = None
+        self.returning = "representation"
+        self.payload = None
+        self.filtros = []
+        self.ordem = []
+        self.limite = None
+        self.devolvidas = None
+        self._negar = False
+
+    def select(self, colunas="*", count=None):
+        self.colunas, self.count = colunas, count
+        return self
+
+    def insert(self, linhas, count=None, returning="representation"):
+        self.operacao, self.payload, self.count, self.returning = "insert", linhas, count, returning
+        return self
+
+    def update(self, dados, count=None, returning="representation"):
+        self.operacao, self.payload, self.count, self.returning = "update", dados, count, returning
+        return self
+
+    def delete(self, count=None, returning="representation"):
+        self.operacao, self.count, self.returning = "delete", count, returning
+        return self
+
+    @property
+    def not_(self):
+        self._negar = True
+        return self
+
+    def _filtro(self, condicao):
+        negar, self._negar = self._negar, False
+        self.filtros.append((lambda linha: not condicao(linha)) if negar else condicao)
+        return self
+
+    def eq(self, coluna, valor):
+        return self._filtro(_condicao(coluna, "eq", valor))
+
+    def gt(self, coluna, valor):
+        return self._filtro(_condicao(coluna, "gt", valor))
+
+    def gte(self, coluna, valor):
+        return self._filtro(_condicao(coluna, "gte", valor))
+
+    def lt(self, coluna, valor):
+        return self._filtro(_condicao(coluna, "lt", valor))
+
+    def lte(self, coluna, valor):
+        return self._filtro(_condicao(coluna, "lte", valor))
+
+    def in_(self, coluna, valores):
+        return self._filtro(_condicao(coluna, "in", list(valores)))
+
+    def is_(self, coluna, valor):
+        return self._filtro(_condicao(coluna, "is", valor))
+
+    def ilike(self, coluna, padrao):
+        return self._filtro(_condicao(coluna, "ilike", padrao))
+
+    def or_(self, filtros):
+        termos = [_expressao(t) for t in _dividir(filtros)]
+        return self._filtro(lambda linha: any(t(linha) for t in termos))
+
+    def order(self, coluna, desc=False, nullsfirst=False):
+        self.ordem.append((coluna, desc))
+        return self
+
+    def limit(self, n):
+        self.limite = n
+        return self
+
+    def execute(self):
+        self.cliente.consultas.append(self)
+        if self.cliente.falha is not None:
+            self.cliente.falha(self)
+        return getattr(self, f"_{self.operacao}")()
+
+    def _linhas(self):
+        return [linha for linha in self.cliente.tabelas.setdefault(self.tabela, [])
+                if all(f(linha) for f in self.filtros)]
+
+    def _select(self):
+        linhas = self._linhas()
+        for coluna, desc in reversed(self.ordem):
+            nulas = [l for l in linhas if l.get(coluna) is None]
+            linhas = sorted((l for l in linhas if l.get(coluna) is not None),
+                            key=lambda l: l[coluna], reverse=desc) + nulas
+        total = len(linhas)
+        limite = min(self.limite or self.cliente.max_rows, self.cliente.max_rows)
+        linhas = linhas[:limite]
+        self.devolvidas = len(linhas)
+        if self.colunas.strip() != "*":
+            colunas = [c.strip() for c in self.colunas.split(",")]
+            linhas = [{c: l.get(c) for c in colunas} for l in linhas]
+        return Resposta(copy.deepcopy(linhas), total if self.count else None)
+
+    def _resposta(self, linhas):
+        data = copy.deepcopy(linhas) if self.returning == "representation" else []
+        return Resposta(data, len(linhas) if self.count else None)
+
+    def _insert(self):
+        novas = self.payload if isinstance(self.payload, list) else [self.payload]
+        for linha in novas:
+            faltando = [c for c in NAO_NULOS.get(self.tabela, ()) if linha.get(c) is None]
+            if faltando:
+                # Como no Postgres, a instrução inteira é desfeita
+                raise APIError({"code": "23502", "message": f'null value in column "{faltando[0]}"'})
+        gravadas = []
+        for linha in novas:
+            gravada = dict(linha, id=self.cliente.proximo_id(), updated_at=self.cliente.agora())
+            self.cliente.tabelas.setdefault(self.tabela, []).append(gravada)
+            gravadas.append(gravada)
+        return self._resposta(gravadas)
+
+    def _update(self):
+        alteradas = self._linhas()
+        for linha in alteradas:
+            linha.update(self.payload, updated_at=self.cliente.agora())
+        return self._resposta(alteradas)
+
+    def _delete(self):
+        removidas = self._linhas()
+        tabela = self.cliente.tabelas[self.tabela]
+        tabela[:] = [l for l in tabela if l not in removidas]
+        if self.tabela == "agendas":
+            # Trigger de setup_sync.sql
+            lapides = self.cliente.tabelas.setdefault("agendas_removidas", [])
+            for linha in removidas:
+                lapides.append({"id": linha["id"], "removido_em": self.cliente.agora()})
+        return self._resposta(removidas)
+
+
+class ChamadaFalsa:
+    def __init__(self, cliente, nome, parametros):
+        self.cliente, self.nome, self.parametros = cliente, nome, parametros
+
+    def execute(self):
+        self.cliente.consultas.append(self)
+        funcao = self.cliente.funcoes.get(self.nome)
+        if funcao is None:
+            raise APIError({"code": database.FUNCAO_INEXISTENTE, "message": f"function {self.nome} not found"})
+        return Resposta(funcao(self.parametros))
+
+
+class ClienteFalso:
+    """
+    Banco em memória
+
+    Attributes:
+        tabelas: nome -> lista de linhas
+        funcoes: RPCs disponíveis (nome -> função dos parâmetros)
+        max_rows: Limite de linhas por resposta (como o max-rows do PostgREST)
+        falha: Chamado antes de cada consulta (pode levantar exceção)
+        consultas: Consultas executadas, na ordem
+    """
+
+    def __init__(self, max_rows: int = 1000):
+        self.tabelas = {}
+        self.funcoes = {}
+        self.max_rows = max_rows
+        self.falha = None
+        self.consultas = []
+        self._id = 0
+        self._relogio = datetime(2026, 10, 1, tzinfo=timezone.utc)
+
+    def proximo_id(self) -> int:
+        self._id += 1
+        return self._id
+
+    def avancar(self, segundos: float) -> None:
+        """Avança o relógio do banco (escritas seguintes ficam além da margem do sync)"""
+        self._relogio += timedelta(seconds=segundos)
+
+    def agora(self) -> str:
+        self._relogio += timedelta(seconds=1)
+        return self._relogio.isoformat()
+
+    def table(self, nome: str) -> ConsultaFalsa:
+        return ConsultaFalsa(self, nome)
+
+    def rpc(self, nome: str, parametros=None) -> ChamadaFalsa:
+        return ChamadaFalsa(self, nome, parametros)
+
+    def carregar(self, tabela: str, linhas) -> None:
+        """Insere linhas prontas (com id e updated_at), sem validação"""
+        for linha in linhas:
+            linha = dict(linha)
+            if "id" not in linha:
+                linha["id"] = self.proximo_id()
+            else:
+                self._id = max(self._id, linha["id"])
+            if tabela == "agendas":
+                linha.setdefault("updated_at", self.agora())
+            self.tabelas.setdefault(tabela, []).append(linha)
+
+
+def agenda(consultor="Ana", data_inicio="2026-10-01", data_fim=None, projeto="Alpha", os="1", **extra):
+    """Linha de agenda com os campos obrigatórios preenchidos"""
+    return dict({"consultor": consultor, "data_inicio": data_inicio, "data_fim": data_fim or data_inicio,
+                 "projeto": projeto, "os": os, "gerente": None, "is_vago": projeto in ("VAGO", "LIVRE")},
+                **extra)
+
+
+@pytest.fixture
+def mensagens(monkeypatch):
+    """Mensagens exibidas com st.error / st.warning, por tipo"""
+    capturadas = {"error": [], "warning": []}
+    for tipo in capturadas:
+        monkeypatch.setattr(database.st, tipo, capturadas[tipo].append)
+    return capturadas
+
+
+@pytest.fixture
+def cliente():
+    return ClienteFalso()
+
+
+@pytest.fixture
+def db(cliente, monkeypatch, mensagens):
+    """Database sobre o cliente falso, com snapshot e buscas em andamento isolados"""
+    monkeypatch.setattr(database, "_snapshot", database._SnapshotCache())
+    monkeypatch.setattr(database, "_voos", database._SingleFlight())
+    banco = database.Database.__new__(database.Database)
+    banco.supabase_url = banco.supabase_key = None
+    banco.realtime_habilitado = False
+    banco.client = cliente
+    banco.table_name = "agendas"
+    return banco
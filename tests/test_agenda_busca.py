@@ -0,0 +1,68 @@
+"""
+Testes do índice de texto das agendas (IndiceBusca)
+"""
+import pytest
+from agenda_busca import IndiceBusca
+from agenda_model import como_registros, normalizar_texto
+
+
+def _agenda(agenda_id, consultor, projeto, data_inicio="2026-10-01"):
+    return {"id": agenda_id, "consultor": consultor, "projeto": projeto, "os": None, "gerente": None,
+            "data_inicio": data_inicio, "data_fim": data_inicio, "is_vago": False}
+
+
+@pytest.fixture
+def busca():
+    # Registros na ordem do snapshot (data_inicio decrescente)
+    return IndiceBusca(como_registros([
+        _agenda(1, "José Conceição", "Projeto São Paulo", "2026-10-09"),
+        _agenda(2, "Jose Silva", "Expansão Norte", "2026-10-08"),
+        _agenda(3, "Ana Souza", "PROJETO ALPHA", "2026-10-07"),
+        _agenda(4, "Mariana Silva", "Alpha-2", "2026-10-06"),
+        _agenda(5, "ANDRÉ LUIZ", "Projeto Sao Paulo", "2026-10-05"),
+    ]))
+
+
+def _ids(agendas):
+    return [a.id for a in agendas]
+
+
+@pytest.mark.parametrize("texto, esperado", [
+    ("josé", [1, 2]),
+    ("JOSE", [1, 2]),
+    ("conceicao", [1]),
+    ("Conceição", [1]),
+    ("andre", [5]),
+    ("André Luiz", [5]),
+])
+def test_consultor_ignora_acentos_e_maiusculas(busca, texto, esperado):
+    assert _ids(busca.filtrar(consultor=texto)) == esperado
+
+
+def test_projeto_ignora_acentos_dos_dois_lados(busca):
+    assert _ids(busca.filtrar(projeto="são paulo")) == [1, 5]
+    assert _ids(busca.filtrar(projeto="SAO PAULO")) == [1, 5]
+    assert _ids(busca.filtrar(projeto="expansao")) == [2]
+
+
+def test_trecho_e_palavra_inteira(busca):
+    assert _ids(busca.filtrar(consultor="ana")) == [3, 4]
+    assert _ids(busca.filtrar(consultor="ana", token=True)) == [3]
+    assert _ids(busca.filtrar(projeto="alpha", token=True)) == [3, 4]
+
+
+def test_filtros_combinados_na_ordem_do_snapshot(busca):
+    assert _ids(busca.filtrar(consultor="silva", projeto="alpha")) == [4]
+    assert _ids(busca.filtrar(consultor="jose", projeto="são")) == [1, 2]  # "expansão"
+    assert _ids(busca.filtrar(consultor="jose", projeto="são paulo")) == [1]
+    assert _ids(busca.filtrar()) == [1, 2, 3, 4, 5]
+
+
+@pytest.mark.parametrize("texto", [
+    "a", "ana s", "na si", "o sa", "alpha-2", "-2", "ção p", "  ", "-", "projeto são paulo", "xyz",
+])
+def test_igual_a_comparacao_direta(busca, texto):
+    # Mesma regra de normalizar_texto(texto) in normalizar_texto(valor), sem percorrer as agendas
+    for campo in ("consultor", "projeto"):
+        esperado = {i for i, a in enumerate(busca.registros) if normalizar_texto(texto) in normalizar_texto(a[campo])}
+        assert busca.posicoes(campo, texto) == esperado
@@ -0,0 +1,97 @@
+"""
+Testes do índice de intervalos (AgendaIndex)
+"""
+from datetime import date
+import pytest
+from agenda_index import AgendaIndex
+
+
+def _agenda(agenda_id, consultor, inicio, fim, projeto="Alpha"):
+    return {"id": agenda_id, "consultor": consultor, "projeto": projeto, "os": None, "gerente": None,
+            "data_inicio": inicio, "data_fim": fim, "is_vago": projeto == "VAGO"}
+
+
+@pytest.fixture
+def indice():
+    return AgendaIndex([
+        # Ana: 01-05 e 03-08 se sobrepõem; 09-10 encosta (começa no dia seguinte)
+        _agenda(1, "Ana", "2026-10-01", "2026-10-05"),
+        _agenda(2, "Ana", "2026-10-03", "2026-10-08"),
+        _agenda(3, "Ana", "2026-10-09", "2026-10-10"),
+        # Bruno: 01-02 e 04-05 separadas por um dia livre; 15 vago
+        _agenda(4, "Bruno", "2026-10-01", "2026-10-02"),
+        _agenda(5, "Bruno", "2026-10-04", "2026-10-05"),
+        _agenda(6, "Bruno", "2026-10-15", "2026-10-15", projeto="VAGO"),
+        # Carla: só agenda vaga
+        _agenda(7, "Carla", "2026-10-01", "2026-10-31", projeto="VAGO"),
+    ])
+
+
+def _ids(agendas):
+    return sorted(a["id"] for a in agendas)
+
+
+def test_sobrepostas_inclui_extremos(indice):
+    # Um dia em comum já é conflito (intervalos fechados)
+    assert _ids(indice.sobrepostas("Ana", date(2026, 10, 5), date(2026, 10, 5))) == [1, 2]
+    assert _ids(indice.sobrepostas("Ana", date(2026, 10, 8), date(2026, 10, 9))) == [2, 3]
+    assert _ids(indice.sobrepostas("Ana", date(2026, 10, 11), date(2026, 10, 20))) == []
+
+
+def test_sobrepostas_ignora_vagas(indice):
+    assert _ids(indice.sobrepostas("Bruno", date(2026, 10, 15), date(2026, 10, 15))) == []
+    assert _ids(indice.agendas_no_periodo("Bruno", date(2026, 10, 15), date(2026, 10, 15))) == [6]
+
+
+def test_intervalos_sobrepostos_e_encostados_sao_mesclados(indice):
+    # 01-05 + 03-08 + 09-10 = 01-10 (dez dias, sem contar os dias em comum duas vezes)
+    assert indice.dias_ocupados(["Ana"], date(2026, 10, 1), date(2026, 10, 31)) == 10
+    assert indice.periodos_livres(["Ana"], date(2026, 10, 1), date(2026, 10, 12)) == [
+        (date(2026, 10, 11), date(2026, 10, 12))
+    ]
+    assert indice.proximo_dia_livre(["Ana"], date(2026, 10, 2)) == date(2026, 10, 11)
+
+
+def test_intervalos_adjacentes_com_folga(indice):
+    assert indice.dias_ocupados(["Bruno"], date(2026, 10, 1), date(2026, 10, 5)) == 4
+    assert indice.periodos_livres(["Bruno"], date(2026, 10, 1), date(2026, 10, 6)) == [
+        (date(2026, 10, 3), date(2026, 10, 3)),
+        (date(2026, 10, 6), date(2026, 10, 6)),
+    ]
+    assert indice.proximo_dia_livre(["Bruno"], date(2026, 10, 1)) == date(2026, 10, 3)
+
+
+def test_periodo_recorta_as_pontas(indice):
+    assert indice.dias_ocupados(["Ana"], date(2026, 10, 4), date(2026, 10, 6)) == 3
+    assert indice.dias_ocupados(["Ana", "Bruno"], date(2026, 9, 28), date(2026, 10, 2)) == 2
+
+
+def test_consultor_sem_agendas_ocupadas(indice):
+    for consultor in ("Carla", "Zeca"):
+        assert indice.sobrepostas(consultor, date(2026, 10, 1), date(2026, 10, 31)) == []
+        assert indice.dias_ocupados([consultor], date(2026, 10, 1), date(2026, 10, 31)) == 0
+        assert indice.periodos_livres([consultor], date(2026, 10, 1), date(2026, 10, 31)) == [
+            (date(2026, 10, 1), date(2026, 10, 31))
+        ]
+        assert indice.proximo_dia_livre([consultor], date(2026, 10, 7)) == date(2026, 10, 7)
+
+
+def test_dias_ocupados_por_consultor_igual_ao_calculo_individual(indice):
+    inicio, fim = date(2026, 10, 2), date(2026, 10, 9)
+    totais = indice.dias_ocupados_por_consultor(inicio, fim)
+    assert totais == {c: indice.dias_ocupados([c], inicio, fim) for c in indice.consultores}
+    assert totais["Carla"] == 0
+
+
+def test_indice_vazio():
+    indice = AgendaIndex([])
+    assert indice.consultores == []
+    assert indice.dias_ocupados_por_consultor(date(2026, 10, 1), date(2026, 10, 31)) == {}
+    assert indice.sobrepostas("Ana", date(2026, 10, 1), date(2026, 10, 31)) == []
+
+
+def test_projetos_aproximados_montado_uma_vez(indice):
+    assert indice.projetos_aproximados is indice.projetos_aproximados
+    assert indice.projetos_aproximados.resolver("Alpa") == "Alpha"
+    # Projetos só de agendas vagas não entram
+    assert indice.projetos_aproximados.resolver("VAGO") is None
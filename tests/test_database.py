@@ -0,0 +1,231 @@
+"""
+Testes de database.py sobre o cliente falso (tests/conftest.py)
+"""
+import math
+from datetime import date
+import pytest
+from postgrest.exceptions import APIError
+import database
+from conftest import agenda
+from database import KPIS, ConflitoDeVersao
+
+
+def test_bulk_rejeita_os_vazia_sem_derrubar_o_bloco(db, cliente):
+    linhas = [agenda(consultor=f"C{i}", os=str(i)) for i in range(5)]
+    linhas[2]["os"] = math.nan  # Célula vazia da planilha (pandas)
+
+    resultados = db.create_agendas_bulk(linhas, chunk_size=5)
+
+    assert [r["ok"] for r in resultados] == [True, True, False, True, True]
+    assert resultados[2]["erro"] == "OS é obrigatória"
+    assert len(cliente.tabelas["agendas"]) == 4
+
+
+def test_bulk_bloco_recusado_e_reenviado_linha_a_linha(db, cliente):
+    def recusar(consulta):
+        # Restrição do banco que a validação em memória não conhece
+        linhas = consulta.payload if consulta.operacao == "insert" else None
+        if linhas and any(l["consultor"] == "Bloqueado" for l in linhas):
+            raise RuntimeError("violates check constraint")
+    cliente.falha = recusar
+
+    linhas = [agenda(consultor=nome) for nome in ("Ana", "Bloqueado", "Bruno")]
+    resultados = db.create_agendas_bulk(linhas, chunk_size=3)
+
+    assert [r["ok"] for r in resultados] == [True, False, True]
+    assert "violates check constraint" in resultados[1]["erro"]
+    assert sorted(l["consultor"] for l in cliente.tabelas["agendas"]) == ["Ana", "Bruno"]
+
+
+def test_bulk_conflito_so_com_linhas_gravadas(db, cliente):
+    cliente.carregar("agendas", [agenda(consultor="Ana", data_inicio="2026-10-01", data_fim="2026-10-03",
+                                        projeto="Antigo")])
+
+    def recusar(consulta):
+        if consulta.operacao == "insert" and any(l["projeto"] == "Recusado" for l in consulta.payload):
+            raise RuntimeError("recusado")
+    cliente.falha = recusar
+
+    resultados = db.create_agendas_bulk([
+        agenda(consultor="Ana", data_inicio="2026-10-02", projeto="Novo"),
+        agenda(consultor="Bruno", data_inicio="2026-10-10", projeto="Recusado"),
+        agenda(consultor="Bruno", data_inicio="2026-10-10", projeto="Outro"),
+    ])
+
+    assert "Antigo" in resultados[0]["conflito"]
+    assert not resultados[1]["ok"]
+    # A linha recusada não conta como conflito para a seguinte
+    assert resultados[2]["ok"] and resultados[2]["conflito"] is None
+
+
+def test_bulk_conflitos_paginados(db, cliente):
+    cliente.max_rows = 10
+    cliente.carregar("agendas", [agenda(consultor="Ana", projeto=f"P{i}", os=str(i)) for i in range(25)])
+
+    resultado = db.create_agendas_bulk([agenda(consultor="Ana", projeto="Novo")])[0]
+
+    assert resultado["ok"]
+    assert len(resultado["conflito"].splitlines()) == 25
+
+
+def test_bulk_falha_na_verificacao_de_conflitos_avisa(db, cliente, mensagens):
+    def falhar(consulta):
+        if consulta.operacao == "select":
+            raise RuntimeError("timeout")
+    cliente.falha = falhar
+
+    resultado = db.create_agendas_bulk([agenda()])[0]
+
+    assert resultado["ok"]
+    assert any("timeout" in m for m in mensagens["warning"])
+
+
+def test_kpis_sem_funcao_calcula_pelo_snapshot(db, cliente):
+    cliente.carregar("agendas", [agenda(consultor="Ana"), agenda(consultor="Bruno", projeto="Beta")])
+
+    kpis = db.get_kpis(date(2026, 10, 1))
+
+    assert kpis["total"] == 2 and kpis["ativas"] == 2 and kpis["projetos"] == 2
+    assert db.get_top_projects(1) == [{"projeto": "Alpha", "agendas": 1}]
+
+
+def test_kpis_falha_transitoria_nao_baixa_a_tabela(db, cliente, mensagens):
+    cliente.carregar("agendas", [agenda()])
+
+    def fora_do_ar(parametros):
+        raise APIError({"code": "PGRST000", "message": "upstream timeout"})
+    cliente.funcoes = {"agendas_kpis": fora_do_ar, "agendas_top_projetos": fora_do_ar}
+
+    assert db.get_kpis(date(2026, 10, 1))["total"] == 0
+    assert db.get_top_projects() == []
+    assert not any(getattr(c, "tabela", None) == "agendas" for c in cliente.consultas)
+    assert len(mensagens["error"]) == 2
+
+
+def test_kpis_pela_funcao_ficam_em_cache(db, cliente):
+    chamadas = []
+    cliente.funcoes["agendas_kpis"] = lambda p: chamadas.append(p) or [dict.fromkeys(KPIS, 3)]
+
+    assert db.get_kpis(date(2026, 10, 1))["total"] == 3
+    assert db.get_kpis(date(2026, 10, 1))["total"] == 3
+    assert len(chamadas) == 1
+
+
+def test_delete_where_devolve_so_a_contagem(db, cliente):
+    cliente.carregar("agendas", [agenda(data_inicio=f"2026-09-{d:02d}") for d in range(1, 21)] + [agenda()])
+
+    assert db.delete_where(data_fim_antes="2026-10-01") == 20
+
+    remocao = [c for c in cliente.consultas if getattr(c, "operacao", None) == "delete"][0]
+    assert remocao.returning == "minimal" and remocao.count == "exact"
+    assert len(cliente.tabelas["agendas"]) == 1
+
+
+def test_delete_many_soma_as_contagens_dos_blocos(db, cliente):
+    cliente.carregar("agendas", [agenda() for _ in range(7)])
+
+    assert db.delete_many([1, 2, 3, 4, 5, 99], chunk_size=2) == 5
+    assert [l["id"] for l in cliente.tabelas["agendas"]] == [6, 7]
+
+
+def test_dimensao_paginada_e_em_cache(db, cliente):
+    cliente.max_rows = 2
+    cliente.carregar("consultores", [{"nome": n} for n in ("Carla", "Ana", "Bruno", "Davi", "Eva")])
+
+    assert db.list_consultores() == ["Ana", "Bruno", "Carla", "Davi", "Eva"]
+    lidas = len(cliente.consultas)
+    assert db.list_consultores() == ["Ana", "Bruno", "Carla", "Davi", "Eva"]
+    assert len(cliente.consultas) == lidas
+
+
+def test_dimensao_sem_tabela_usa_as_agendas(db, cliente):
+    cliente.carregar("agendas", [agenda(consultor="Bruno"), agenda(consultor="Ana"), agenda(consultor="Bruno")])
+
+    def sem_tabela(consulta):
+        if consulta.tabela == "consultores":
+            raise APIError({"code": "PGRST205", "message": "relation not found"})
+    cliente.falha = sem_tabela
+
+    assert db.list_consultores() == ["Ana", "Bruno"]
+
+
+def test_renomear_descarta_a_lista_de_dimensao(db, cliente):
+    cliente.carregar("agendas", [agenda(consultor="Ana")])
+    cliente.carregar("consultores", [{"nome": "Ana"}])
+    assert db.list_consultores() == ["Ana"]
+
+    db.update_agenda(1, consultor="Bruno")
+    # Trigger podar_dimensoes_agenda
+    cliente.tabelas["consultores"] = [{"id": 2, "nome": "Bruno"}]
+
+    assert db.list_consultores() == ["Bruno"]
+
+
+def test_renomear_linha_do_snapshot_descarta_so_a_dimensao_alterada(db, cliente):
+    cliente.carregar("agendas", [agenda(consultor="Ana", projeto="Alpha")])
+    cliente.carregar("consultores", [{"nome": "Ana"}])
+    cliente.carregar("projetos", [{"nome": "Alpha"}])
+    db.get_all_agendas()
+    assert db.list_consultores() == ["Ana"] and db.list_projetos() == ["Alpha"]
+
+    # Edição recebida pelo tempo real (sem passar por update_agenda)
+    linha = dict(cliente.tabelas["agendas"][0], projeto="Beta", updated_at="2026-10-02T00:00:00+00:00")
+    database._snapshot.patch([linha])
+
+    assert database._snapshot.get_agregado(("dimensao", "consultores"), 60) == ["Ana"]
+    assert database._snapshot.get_agregado(("dimensao", "projetos"), 60) is None
+
+
+def test_update_com_versao_lida_grava(db, cliente):
+    cliente.carregar("agendas", [agenda()])
+    lida = dict(cliente.tabelas["agendas"][0])
+
+    gravada = db.update_agenda(1, expected_updated_at=lida["updated_at"], projeto="Beta")
+
+    assert gravada["projeto"] == "Beta" and gravada["updated_at"] > lida["updated_at"]
+    # A versão devolvida serve para a edição seguinte
+    assert db.update_agenda(1, expected_updated_at=gravada["updated_at"], os="2")["os"] == "2"
+
+
+def test_update_com_versao_antiga_levanta_conflito(db, cliente):
+    cliente.carregar("agendas", [agenda()])
+    db.get_all_agendas()
+    lida = dict(cliente.tabelas["agendas"][0])
+    # Outra sessão editou depois da leitura
+    cliente.table("agendas").update({"consultor": "Bruno"}).eq("id", 1).execute()
+
+    with pytest.raises(ConflitoDeVersao) as conflito:
+        db.update_agenda(1, expected_updated_at=lida["updated_at"], projeto="Beta")
+
+    assert conflito.value.atual["consultor"] == "Bruno"
+    assert cliente.tabelas["agendas"][0]["projeto"] == "Alpha"
+    # O snapshot recebe a linha atual, para a tela mostrar o que mudou
+    assert db.get_all_agendas()[0]["consultor"] == "Bruno"
+
+
+def test_detalhes_com_versao_antiga_levanta_conflito(db, cliente):
+    cliente.carregar("agendas", [agenda()])
+    lida = dict(cliente.tabelas["agendas"][0])
+    cliente.table("agendas").update({"horas_cliente": 4}).eq("id", 1).execute()
+
+    with pytest.raises(ConflitoDeVersao):
+        db.atualizar_detalhes_agenda(1, horas_cliente=8, expected_updated_at=lida["updated_at"])
+    assert cliente.tabelas["agendas"][0]["horas_cliente"] == 4
+
+
+def test_update_de_agenda_removida(db, cliente, mensagens):
+    cliente.carregar("agendas", [agenda(), agenda(consultor="Bruno")])
+    db.get_all_agendas()
+    lida = dict(cliente.tabelas["agendas"][0])
+    cliente.table("agendas").delete().eq("id", 1).execute()
+
+    assert db.update_agenda(1, expected_updated_at=lida["updated_at"], projeto="Beta") is None
+    assert [r["id"] for r in db.get_all_agendas()] == [2]
+    assert mensagens["error"] == []
+
+
+def test_update_sem_versao_sobrescreve(db, cliente):
+    cliente.carregar("agendas", [agenda()])
+    cliente.table("agendas").update({"consultor": "Bruno"}).eq("id", 1).execute()
+
+    assert db.update_agenda(1, projeto="Beta")["consultor"] == "Bruno"
@@ -0,0 +1,112 @@
+"""
+Testes do gazetteer de consultores (Aho-Corasick) e da BK-tree
+"""
+import pytest
+from gazetteer import BKTree, Gazetteer, NomesAproximados, distancia, tolerancia
+
+
+@pytest.fixture
+def gazetteer():
+    return Gazetteer(["Ana Souza", "Ana Lima", "André Luiz Cruz", "Sirlene", "Luiz"])
+
+
+def test_apenas_palavras_inteiras(gazetteer):
+    assert gazetteer.encontrar("Banana e analista") == []
+    assert gazetteer.consultor("Agenda da Sirlene?") == "Sirlene"
+    assert gazetteer.consultor("Sirlenes") is None
+
+
+def test_ignora_acentos_e_maiusculas(gazetteer):
+    assert gazetteer.consultor("agenda do ANDRE luiz cruz") == "André Luiz Cruz"
+    assert gazetteer.consultor("o andré está livre?") == "André Luiz Cruz"
+    # O trecho devolvido é o do texto original, com acentos e espaços
+    assert gazetteer.melhor("Agenda  da  SÍRLENE").trecho == "SÍRLENE"
+    assert gazetteer.melhor("Agenda  do  André   Cruz").trecho == "André   Cruz"
+
+
+def test_apelido_compartilhado(gazetteer):
+    ocorrencia = gazetteer.melhor("agenda da ana amanhã")
+    assert ocorrencia.nomes == ("Ana Lima", "Ana Souza")
+    # Ambíguo: devolve o trecho para a busca cobrir todos os consultores
+    assert gazetteer.consultor("agenda da ana amanhã") == "ana"
+    assert gazetteer.consultor("agenda da Ana Lima") == "Ana Lima"
+
+
+def test_ocorrencia_mais_longa_prevalece(gazetteer):
+    texto = "o Andre Luiz Cruz e o Luiz"
+    trechos = [o.trecho for o in gazetteer.encontrar(texto)]
+    # "andre luiz cruz" contém "luiz" (outro consultor) e "andre" (apelido)
+    assert trechos[:3] == ["Andre Luiz Cruz", "Andre", "Luiz"]
+    assert gazetteer.melhor(texto).nomes == ("André Luiz Cruz",)
+    assert gazetteer.consultor("só o Luiz") == "Luiz"
+
+
+def test_nomes_iguais_sem_acento_contam_uma_vez():
+    gazetteer = Gazetteer(["Andre", "André", "ANDRÉ"])
+    assert len(gazetteer) == 1
+    assert gazetteer.consultor("andré") == "Andre"
+
+
+def test_apelidos_curtos_sao_descartados():
+    gazetteer = Gazetteer(["Li Wei"])
+    assert gazetteer.consultor("o li está livre?") is None
+    assert gazetteer.consultor("o Li Wei está livre?") == "Li Wei"
+
+
+def test_distancia_de_levenshtein():
+    assert distancia("sirlene", "sirlene") == 0
+    assert distancia("sirlen", "sirlene") == 1
+    assert distancia("sirelne", "sirlene") == 2  # Transposição conta como duas trocas
+    assert distancia("", "ana") == 3
+
+
+@pytest.mark.parametrize("termo, esperado", [
+    ("", 0),
+    ("an", 0),
+    ("ana", 1),
+    ("lucas", 1),
+    ("miguel", 1),
+    ("sirlene", 2),
+    ("projeto alpha", 2),
+])
+def test_tolerancia_por_tamanho(termo, esperado):
+    assert tolerancia(termo) == esperado
+
+
+def test_bktree_respeita_o_limite():
+    arvore = BKTree(["ana", "anna", "bruna", "sirlene", "mayara"])
+    assert arvore.buscar("ana", 0) == [(0, "ana")]
+    assert arvore.buscar("ana", 1) == [(0, "ana"), (1, "anna")]
+    assert arvore.buscar("sirlen", 1) == [(1, "sirlene")]
+    assert arvore.buscar("sirle", 1) == []
+    assert arvore.buscar("sirle", 2) == [(2, "sirlene")]
+    assert BKTree([]).buscar("ana", 2) == []
+
+
+def test_bktree_igual_a_busca_exaustiva():
+    termos = ["ana", "anna", "andre", "andreia", "bruna", "bruno", "lucas", "lucia", "luiz", "sirlene"]
+    arvore = BKTree(termos)
+    for consulta in ("ana", "brune", "luca", "andrea", "xyz", "sirlane"):
+        for maximo in range(4):
+            esperado = sorted((distancia(consulta, t), t) for t in termos if distancia(consulta, t) <= maximo)
+            assert arvore.buscar(consulta, maximo) == esperado
+
+
+def test_resolver_limites_de_tolerancia():
+    nomes = NomesAproximados({"ana": ("Ana",), "bia": ("Bia",), "sirlene": ("Sirlene",), "miguel": ("Miguel",)})
+    # Três letras: um erro
+    assert nomes.resolver("Anna") == "Ana"
+    assert nomes.resolver("Ama") == "Ana"
+    # Seis letras: um erro, não dois
+    assert nomes.resolver("Migel") == "Miguel"
+    assert nomes.resolver("Miguell") == "Miguel"
+    assert nomes.resolver("Mgel") is None
+    # Sete ou mais: dois erros
+    assert nomes.resolver("Sirlne") == "Sirlene"
+    assert nomes.resolver("Sirelne") == "Sirlene"
+    assert nomes.resolver("Srlne") is None
+
+
+def test_resolver_empate_nao_escolhe():
+    nomes = NomesAproximados({"ana": ("Ana",), "ada": ("Ada",)})
+    assert nomes.resolver("Aua") is None
@@ -0,0 +1,69 @@
+"""
+Testes da paginação por chave (keyset) sobre o cliente falso
+"""
+import pytest
+from conftest import agenda
+from database import _filtro_keyset
+
+
+def test_filtro_keyset_ordem_composta():
+    assert _filtro_keyset(("data_inicio", "id"), ("2026-10-01", 7)) == \
+        'data_inicio.gt."2026-10-01",and(data_inicio.eq."2026-10-01",id.gt."7")'
+    assert _filtro_keyset(("id",), (7,)) == 'id.gt."7"'
+
+
+def test_filtro_keyset_escapa_aspas_e_barras():
+    assert _filtro_keyset(("consultor", "id"), ('Ana "Aninha", Souza\\', 1)) == (
+        'consultor.gt."Ana \\"Aninha\\", Souza\\\\",'
+        'and(consultor.eq."Ana \\"Aninha\\", Souza\\\\",id.gt."1")'
+    )
+
+
+@pytest.fixture
+def empates(cliente):
+    """25 agendas, várias no mesmo data_inicio, inseridas fora de ordem"""
+    dias = [5, 1, 3, 1, 1, 5, 2, 3, 1, 4, 1, 2, 5, 3, 1, 1, 4, 2, 5, 1, 3, 1, 2, 1, 1]
+    cliente.carregar("agendas", [agenda(data_inicio=f"2026-10-{d:02d}", os=str(i)) for i, d in enumerate(dias)])
+    return sorted(((l["data_inicio"], l["id"]) for l in cliente.tabelas["agendas"]))
+
+
+@pytest.mark.parametrize("page_size", [1, 4, 11, 25, 1000])
+def test_empates_em_data_inicio_nao_perdem_nem_repetem(db, empates, page_size):
+    lidas = [(r["data_inicio"], r["id"]) for r in db.iter_agendas(page_size=page_size)]
+    assert lidas == empates
+
+
+def test_limite_do_servidor_abaixo_do_page_size(db, cliente, empates):
+    cliente.max_rows = 3
+    assert [(r["data_inicio"], r["id"]) for r in db.iter_agendas(page_size=10)] == empates
+
+
+def test_para_na_pagina_vazia(db, cliente, empates):
+    list(db.iter_agendas(page_size=10))
+    # 10 + 10 + 5 + página vazia
+    assert len(cliente.consultas) == 4
+
+
+def test_projecao_inclui_as_colunas_do_cursor(db, cliente, empates):
+    linhas = list(db.iter_agendas(page_size=10, perfil="conflict", order=("consultor", "updated_at", "id")))
+    assert len(linhas) == 25
+    assert "updated_at" in cliente.consultas[0].colunas
+
+
+def test_cursor_com_texto_escapado(db, cliente):
+    nomes = ['Ana "Aninha"', "Souza, Ana", "Bruno\\", "(Carla)", "Davi"]
+    cliente.carregar("agendas", [agenda(consultor=n) for n in nomes for _ in range(2)])
+
+    lidas = [r["consultor"] for r in db.iter_agendas(page_size=3, order=("consultor", "id"))]
+    assert lidas == sorted(nomes * 2)
+
+
+def test_falha_no_meio_da_leitura_e_propagada(db, cliente, empates):
+    def falhar_na_segunda_pagina(consulta):
+        if consulta.filtros:
+            raise RuntimeError("timeout")
+    cliente.falha = falhar_na_segunda_pagina
+
+    leitura = db.iter_agendas(page_size=10)
+    with pytest.raises(RuntimeError):
+        list(leitura)
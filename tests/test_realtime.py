@@ -0,0 +1,104 @@
+"""
+Testes do tempo real: eventos reproduzidos (ReplayChangeSource) aplicados ao snapshot
+"""
+import pytest
+import database
+from database import RealtimeListener, ReplayChangeSource, _SnapshotCache, _entrada_completa
+
+
+def _linha(agenda_id, consultor="Ana", data_inicio="2026-10-01", updated_at="2026-10-01T10:00:00+00:00"):
+    return {
+        "id": agenda_id, "consultor": consultor, "projeto": "Alpha", "os": "1", "gerente": "Gil",
+        "data_inicio": data_inicio, "data_fim": data_inicio, "is_vago": False, "updated_at": updated_at,
+    }
+
+
+@pytest.fixture
+def snapshot(monkeypatch):
+    """Snapshot novo com o perfil timeline carregado (agendas 1 e 2)"""
+    cache = _SnapshotCache()
+    monkeypatch.setattr(database, "_snapshot", cache)
+    rows = [_linha(2, data_inicio="2026-10-02"), _linha(1)]
+    cache.store("timeline", _entrada_completa("timeline", rows), cache.current_version())
+    return cache
+
+
+def _ids(cache):
+    return [row["id"] for row in cache.entry("timeline").rows]
+
+
+def test_replay_insert_update_delete(snapshot):
+    fonte = ReplayChangeSource([
+        {"type": "INSERT", "record": _linha(3, data_inicio="2026-10-03")},
+        {"type": "UPDATE", "record": _linha(1, consultor="Bruno", updated_at="2026-10-01T11:00:00+00:00")},
+        {"type": "DELETE", "old_record": {"id": 2}},
+    ])
+    listener = RealtimeListener(fonte)
+    listener.iniciar()
+
+    assert listener.aplicados == 3
+    assert _ids(snapshot) == [3, 1]
+    assert snapshot.entry("timeline").rows[1]["consultor"] == "Bruno"
+
+    # Eventos publicados com a fonte ativa são aplicados na hora
+    fonte.publicar({"type": "DELETE", "old_record": {"id": 3}})
+    assert _ids(snapshot) == [1]
+
+    listener.parar()
+    fonte.publicar({"type": "DELETE", "old_record": {"id": 1}})
+    assert _ids(snapshot) == [1]
+
+
+def test_eventos_desconhecidos_sao_ignorados(snapshot):
+    listener = RealtimeListener(ReplayChangeSource())
+    assert not listener.aplicar({"type": "TRUNCATE"})
+    assert not listener.aplicar({"type": "INSERT", "record": {}})
+    assert not listener.aplicar({"type": "DELETE", "old_record": {}})
+    assert listener.aplicados == 0
+    assert _ids(snapshot) == [2, 1]
+
+
+def test_evento_atrasado_nao_desfaz_edicao(snapshot):
+    listener = RealtimeListener(ReplayChangeSource())
+    listener.aplicar({"type": "UPDATE", "record": _linha(1, consultor="Bruno", updated_at="2026-10-01T12:00:00+00:00")})
+    listener.aplicar({"type": "UPDATE", "record": _linha(1, consultor="Carla", updated_at="2026-10-01T11:00:00+00:00")})
+    assert snapshot.entry("timeline").rows[1]["consultor"] == "Bruno"
+
+
+def test_edicao_nao_descarta_busca_em_andamento(snapshot):
+    listener = RealtimeListener(ReplayChangeSource())
+    inicio_busca = snapshot.current_version()
+
+    listener.aplicar({"type": "UPDATE", "record": _linha(1, consultor="Bruno", updated_at="2026-10-01T11:00:00+00:00")})
+    assert snapshot.current_version()[0] == inicio_busca[0]
+
+    # A busca leu a linha antes da edição: o resultado é gravado com a edição reaplicada
+    lidas = [_linha(2, data_inicio="2026-10-02"), _linha(1)]
+    snapshot.store("timeline", _entrada_completa("timeline", lidas), inicio_busca)
+    assert snapshot.entry("timeline").rows[1]["consultor"] == "Bruno"
+
+
+def test_busca_com_linha_mais_nova_prevalece_sobre_edicao(snapshot):
+    listener = RealtimeListener(ReplayChangeSource())
+    inicio_busca = snapshot.current_version()
+    listener.aplicar({"type": "UPDATE", "record": _linha(1, consultor="Bruno", updated_at="2026-10-01T11:00:00+00:00")})
+
+    lidas = [_linha(2, data_inicio="2026-10-02"),
+             _linha(1, consultor="Carla", updated_at="2026-10-01T12:00:00+00:00")]
+    snapshot.store("timeline", _entrada_completa("timeline", lidas), inicio_busca)
+    assert snapshot.entry("timeline").rows[1]["consultor"] == "Carla"
+
+
+@pytest.mark.parametrize("evento", [
+    {"type": "INSERT", "record": _linha(3)},
+    {"type": "DELETE", "old_record": {"id": 2}},
+])
+def test_insercao_e_remocao_descartam_busca_em_andamento(snapshot, evento):
+    listener = RealtimeListener(ReplayChangeSource())
+    inicio_busca = snapshot.current_version()
+    listener.aplicar(evento)
+    esperado = _ids(snapshot)
+
+    snapshot.store("timeline", _entrada_completa("timeline", [_linha(2, data_inicio="2026-10-02"), _linha(1)]),
+                   inicio_busca)
+    assert _ids(snapshot) == esperado
@@ -0,0 +1,125 @@
+"""
+Testes do agrupamento de leituras simultâneas (_SingleFlight) com threads reais
+"""
+import threading
+import pytest
+from database import _SingleFlight
+
+CHAVE = ("get_all_agendas", "timeline")
+ESPERA = 5
+
+
+class _EventoContado(threading.Event):
+    """Event que avisa quando alguém começa a esperar por ele"""
+
+    def __init__(self):
+        super().__init__()
+        self.esperando = threading.Semaphore(0)
+
+    def wait(self, timeout=None):
+        self.esperando.release()
+        return super().wait(timeout)
+
+
+class _Leitura:
+    """
+    Líder bloqueado dentro da busca até liberar(), com seguidores já
+    esperando pelo resultado
+    """
+
+    def __init__(self, voos: _SingleFlight, resultado=None, erro: BaseException = None):
+        self.voos = voos
+        self.resultado, self.erro = resultado, erro
+        self.buscas = 0
+        self.saidas = {}
+        self._iniciou = threading.Event()
+        self._liberar = threading.Event()
+        self._evento = _EventoContado()
+        self._threads = []
+
+    def _buscar(self):
+        self.buscas += 1
+        # Os seguidores esperam no evento do voo registrado pelo líder
+        self.voos._voos[CHAVE].evento = self._evento
+        self._iniciou.set()
+        assert self._liberar.wait(ESPERA)
+        if self.erro is not None:
+            raise self.erro
+        return self.resultado
+
+    def _chamar(self, nome):
+        try:
+            self.saidas[nome] = ("ok", self.voos.do(CHAVE, self._buscar))
+        except BaseException as e:
+            self.saidas[nome] = ("erro", e)
+
+    def _iniciar(self, nome):
+        thread = threading.Thread(target=self._chamar, args=(nome,), daemon=True)
+        thread.start()
+        self._threads.append(thread)
+
+    def executar(self, seguidores: int = 2) -> dict:
+        self._iniciar("lider")
+        assert self._iniciou.wait(ESPERA)
+        for i in range(seguidores):
+            self._iniciar(f"seguidor{i}")
+        for _ in range(seguidores):
+            assert self._evento.esperando.acquire(timeout=ESPERA)
+        self._liberar.set()
+        for thread in self._threads:
+            thread.join(ESPERA)
+            assert not thread.is_alive()
+        return self.saidas
+
+
+@pytest.fixture
+def voos():
+    return _SingleFlight()
+
+
+def test_seguidores_recebem_o_resultado_do_lider(voos):
+    resultado = [{"id": 1}]
+    saidas = _Leitura(voos, resultado=resultado).executar()
+
+    assert voos._voos == {}
+    assert {tipo for tipo, _ in saidas.values()} == {"ok"}
+    assert all(valor is resultado for _, valor in saidas.values())
+
+
+def test_busca_executada_uma_vez(voos):
+    leitura = _Leitura(voos, resultado=[])
+    leitura.executar(seguidores=5)
+    assert leitura.buscas == 1
+
+
+def test_erro_do_lider_chega_aos_seguidores(voos):
+    erro = RuntimeError("timeout")
+    leitura = _Leitura(voos, erro=erro)
+    saidas = leitura.executar()
+
+    assert leitura.buscas == 1
+    assert len(saidas) == 3
+    assert all(tipo == "erro" and valor is erro for tipo, valor in saidas.values())
+
+
+def test_chave_reutilizada_depois_do_erro(voos):
+    _Leitura(voos, erro=RuntimeError("timeout")).executar()
+
+    # Nova chamada com a mesma chave é líder de novo e faz a própria busca
+    assert voos.do(CHAVE, lambda: "novo") == "novo"
+    saidas = _Leitura(voos, resultado="de novo").executar()
+    assert {valor for _, valor in saidas.values()} == {"de novo"}
+
+
+def test_chaves_diferentes_nao_esperam(voos):
+    leitura = _Leitura(voos, resultado="timeline")
+    thread = threading.Thread(target=leitura.executar, kwargs={"seguidores": 0}, daemon=True)
+    thread.start()
+    assert leitura._iniciou.wait(ESPERA)
+
+    # Com o líder de CHAVE bloqueado, outra chave é buscada na hora
+    assert voos.do(("get_all_agendas", "dashboard"), lambda: "dashboard") == "dashboard"
+
+    leitura._liberar.set()
+    thread.join(ESPERA)
+    assert leitura.saidas["lider"] == ("ok", "timeline")
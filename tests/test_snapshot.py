@@ -0,0 +1,233 @@
+"""
+Testes do snapshot compartilhado de agendas (_SnapshotCache) sobre o cliente falso
+"""
+import copy
+import pytest
+import database
+from conftest import agenda
+from database import SNAPSHOT_TTL_SECONDS
+
+
+def _leituras(cliente):
+    """Buscas de linhas de agendas: primeiras páginas, sem a medida de data_version"""
+    return [c for c in cliente.consultas
+            if getattr(c, "tabela", None) == "agendas" and c.operacao == "select"
+            and c.colunas != "updated_at" and not c.filtros]
+
+
+def _expirar(perfil):
+    database._snapshot.entry(perfil).loaded_at -= SNAPSHOT_TTL_SECONDS + 1
+
+
+def test_sessoes_compartilham_o_snapshot(db, cliente):
+    cliente.carregar("agendas", [agenda(consultor="Ana"), agenda(consultor="Bruno", data_inicio="2026-10-05")])
+    outra_sessao = copy.copy(db)
+
+    assert [r["consultor"] for r in db.get_all_agendas()] == ["Bruno", "Ana"]
+    assert [r["consultor"] for r in outra_sessao.get_all_agendas()] == ["Bruno", "Ana"]
+    assert len(_leituras(cliente)) == 1
+
+
+def test_perfil_mais_amplo_atende_o_menor(db, cliente):
+    cliente.carregar("agendas", [agenda()])
+
+    db.get_all_agendas("full")
+    assert db.get_all_agendas("timeline")[0]["consultor"] == "Ana"
+    assert db.get_all_agendas("periodo")[0]["consultor"] == "Ana"
+    assert len(_leituras(cliente)) == 1
+
+    # O contrário não vale: o perfil periodo não tem projeto
+    database._snapshot.entries.pop("full")
+    db.get_all_agendas("periodo")
+    db.get_all_agendas("timeline")
+    assert len(_leituras(cliente)) == 3
+
+
+def test_copia_devolvida_nao_altera_o_snapshot(db, cliente):
+    cliente.carregar("agendas", [agenda()])
+
+    db.get_all_agendas().clear()
+    assert len(db.get_all_agendas()) == 1
+
+
+def test_snapshot_expirado_traz_as_mudancas(db, cliente):
+    cliente.carregar("agendas", [agenda(consultor="Ana")])
+    db.get_all_agendas("timeline")
+
+    # Escrita de outro processo: o snapshot só a vê depois do TTL
+    cliente.carregar("agendas", [agenda(consultor="Bruno", data_inicio="2026-10-05")])
+    assert len(db.get_all_agendas("timeline")) == 1
+
+    _expirar("timeline")
+    assert [r["consultor"] for r in db.get_all_agendas("timeline")] == ["Bruno", "Ana"]
+
+
+def test_busca_anterior_a_invalidacao_nao_e_gravada(db, cliente):
+    cliente.carregar("agendas", [agenda()])
+
+    def invalidar_durante_a_busca(consulta):
+        if consulta in _leituras(cliente):
+            cliente.falha = None
+            database._snapshot.invalidate()  # Outra sessão gravou no meio da busca
+    cliente.falha = invalidar_durante_a_busca
+
+    assert len(db.get_all_agendas("timeline")) == 1
+    assert database._snapshot.entry("timeline") is None
+
+    # A leitura seguinte busca de novo e grava
+    db.get_all_agendas("timeline")
+    assert len(_leituras(cliente)) == 2
+    assert database._snapshot.entry("timeline") is not None
+
+
+def test_invalidate_cache_forca_nova_leitura(db, cliente):
+    cliente.carregar("agendas", [agenda()])
+    db.get_all_agendas("timeline")
+    versao = database._snapshot.current_version()
+
+    db.invalidate_cache()
+    cliente.carregar("agendas", [agenda(consultor="Bruno")])
+
+    assert database._snapshot.current_version()[0] == versao[0] + 1
+    assert len(db.get_all_agendas("timeline")) == 2
+
+
+def test_falha_na_busca_nao_grava_snapshot(db, cliente, mensagens):
+    cliente.carregar("agendas", [agenda()])
+
+    def fora_do_ar(consulta):
+        raise RuntimeError("connection reset")
+    cliente.falha = fora_do_ar
+
+    assert db.get_all_agendas() == []
+    assert "connection reset" in mensagens["error"][0]
+    assert database._snapshot.entry("full") is None
+
+    cliente.falha = None
+    assert len(db.get_all_agendas()) == 1
+
+
+@pytest.fixture
+def dois_perfis(db, cliente):
+    """Snapshot com os perfis full e timeline carregados"""
+    cliente.carregar("agendas", [agenda(consultor="Ana"), agenda(consultor="Bruno", data_inicio="2026-10-05")])
+    db.get_all_agendas("full")
+    # get_all_agendas("timeline") seria atendido pelo perfil full
+    db.sync("timeline")
+    return cliente
+
+
+def test_insercao_aplicada_sem_nova_busca(db, dois_perfis):
+    buscas = len(_leituras(dois_perfis))
+    marcas = database._snapshot.entry("full").updated_max
+
+    nova = db.create_agenda("Carla", "2026-10-03", "2026-10-04", "Gama", os="9")
+
+    assert [r["consultor"] for r in db.get_all_agendas("full")] == ["Bruno", "Carla", "Ana"]
+    timeline = database._snapshot.entry("timeline").rows
+    assert [r["id"] for r in timeline] == [2, nova["id"], 1]
+    # Projetada nas colunas do perfil
+    assert "created_at" in nova and "created_at" not in timeline[1]
+    assert len(_leituras(dois_perfis)) == buscas
+    # As marcas de sincronização não avançam com a escrita local
+    assert database._snapshot.entry("full").updated_max == marcas
+
+
+def test_edicao_aplicada_sem_nova_busca(db, dois_perfis):
+    buscas = len(_leituras(dois_perfis))
+    versao = database._snapshot.current_version()
+
+    db.update_agenda(1, consultor="Davi", data_inicio="2026-10-09", data_fim="2026-10-09")
+
+    assert [r["consultor"] for r in db.get_all_agendas("timeline")] == ["Davi", "Bruno"]
+    assert len(_leituras(dois_perfis)) == buscas
+    # Edição de linha conhecida: buscas em andamento continuam válidas
+    assert database._snapshot.current_version()[0] == versao[0]
+
+
+def test_remocao_aplicada_sem_nova_busca(db, dois_perfis):
+    buscas = len(_leituras(dois_perfis))
+
+    assert db.delete_agenda(2)
+
+    assert [r["id"] for r in db.get_all_agendas("full")] == [1]
+    assert [r["id"] for r in database._snapshot.entry("timeline").rows] == [1]
+    assert len(_leituras(dois_perfis)) == buscas
+
+
+def test_escrita_sem_snapshot_nao_cria_entrada(db, cliente):
+    db.create_agenda("Carla", "2026-10-03", "2026-10-04", "Gama", os="9")
+    assert database._snapshot.entries == {}
+    assert len(db.get_all_agendas()) == 1
+
+
+def _sondagens(cliente):
+    return [c for c in cliente.consultas if getattr(c, "tabela", None) == "agendas" and c.colunas == "updated_at"]
+
+
+def _consultas_de_linhas(cliente, desde):
+    return [c for c in cliente.consultas[desde:]
+            if getattr(c, "tabela", None) in ("agendas", "agendas_removidas") and c.colunas != "updated_at"]
+
+
+def test_dados_iguais_renovam_sem_buscar_linhas(db, cliente):
+    cliente.carregar("agendas", [agenda(), agenda(consultor="Bruno")])
+    db.get_all_agendas("timeline")
+    _expirar("timeline")
+    inicio = len(cliente.consultas)
+
+    assert len(db.get_all_agendas("timeline")) == 2
+
+    assert _consultas_de_linhas(cliente, inicio) == []
+    sondagem = _sondagens(cliente)[-1]
+    assert (sondagem.count, sondagem.limite, sondagem.devolvidas) == ("exact", 1, 1)
+    # Renovada: a leitura seguinte nem sonda
+    assert database._snapshot.fresh_entry("timeline", SNAPSHOT_TTL_SECONDS) is not None
+    db.get_all_agendas("timeline")
+    assert len(cliente.consultas) == inicio + 1
+
+
+@pytest.mark.parametrize("mudanca", ["edicao", "remocao"])
+def test_dados_alterados_sincronizam(db, cliente, mudanca):
+    cliente.carregar("agendas", [agenda(), agenda(consultor="Bruno")])
+    db.get_all_agendas("timeline")
+    if mudanca == "edicao":
+        cliente.table("agendas").update({"consultor": "Carla"}).eq("id", 1).execute()
+    else:
+        # A remoção não move o maior updated_at, só a contagem
+        cliente.table("agendas").delete().eq("id", 1).execute()
+    _expirar("timeline")
+    inicio = len(cliente.consultas)
+
+    nomes = sorted(r["consultor"] for r in db.get_all_agendas("timeline"))
+
+    assert nomes == (["Bruno", "Carla"] if mudanca == "edicao" else ["Bruno"])
+    assert _consultas_de_linhas(cliente, inicio) != []
+
+
+def test_sondagem_com_falha_segue_pela_sincronizacao(db, cliente):
+    cliente.carregar("agendas", [agenda()])
+    db.get_all_agendas("timeline")
+    _expirar("timeline")
+
+    def sem_sondagem(consulta):
+        if consulta.colunas == "updated_at":
+            raise RuntimeError("timeout")
+    cliente.falha = sem_sondagem
+    inicio = len(cliente.consultas)
+
+    assert len(db.get_all_agendas("timeline")) == 1
+    assert _consultas_de_linhas(cliente, inicio) != []
+    assert database._snapshot.entry("timeline").versao_dados is None
+
+
+def test_escrita_local_impede_a_renovacao(db, cliente):
+    cliente.carregar("agendas", [agenda()])
+    db.get_all_agendas("timeline")
+    entrada = database._snapshot.entry("timeline")
+    _expirar("timeline")
+    versao = database._snapshot.current_version()
+
+    database._snapshot.patch([dict(entrada.rows[0], consultor="Bruno")])
+
+    assert not database._snapshot.renew("timeline", database._snapshot.entry("timeline"), versao)
@@ -0,0 +1,117 @@
+"""
+Testes da sincronização incremental (updated_at e agendas_removidas) sobre o cliente falso
+"""
+from datetime import timedelta
+import pytest
+from postgrest.exceptions import APIError
+import database
+from conftest import agenda
+from database import SYNC_COMPLETO_SEGUNDOS, SYNC_MARGEM_SEGUNDOS
+
+
+def _cargas_completas(cliente):
+    """Primeiras páginas de leituras completas das agendas"""
+    return [c for c in cliente.consultas
+            if getattr(c, "tabela", None) == "agendas" and c.operacao == "select"
+            and c.colunas != "updated_at" and not c.filtros]
+
+
+def _ids(linhas):
+    return sorted(l["id"] for l in linhas)
+
+
+@pytest.fixture
+def carregado(db, cliente):
+    """Snapshot timeline carregado com as agendas 1 a 5"""
+    cliente.carregar("agendas", [agenda(consultor=f"C{i}", data_inicio=f"2026-10-0{i}") for i in range(1, 6)])
+    db.get_all_agendas("timeline")
+    return cliente
+
+
+def test_sync_aplica_edicoes_insercoes_e_remocoes(db, carregado):
+    carregado.table("agendas").update({"consultor": "Bruno"}).eq("id", 2).execute()
+    carregado.table("agendas").insert(agenda(consultor="Novo", data_inicio="2026-10-09")).execute()
+    carregado.table("agendas").delete().eq("id", 4).execute()
+
+    linhas = db.sync("timeline")
+
+    assert _ids(linhas) == [1, 2, 3, 5, 6]
+    assert next(l for l in linhas if l["id"] == 2)["consultor"] == "Bruno"
+    # Sem nova carga completa; ordem de data_inicio decrescente mantida
+    assert len(_cargas_completas(carregado)) == 1
+    assert [l["data_inicio"] for l in linhas] == sorted((l["data_inicio"] for l in linhas), reverse=True)
+
+
+def test_sync_so_pede_o_que_mudou(db, carregado):
+    for agenda_id in (2, 3):
+        # Fora da margem de SYNC_MARGEM_SEGUNDOS da sincronização anterior
+        carregado.avancar(SYNC_MARGEM_SEGUNDOS + 60)
+        carregado.table("agendas").update({"consultor": "Bruno"}).eq("id", agenda_id).execute()
+        inicio = len(carregado.consultas)
+        db.sync("timeline")
+
+    lidas = [c for c in carregado.consultas[inicio:] if c.tabela == "agendas" and c.colunas != "updated_at"]
+    # A edição nova e a última já vista (relida por estar dentro da margem), não as cinco
+    assert sum(c.devolvidas for c in lidas) == 2
+
+
+def test_sync_com_edicao_dentro_da_margem(db, carregado):
+    # Relógio de outro servidor um pouco atrasado: updated_at menor que o último visto
+    entrada = database._snapshot.entry("timeline")
+    atrasado = (entrada.updated_max - timedelta(seconds=10)).isoformat()
+    linha = next(l for l in carregado.tabelas["agendas"] if l["id"] == 3)
+    linha.update(consultor="Carla", updated_at=atrasado)
+
+    assert next(l for l in db.sync("timeline") if l["id"] == 3)["consultor"] == "Carla"
+
+
+def test_lapides_paginadas(db, carregado):
+    carregado.carregar("agendas", [agenda(consultor="Extra", os=str(i)) for i in range(20)])
+    database._snapshot.invalidate()
+    db.get_all_agendas("timeline")
+
+    carregado.max_rows = 3
+    carregado.table("agendas").delete().eq("consultor", "Extra").execute()
+
+    assert _ids(db.sync("timeline")) == [1, 2, 3, 4, 5]
+    lapides = [c for c in carregado.consultas if c.tabela == "agendas_removidas"]
+    assert len(lapides) > 20 // 3
+
+
+def test_sem_tabela_de_remocoes_recarrega_tudo(db, carregado):
+    def sem_lapides(consulta):
+        if consulta.tabela == "agendas_removidas":
+            raise APIError({"code": "PGRST205", "message": "relation not found"})
+    carregado.falha = sem_lapides
+    carregado.table("agendas").delete().eq("id", 1).execute()
+
+    assert _ids(db.sync("timeline")) == [2, 3, 4, 5]
+    assert len(_cargas_completas(carregado)) == 2
+
+
+def test_recarga_completa_periodica(db, carregado):
+    database._snapshot.entry("timeline").full_at -= SYNC_COMPLETO_SEGUNDOS + 1
+    db.sync("timeline")
+    assert len(_cargas_completas(carregado)) == 2
+
+
+def test_perfil_sem_updated_at_sempre_recarrega(db, carregado):
+    db.sync("conflict")
+    carregado.table("agendas").delete().eq("id", 1).execute()
+
+    assert _ids(db.sync("conflict")) == [2, 3, 4, 5]
+    # timeline (carga inicial) + conflict duas vezes
+    assert len(_cargas_completas(carregado)) == 3
+
+
+def test_marcas_avancam_com_o_sync(db, carregado):
+    carregado.table("agendas").delete().eq("id", 5).execute()
+    carregado.table("agendas").update({"consultor": "Bruno"}).eq("id", 1).execute()
+    antes = database._snapshot.entry("timeline")
+
+    db.sync("timeline")
+
+    depois = database._snapshot.entry("timeline")
+    assert depois.updated_max > antes.updated_max
+    assert depois.removido_max > antes.removido_max
+    assert depois.full_at == antes.full_at
@@ -24,18 +24,11 @@ def render_timeline_view(db: Database, mes_selecionado: int = None, ano_selecion
     else:
         ultimo_dia = datetime(ano, mes + 1, 1) - timedelta(days=1)
     
-    # Buscar todas as agendas do período
-    agendas = db.get_all_agendas()
+    # Índice de intervalos das agendas (construído uma vez por snapshot)
+    indice = db.get_agenda_index(perfil="timeline")
     
-    # Filtrar agendas que se sobrepõem ao mês selecionado
-    agendas_mes = [
-        a for a in agendas
-        if not (datetime.strptime(a['data_fim'], "%Y-%m-%d").date() < primeiro_dia.date() or
-               datetime.strptime(a['data_inicio'], "%Y-%m-%d").date() > ultimo_dia.date())
-    ]
-    
-    # Obter lista de consultores únicos
-    consultores = sorted(list(set([a['consultor'] for a in agendas_mes])))
+    # Obter lista de consultores com agendas que se sobrepõem ao mês selecionado
+    consultores = indice.consultores_no_periodo(primeiro_dia.date(), ultimo_dia.date())
     
     if not consultores:
         st.info("📭 Não há agendas cadastradas para este período.")
@@ -43,43 +36,42 @@ def render_timeline_view(db: Database, mes_selecionado: int = None, ano_selecion
     
     # Criar estrutura de dados para o calendário
     dias_mes = (ultimo_dia - primeiro_dia).days + 1
+    colunas_dias = []
+    for dia_offset in range(dias_mes):
+        dia_atual = primeiro_dia + timedelta(days=dia_offset)
+        dia_str = dia_atual.strftime("%d/%m")
+        dia_semana = ["SEG", "TER", "QUA", "QUI", "SEX", "SÁB", "DOM"][dia_atual.weekday()]
+        colunas_dias.append(f"{dia_str}\n{dia_semana}")
     
     # Criar DataFrame para visualização
     data = []
+    agendas_mes = []
     
     for consultor in consultores:
-        linha = {"Consultor": consultor}
+        agendas_consultor = indice.agendas_no_periodo(consultor, primeiro_dia.date(), ultimo_dia.date())
+        agendas_mes.extend(agendas_consultor)
         
-        # Para cada dia do mês
-        for dia_offset in range(dias_mes):
-            dia_atual = primeiro_dia + timedelta(days=dia_offset)
-            dia_str = dia_atual.strftime("%d/%m")
-            dia_semana = ["SEG", "TER", "QUA", "QUI", "SEX", "SÁB", "DOM"][dia_atual.weekday()]
-            
-            # Buscar agenda do consultor para este dia
-            agenda_dia = None
-            for agenda in agendas_mes:
-                if agenda['consultor'] == consultor:
-                    a_inicio = datetime.strptime(agenda['data_inicio'], "%Y-%m-%d").date()
-                    a_fim = datetime.strptime(agenda['data_fim'], "%Y-%m-%d").date()
-                    
-                    if a_inicio <= dia_atual.date() <= a_fim:
-                        agenda_dia = agenda
-                        break
+        # Preencher os dias cobertos por cada agenda (vagas primeiro, ocupadas por cima)
+        celulas = [""] * dias_mes
+        for agenda_dia in agendas_consultor:
+            is_vago = agenda_dia.is_vago
             
-            # Definir status do dia
-            if agenda_dia:
-                is_vago = agenda_dia.get('is_vago', False) or agenda_dia.get('projeto', '').upper() in ['VAGO', 'LIVRE']
-                
-                if is_vago:
-                    linha[f"{dia_str}\n{dia_semana}"] = "🟢 LIVRE"
-                else:
-                    projeto = agenda_dia['projeto']
-                    os_info = f" - {agenda_dia['os']}" if agenda_dia.get('os') else ""
-                    linha[f"{dia_str}\n{dia_semana}"] = f"🔴 {projeto}{os_info}"
+            if is_vago:
+                valor = "🟢 LIVRE"
             else:
-                linha[f"{dia_str}\n{dia_semana}"] = ""
+                projeto = agenda_dia['projeto']
+                os_info = f" - {agenda_dia['os']}" if agenda_dia.get('os') else ""
+                valor = f"🔴 {projeto}{os_info}"
+            
+            a_inicio = agenda_dia.inicio
+            a_fim = agenda_dia.fim
+            primeiro = max((a_inicio - primeiro_dia.date()).days, 0)
+            ultimo = min((a_fim - primeiro_dia.date()).days, dias_mes - 1)
+            for dia_offset in range(primeiro, ultimo + 1):
+                celulas[dia_offset] = valor
         
+        linha = {"Consultor": consultor}
+        linha.update(zip(colunas_dias, celulas))
         data.append(linha)
     
     # Criar DataFrame
@@ -202,13 +194,13 @@ def render_compact_timeline(db: Database, dias: int = 30):
     hoje = datetime.now().date()
     fim = hoje + timedelta(days=dias)
     
-    agendas = db.get_all_agendas()
+    agendas = db.get_all_registros(perfil="timeline")
     
     # Filtrar agendas do período
     agendas_periodo = [
         a for a in agendas
-        if not (datetime.strptime(a['data_fim'], "%Y-%m-%d").date() < hoje or
-               datetime.strptime(a['data_inicio'], "%Y-%m-%d").date() > fim)
+        if not (a.fim < hoje or
+               a.inicio > fim)
     ]
     
     consultores = sorted(list(set([a['consultor'] for a in agendas_periodo])))
@@ -220,10 +212,10 @@ def render_compact_timeline(db: Database, dias: int = 30):
             agendas_consultor = [a for a in agendas_periodo if a['consultor'] == consultor]
             
             for agenda in sorted(agendas_consultor, key=lambda x: x['data_inicio']):
-                inicio = datetime.strptime(agenda['data_inicio'], "%Y-%m-%d").strftime("%d/%m")
-                fim = datetime.strptime(agenda['data_fim'], "%Y-%m-%d").strftime("%d/%m")
+                inicio = agenda.inicio.strftime("%d/%m")
+                fim = agenda.fim.strftime("%d/%m")
                 
-                is_vago = agenda.get('is_vago', False) or agenda.get('projeto', '').upper() in ['VAGO', 'LIVRE']
+                is_vago = agenda.is_vago
                 
                 if is_vago:
                     st.success(f"🟢 **LIVRE**: {inicio} a {fim}")